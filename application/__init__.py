@@ -1,28 +1,39 @@
 import os
 from flask import Flask
-from .config import get_config
-from .database import db, bcrypt, login_manager
+from .config import get_config, ROOT_DIR
+from .database import db, bcrypt, login_manager, migrate
+
+MIGRATIONS_DIR = os.path.join(ROOT_DIR, "migrations")
 
 def create_app():
     app = Flask(__name__, static_folder="static", template_folder="templates")
     app.config.from_object(get_config())
+    if app.config["PROXY_FIX_X_FOR"]:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
 
+    from .utils import sqlite as sqlite_tuning, metrics
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", sqlite_tuning.engine_options(app.config))
     db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+    with app.app_context():
+        sqlite_tuning.configure_engine(db.engine, app.config["SQLITE_PROFILE"])
+        metrics.init_app(app, db.engine)
     bcrypt.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = "login"
 
-    from .models import User
-
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    from .utils import identity
+    login_manager.user_loader(identity.load_user)
 
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
+    # The schema is owned by the migrations in MIGRATIONS_DIR: run
+    # ``flask db upgrade`` (or ``init_db``) before starting workers.
     with app.app_context():
         from . import models
-        db.create_all()
+        from .services import search_service
+        search_service.check_index()
 
     from .routes import (
         common_routes,
@@ -40,4 +51,15 @@ def create_app():
     resource_routes.register(app)
     chatbot_routes.register(app)
 
+    from . import cli
+    cli.register(app)
+
     return app
+
+def init_db(app):
+    """Apply pending migrations, as ``flask db upgrade`` does, for the dev server and scripts."""
+    from flask_migrate import upgrade
+    from .services import search_service
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+        search_service.check_index()
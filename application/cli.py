@@ -0,0 +1,179 @@
+import click
+from flask.cli import AppGroup
+
+jobmatch_cli = AppGroup("jobmatch", help="JobMatch maintenance commands.")
+
+
+@jobmatch_cli.command("reindex-matches")
+@click.option("--batch-size", default=500, show_default=True)
+def reindex_matches(batch_size):
+    """Rebuild the applicant ranking term index from scratch."""
+    from .services.match_service import reindex_all
+    done = reindex_all(batch_size=batch_size)
+    click.echo(f"Indexed {done['seeker']} seeker profiles and {done['job']} job posts.")
+
+
+@jobmatch_cli.command("rebuild-recommendations")
+@click.option("--batch-size", default=500, show_default=True)
+def rebuild_recommendations(batch_size):
+    """Recompute every seeker's "jobs for you" list from the match index."""
+    from .services.recommend_service import rebuild_all
+    done = rebuild_all(batch_size=batch_size, progress=lambda n: click.echo(f"  {n} seekers"))
+    click.echo(f"Recommendations rebuilt for {done} seekers.")
+
+
+@jobmatch_cli.command("normalize-skills")
+@click.option("--batch-size", default=500, show_default=True)
+def normalize_skills(batch_size):
+    """Load the seed skill taxonomy and retag every seeker profile and job post."""
+    from .services import skill_service, listing_service
+    from .database import db
+    added = skill_service.seed()
+    db.session.commit()
+    skill_service.invalidate()
+    done = skill_service.backfill(batch_size=batch_size,
+                                  progress=lambda label, n: click.echo(f"  {n} {label}"))
+    listing_service.invalidate()
+    click.echo(f"Added {added} skill aliases; tagged {done['seekers']} seeker profiles and {done['posts']} job posts.")
+
+
+@jobmatch_cli.command("add-skill")
+@click.argument("name")
+@click.argument("aliases", nargs=-1)
+def add_skill(name, aliases):
+    """Add a skill or more aliases of one; run normalize-skills afterwards to retag."""
+    from .services import skill_service
+    from .database import db
+    added = skill_service.add(name, aliases)
+    db.session.commit()
+    skill_service.invalidate()
+    click.echo(f"Added {added} aliases for {name!r}.")
+
+
+@jobmatch_cli.command("backfill")
+@click.option("--batch-size", default=500, show_default=True)
+def backfill(batch_size):
+    """Fill the derived tables a database upgraded from an older version starts without.
+
+    Runs after ``db upgrade`` on every deploy: each step only runs while its
+    table is empty and its source is not, so on an up-to-date database it is
+    three cheap checks. In order: the applicant match index, skill tags, and
+    the recommendations built from both.
+    """
+    from .database import db
+    from .models import JobPost, JobPostSkill, MatchDocument, RecommendedJob, SeekerData, SeekerSkill
+
+    def empty(model):
+        return db.session.query(model).first() is None
+
+    has_seekers, has_posts = not empty(SeekerData), not empty(JobPost)
+    ran = False
+    if empty(MatchDocument) and (has_seekers or has_posts):
+        reindex_matches.callback(batch_size)
+        ran = True
+    if empty(SeekerSkill) and empty(JobPostSkill) and (has_seekers or has_posts):
+        normalize_skills.callback(batch_size)
+        ran = True
+    if empty(RecommendedJob) and has_seekers and has_posts:
+        rebuild_recommendations.callback(batch_size)
+        ran = True
+    if not ran:
+        click.echo("Nothing to backfill.")
+
+
+@jobmatch_cli.command("rebuild-search-index")
+def rebuild_search_index():
+    """Repopulate the FTS5 job search and talent search tables."""
+    from .services.search_service import rebuild_index
+    from .services import listing_service
+    jobs, seekers = rebuild_index()
+    listing_service.invalidate()
+    click.echo(f"Search index rebuilt with {jobs} job posts and {seekers} seeker profiles.")
+
+
+@jobmatch_cli.command("reconcile-stats")
+def reconcile_stats():
+    """Recompute the per-post application counters and daily rollups from ``application``."""
+    from .services.stats_service import reconcile
+    from .utils.sqlite import write_transaction
+    fixed = write_transaction(reconcile)
+    click.echo(f"Corrected {fixed['counters']} counter rows and {fixed['daily']} daily rollup rows.")
+
+
+@jobmatch_cli.command("storage-sweep")
+@click.option("--grace", default=3600, show_default=True, help="Keep blobs younger than this many seconds.")
+@click.option("--dry-run", is_flag=True, help="List what would be deleted without deleting it.")
+def storage_sweep(grace, dry_run):
+    """Delete uploaded blobs that no resume, logo or resource image references, and stale offer PDFs."""
+    from flask import current_app
+    from .services import offer_service
+    from .utils.file_utils import sweep
+    removed = sweep(grace_seconds=grace, dry_run=dry_run)
+    for key in removed:
+        click.echo(key)
+    offers = offer_service.prune_cache(current_app.config["OFFER_CACHE_FOLDER"],
+                                       current_app.config["OFFER_CACHE_MAX_AGE"], dry_run=dry_run)
+    click.echo(f"{'Would delete' if dry_run else 'Deleted'} {len(removed)} blobs and {offers} cached offer letters.")
+
+
+@jobmatch_cli.command("extract-resumes")
+@click.option("--workers", type=int, default=None, help="Parser processes (default: one per core).")
+@click.option("--all", "redo", is_flag=True, help="Re-extract resumes that already have text.")
+def extract_resumes(workers, redo):
+    """Backfill resume text for talent search from the stored uploads."""
+    from .services.resume_service import backfill
+    counts = backfill(workers=workers, redo=redo,
+                      progress=lambda n, total: click.echo(f"  {n}/{total}"))
+    click.echo("Resume extraction: " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+
+
+@jobmatch_cli.command("worker")
+@click.option("-n", "--processes", default=1, show_default=True, help="Worker processes to run.")
+@click.option("--poll", type=float, default=None, help="Seconds to sleep when the queue is empty.")
+def worker(processes, poll):
+    """Run background tasks from the database queue until interrupted."""
+    from .services.task_queue import run_workers
+    click.echo(f"Starting {processes} task worker(s); Ctrl+C to stop.")
+    run_workers(processes, poll)
+
+
+@jobmatch_cli.command("queue-stats")
+@click.option("--purge-days", type=int, default=None, help="Also delete finished tasks older than this.")
+def queue_stats(purge_days):
+    """Show task queue depth and recent wait/run latency (seconds)."""
+    from .services.task_queue import stats, purge
+    if purge_days is not None:
+        click.echo(f"Purged {purge(purge_days)} finished tasks.")
+    s = stats()
+    click.echo(f"ready: {s['ready']}  oldest ready: {s['oldest_ready_age']}s")
+    for name, counts in sorted(s["depth"].items()):
+        click.echo(f"{name:<24}" + "  ".join(f"{k} {v}" for k, v in counts.items()))
+    for name, lat in sorted(s["latency"].items()):
+        click.echo(f"{name:<24}n {lat['count']}  wait p50 {lat['wait_p50']} p95 {lat['wait_p95']}"
+                   f"  run p50 {lat['run_p50']} p95 {lat['run_p95']}")
+
+
+@jobmatch_cli.command("check-query-plans")
+@click.option("--verbose", "-v", is_flag=True, help="Print every plan, not only the failing ones.")
+def check_query_plans(verbose):
+    """Fail if a route's main query reads a whole table instead of an index.
+
+    Run it against a database at the current migration, e.g. in CI right
+    after ``flask db upgrade``.
+    """
+    from .utils.query_plans import check
+    failed = 0
+    for name, details, scans in check():
+        if scans:
+            failed += 1
+        if scans or verbose:
+            click.echo(f"{'FULL SCAN' if scans else 'ok':<10}{name}")
+            for line in details:
+                click.echo(f"{'':<12}{line}")
+    click.echo(f"{failed} queries with full table scans.")
+    if failed:
+        raise SystemExit(1)
+
+
+def register(app):
+    app.cli.add_command(jobmatch_cli)
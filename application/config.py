@@ -8,7 +8,60 @@ class BaseConfig:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev_secret")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(ROOT_DIR, "uploads")
+    # "local" keeps blobs under UPLOAD_FOLDER; "s3" needs boto3 and S3_BUCKET.
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local").lower()
+    S3_BUCKET = os.environ.get("S3_BUCKET", "")
+    S3_PREFIX = os.environ.get("S3_PREFIX", "uploads")
+    S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")
+    MEDIA_MAX_AGE = int(os.environ.get("MEDIA_MAX_AGE", 365 * 24 * 3600))
+    OFFER_CACHE_FOLDER = os.environ.get("OFFER_CACHE_FOLDER", os.path.join(ROOT_DIR, "cache", "offers"))
+    # Cached offer PDFs older than this are deleted by ``jobmatch storage-sweep``.
+    OFFER_CACHE_MAX_AGE = int(os.environ.get("OFFER_CACHE_MAX_AGE", 2 * 24 * 3600))
+    OFFER_RENDER_WORKERS = int(os.environ.get("OFFER_RENDER_WORKERS", os.cpu_count() or 2))
+    # Processes per web worker that parse uploaded resumes off the request path.
+    RESUME_EXTRACT_WORKERS = int(os.environ.get("RESUME_EXTRACT_WORKERS", 1))
+    # "" serves resumes from Python; "x-sendfile" (Apache/lighttpd) or "x-accel" (nginx)
+    # hand the bytes to the front-end server after the auth check.
+    RESUME_OFFLOAD = os.environ.get("RESUME_OFFLOAD", "").lower()
+    RESUME_ACCEL_PREFIX = os.environ.get("RESUME_ACCEL_PREFIX", "/_protected/uploads/")
+    RESUME_MAX_AGE = int(os.environ.get("RESUME_MAX_AGE", 365 * 24 * 3600))
+    USE_X_SENDFILE = RESUME_OFFLOAD == "x-sendfile"
     MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", 10 * 1024 * 1024))
+    # Host-local state shared by all workers (rate-limit buckets, hashing slots).
+    LOCAL_STATE_FOLDER = os.environ.get("LOCAL_STATE_FOLDER", os.path.join(ROOT_DIR, "cache", "state"))
+    # bcrypt cost; a successful login rehashes passwords stored with another cost.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+    # Concurrent bcrypt operations per host; leaves a core for ordinary page views.
+    HASH_CONCURRENCY = int(os.environ.get("HASH_CONCURRENCY", max(1, (os.cpu_count() or 2) - 1)))
+    HASH_MAX_WAIT = float(os.environ.get("HASH_MAX_WAIT", 2.0))
+    # Proxies in front of the app whose X-Forwarded-For entry to trust; the
+    # rate limits key on the client address this yields. 0 uses REMOTE_ADDR.
+    PROXY_FIX_X_FOR = int(os.environ.get("PROXY_FIX_X_FOR", 0))
+    RATELIMIT_ENABLED = os.environ.get("RATELIMIT_ENABLED", "1").lower() not in {"0", "false", "no"}
+    # (capacity, period in seconds) per token bucket.
+    RATE_LIMITS = {
+        "login_ip": (20, 60),
+        "login_email": (5, 300),
+        "forgot_check_ip": (10, 60),
+        "forgot_reset_ip": (5, 300),
+        "forgot_reset_email": (3, 900),
+    }
+    # Hand slow side work to `flask jobmatch worker` instead of doing it in the web process.
+    TASK_QUEUE_ENABLED = os.environ.get("TASK_QUEUE_ENABLED", "").lower() in {"1", "true", "yes"}
+    TASK_VISIBILITY_TIMEOUT = int(os.environ.get("TASK_VISIBILITY_TIMEOUT", 300))
+    TASK_POLL_INTERVAL = float(os.environ.get("TASK_POLL_INTERVAL", 1.0))
+
+    # Pragmas applied to every SQLite connection; see utils/sqlite.py PROFILES.
+    SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "default")
+    SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", 5))
+    SQLITE_POOL_OVERFLOW = int(os.environ.get("SQLITE_POOL_OVERFLOW", 10))
+
+    # Per-endpoint latency and SQL counts on /metrics, summed over all workers on the host.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in {"0", "false", "no"}
+    # Seconds a worker buffers its samples before adding them to the shared store.
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5.0))
+    # If set, scrapers must send "Authorization: Bearer <token>".
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
 
 class DevConfig(BaseConfig):
     ENV = "development"
@@ -21,6 +74,9 @@ class DevConfig(BaseConfig):
 class ProdConfig(BaseConfig):
     ENV = "production"
     DEBUG = False
+    SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "production")
+    # Render (and most hosts) put one proxy in front of gunicorn.
+    PROXY_FIX_X_FOR = int(os.environ.get("PROXY_FIX_X_FOR", 1))
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "SQLALCHEMY_DATABASE_URI",
         f"sqlite:///{DB_PATH}"
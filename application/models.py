@@ -15,7 +15,7 @@ class SeekerData(db.Model):
     __tablename__ = "seeker_data"
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, unique=True, index=True)
     phone = db.Column(db.String(20), nullable=False)
     education = db.Column(db.String(200))
     experience = db.Column(db.String(50))
@@ -34,42 +34,92 @@ class CompanyData(db.Model):
 class JobPost(db.Model):
     __tablename__ = "job_posts"
     id = db.Column(db.Integer, primary_key=True)
-    job_title = db.Column(db.String(100), nullable=False)
+    job_title = db.Column(db.String(100), nullable=False, index=True)
     location = db.Column(db.String(100), nullable=False)
-    employment_type = db.Column(db.String(50), nullable=False)
-    salary_from = db.Column(db.Integer)
-    salary_to = db.Column(db.Integer)
+    employment_type = db.Column(db.String(50), nullable=False, index=True)
+    salary_from = db.Column(db.Integer, index=True)
+    salary_to = db.Column(db.Integer, index=True)
     job_description = db.Column(db.Text, nullable=False)
     key_responsibilities = db.Column(db.Text)
     company_name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(100), nullable=False, index=True)
     logo_filename = db.Column(db.String(100))
-    is_open = db.Column(db.Integer, default=1)
+    is_open = db.Column(db.Integer, default=1, index=True)
+    __table_args__ = (
+        db.Index("ix_job_posts_facets", "employment_type", "salary_from", "location", "is_open"),
+    )
+
+class Application(db.Model):
+    __tablename__ = "application"
+    ACTIVE = "active"
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+    STATUSES = (ACTIVE, ACCEPTED, REJECTED)
 
-class ActiveApplication(db.Model):
-    __tablename__ = "active_application"
     id = db.Column(db.Integer, primary_key=True)
     seeker_name = db.Column(db.String(100), nullable=False)
-    seeker_email = db.Column(db.String(120), nullable=False, index=True)
-    job_post_id = db.Column(db.Integer, db.ForeignKey("job_posts.id"), nullable=False)
+    seeker_email = db.Column(db.String(120), nullable=False)
+    job_post_id = db.Column(db.Integer, db.ForeignKey("job_posts.id"))
     job_title = db.Column(db.String(200), nullable=False)
+    status = db.Column(
+        db.Enum(*STATUSES, name="application_status", native_enum=False),
+        nullable=False, default=ACTIVE
+    )
     applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    decided_at = db.Column(db.DateTime)
+    __table_args__ = (
+        db.Index("ix_application_post_status_applied", "job_post_id", "status", "applied_at"),
+        db.Index("ix_application_seeker_status", "seeker_email", "status"),
+        db.Index("ix_application_seeker_post", "seeker_email", "job_post_id"),
+    )
 
-class AcceptedApplication(db.Model):
-    __tablename__ = "accepted_application"
-    id = db.Column(db.Integer, primary_key=True)
-    seeker_name = db.Column(db.String(100), nullable=False)
-    seeker_email = db.Column(db.String(120), nullable=False, index=True)
-    job_title = db.Column(db.String(200), nullable=False)
-    applied_at = db.Column(db.DateTime, nullable=False)
+class PostCounter(db.Model):
+    """Applications per post by status, kept in step with every ``application`` write."""
+    __tablename__ = "post_counters"
+    job_post_id = db.Column(db.Integer, db.ForeignKey("job_posts.id"), primary_key=True)
+    active = db.Column(db.Integer, nullable=False, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
 
-class RejectedApplication(db.Model):
-    __tablename__ = "rejected_application"
+class PostDailyStat(db.Model):
+    """Applications received and decided per post and UTC day."""
+    __tablename__ = "post_daily_stats"
+    job_post_id = db.Column(db.Integer, db.ForeignKey("job_posts.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    received = db.Column(db.Integer, nullable=False, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+
+class RecommendedJob(db.Model):
+    """One entry of a seeker's materialized "jobs for you" list."""
+    __tablename__ = "recommended_jobs"
+    seeker_id = db.Column(db.Integer, db.ForeignKey("seeker_data.id"), primary_key=True)
+    job_post_id = db.Column(db.Integer, db.ForeignKey("job_posts.id"), primary_key=True, index=True)
+    score = db.Column(db.Float, nullable=False)
+
+class Skill(db.Model):
+    """One canonical skill of the taxonomy."""
+    __tablename__ = "skills"
     id = db.Column(db.Integer, primary_key=True)
-    seeker_name = db.Column(db.String(100), nullable=False)
-    seeker_email = db.Column(db.String(120), nullable=False, index=True)
-    job_title = db.Column(db.String(200), nullable=False)
-    applied_at = db.Column(db.DateTime, nullable=False)
+    name = db.Column(db.String(64), nullable=False, unique=True)
+
+class SkillAlias(db.Model):
+    """A normalised spelling that means ``skill_id``; every skill is also an alias of itself."""
+    __tablename__ = "skill_aliases"
+    alias = db.Column(db.String(64), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey("skills.id"), nullable=False, index=True)
+
+class SeekerSkill(db.Model):
+    __tablename__ = "seeker_skills"
+    seeker_id = db.Column(db.Integer, db.ForeignKey("seeker_data.id"), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey("skills.id"), primary_key=True)
+    __table_args__ = (db.Index("ix_seeker_skills_skill_seeker", "skill_id", "seeker_id"),)
+
+class JobPostSkill(db.Model):
+    __tablename__ = "job_post_skills"
+    job_post_id = db.Column(db.Integer, db.ForeignKey("job_posts.id"), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey("skills.id"), primary_key=True)
+    __table_args__ = (db.Index("ix_job_post_skills_skill_post", "skill_id", "job_post_id"),)
 
 class Resource(db.Model):
     __tablename__ = "resources"
@@ -85,3 +135,76 @@ class Resource(db.Model):
         default=db.func.current_timestamp(),
         onupdate=db.func.current_timestamp()
     )
+    __table_args__ = (db.Index("ix_resources_type_created", "resource_type", "created_at"),)
+
+class MatchDocument(db.Model):
+    __tablename__ = "match_documents"
+    id = db.Column(db.Integer, primary_key=True)
+    doc_kind = db.Column(db.String(10), nullable=False)
+    doc_id = db.Column(db.Integer, nullable=False)
+    length = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (db.UniqueConstraint("doc_kind", "doc_id", name="uq_match_documents_doc"),)
+
+class MatchTerm(db.Model):
+    __tablename__ = "match_terms"
+    id = db.Column(db.Integer, primary_key=True)
+    doc_kind = db.Column(db.String(10), nullable=False)
+    doc_id = db.Column(db.Integer, nullable=False)
+    term = db.Column(db.String(64), nullable=False)
+    tf = db.Column(db.Integer, nullable=False, default=1)
+    __table_args__ = (
+        db.Index("ix_match_terms_kind_term", "doc_kind", "term", "doc_id"),
+        db.Index("ix_match_terms_kind_doc", "doc_kind", "doc_id"),
+    )
+
+class StoredBlob(db.Model):
+    __tablename__ = "stored_blobs"
+    key = db.Column(db.String(200), primary_key=True)
+    size = db.Column(db.Integer, nullable=False, default=0)
+    refcount = db.Column(db.Integer, nullable=False, default=0, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ResumeText(db.Model):
+    """Plain text of a stored resume, keyed like the blob it came from."""
+    __tablename__ = "resume_texts"
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    key = db.Column(db.String(200), primary_key=True)
+    status = db.Column(db.String(10), nullable=False, default=PENDING, index=True)
+    text = db.Column(db.Text)
+    error = db.Column(db.String(300))
+    extracted_at = db.Column(db.DateTime)
+
+class Task(db.Model):
+    """One unit of background work for ``flask jobmatch worker``."""
+    __tablename__ = "tasks"
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(
+        db.Enum(*STATUSES, name="task_status", native_enum=False),
+        nullable=False, default=QUEUED
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(100))
+    last_error = db.Column(db.Text)
+    enqueued_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    __table_args__ = (
+        db.Index("ix_tasks_status_priority_run_at", "status", "priority", "run_at"),
+        db.Index("ix_tasks_status_locked_until", "status", "locked_until"),
+    )
@@ -1,15 +1,13 @@
 import logging
 from flask import jsonify, render_template, request, redirect, flash, url_for
 from flask_login import login_user, logout_user, login_required
-from ..database import db, bcrypt, login_manager
-from ..models import User, SeekerData
+from ..database import db
+from ..models import User
+from ..utils import identity, rate_limit
+from ..utils.passwords import hash_password, check_password, needs_rehash, HashingBusy
 
 logger = logging.getLogger(__name__)
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
 def register(app):
 
     @app.route("/register", methods=["GET", "POST"])
@@ -47,12 +45,15 @@ def register(app):
                 flash("An account with this email already exists.", "danger")
                 return render_template("registration.html", form=_DummyForm())
             try:
-                hash_ = bcrypt.generate_password_hash(password).decode("utf-8")
+                hash_ = hash_password(password)
                 u = User(name=name, email=email, password=hash_, role=role)
                 db.session.add(u)
                 db.session.commit()
                 flash("Registration successful! Please log in.", "success")
                 return redirect(url_for("login"))
+            except HashingBusy as e:
+                flash("The server is busy. Please try again in a moment.", "danger")
+                return render_template("registration.html", form=_DummyForm()), 503, {"Retry-After": str(e.retry_after)}
             except Exception as e:
                 db.session.rollback()
                 logger.exception("Registration failed")
@@ -86,23 +87,35 @@ def register(app):
         if request.method == "POST":
             email = (request.form.get("email") or "").strip().lower()
             password = (request.form.get("password") or "")
+            retry = rate_limit.limit("login", email)
+            if retry:
+                flash("Too many login attempts. Please wait a minute and try again.", "danger")
+                return render_template("login.html", form=_DummyForm()), 429, {"Retry-After": str(retry)}
             user = User.query.filter_by(email=email).first()
             if not user:
                 flash("Invalid email or password", "danger")
                 return render_template("login.html", form=_DummyForm())
-            if user.password.startswith("$2"):
-                valid = bcrypt.check_password_hash(user.password, password)
-            else:
-                valid = (user.password == password)
-                if valid:
-                    user.password = bcrypt.generate_password_hash(password).decode("utf-8")
+            try:
+                if user.password.startswith("$2"):
+                    valid = check_password(user.password, password)
+                else:
+                    valid = (user.password == password)
+            except HashingBusy as e:
+                flash("The server is busy. Please try again in a moment.", "danger")
+                return render_template("login.html", form=_DummyForm()), 503, {"Retry-After": str(e.retry_after)}
+            if valid and needs_rehash(user.password):
+                # Plain-text legacy passwords and hashes made at another work factor.
+                try:
+                    user.password = hash_password(password)
                     db.session.commit()
+                except HashingBusy:
+                    pass  # keep the old hash; the next login upgrades it
             if not valid:
                 flash("Invalid email or password", "danger")
                 return render_template("login.html", form=_DummyForm())
             login_user(user)
             if user.role == "seeker":
-                has_bio = SeekerData.query.filter_by(email=user.email).first()
+                has_bio = identity.seeker_profile(user.email)
                 return redirect(url_for("seeker_dashboard" if has_bio else "seeker_data"))
             return redirect(url_for("company_dashboard"))
         return render_template("login.html", form=_DummyForm())
@@ -112,6 +125,9 @@ def register(app):
         email = (request.form.get("email") or "").strip().lower()
         if not email:
             return jsonify({"ok": False, "error": "Email required"}), 400
+        retry = rate_limit.limit("forgot_check", email)
+        if retry:
+            return jsonify({"ok": False, "error": "Too many requests"}), 429, {"Retry-After": str(retry)}
         user = User.query.filter_by(email=email).first()
         if not user:
             return jsonify({"ok": True, "exists": False})
@@ -130,17 +146,23 @@ def register(app):
         if len(new_pw) < 6:
             return jsonify({"ok": False, "error": "Password must be at least 6 characters"}), 400
 
+        retry = rate_limit.limit("forgot_reset", email)
+        if retry:
+            return jsonify({"ok": False, "error": "Too many requests"}), 429, {"Retry-After": str(retry)}
+
         user = User.query.filter_by(email=email).first()
         if not user:
             return jsonify({"ok": False, "error": "Email not found"}), 404
 
-        if bcrypt.check_password_hash(user.password, new_pw):
-            return jsonify({"ok": False, "error": "New password cannot be the same as your current password"}), 400
-
         try:
-            user.password = bcrypt.generate_password_hash(new_pw).decode("utf-8")
+            if check_password(user.password, new_pw):
+                return jsonify({"ok": False, "error": "New password cannot be the same as your current password"}), 400
+            user.password = hash_password(new_pw)
             db.session.commit()
+            identity.invalidate(user.id)
             return jsonify({"ok": True, "message": "Password updated"})
+        except HashingBusy as e:
+            return jsonify({"ok": False, "error": "Server busy, try again shortly"}), 503, {"Retry-After": str(e.retry_after)}
         except Exception as e:
             db.session.rollback()
             app.logger.exception("forgot/reset failed")
@@ -1,6 +1,7 @@
-from flask import render_template, request, jsonify
+import json
+from flask import render_template, request, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
-from ..services.gemini_service import reply as gemini_reply
+from ..services.gemini_service import reply as gemini_reply, stream_reply
 
 def register(app):
 
@@ -23,3 +24,20 @@ def register(app):
         user_msg = (data.get("message") or "").strip()
         return jsonify({"reply": gemini_reply(user_msg, role=getattr(current_user, "role", "seeker"),
             fallback_name=(current_user.name or "there").split()[0])})
+
+    @app.route("/api/chatbot/stream", methods=["POST"])
+    @login_required
+    def api_chatbot_stream():
+        data = request.get_json(silent=True) or {}
+        user_msg = (data.get("message") or request.form.get("message") or "").strip()
+        role = getattr(current_user, "role", "seeker")
+        name = (current_user.name or "there").split()[0]
+
+        def events():
+            for source, text in stream_reply(user_msg, role=role, fallback_name=name):
+                yield f"data: {json.dumps({'delta': text, 'source': source})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+
+        # Keeps the app context, which the metrics counters need, while the reply streams.
+        return Response(stream_with_context(events()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,7 +1,18 @@
-from flask import render_template
+import hmac
+from flask import render_template, request, abort, Response
+from ..utils import metrics
 
 def register(app):
 
     @app.route("/")
     def welcome():
         return render_template("welcome.html")
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        if not app.config["METRICS_ENABLED"]:
+            abort(404)
+        token = app.config["METRICS_TOKEN"]
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            abort(401)
+        return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
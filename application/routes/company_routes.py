@@ -1,12 +1,19 @@
-import os
 import logging
-from werkzeug.utils import secure_filename
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from collections import Counter
+from datetime import datetime
+from flask import render_template, request, redirect, url_for, flash, jsonify, Response
 from flask_login import login_required, current_user
 from ..database import db
-from ..models import JobPost, ActiveApplication, AcceptedApplication, RejectedApplication, SeekerData
+from ..models import JobPost, Application, SeekerData
 from ..utils.security import company_required
-from ..utils.file_utils import allowed_file, random_filename
+from ..utils.helpers import filename_options
+from ..utils.file_utils import allowed_file, save_blob, store_upload, acquire, release
+from ..utils.pagination import keyset_page, parse_limit
+from ..utils.sqlite import write_transaction
+from ..services import (
+    match_service, offer_service, search_service, listing_service, stats_service, recommend_service,
+    skill_service, autocomplete_service,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,21 +43,30 @@ def register(app):
                 is_open_val = request.form.get("is_open", "1")
                 is_open = 1 if str(is_open_val) == "1" else 0
 
-                logo_filename = None
+                # The file is written before the write lock is taken; only its reference is transactional.
                 logo_file = request.files.get("logo")
-                if logo_file and allowed_file(logo_file.filename):
-                    logo_filename = random_filename(secure_filename(logo_file.filename))
-                    logo_file.save(os.path.join(app.config["UPLOAD_FOLDER"], logo_filename))
-
-                post = JobPost(
-                    job_title=job_title, location=location, employment_type=employment_type,
-                    salary_from=salary_from, salary_to=salary_to,
-                    job_description=job_description, key_responsibilities=key_responsibilities,
-                    company_name=company_name, email=current_user.email,
-                    logo_filename=logo_filename, is_open=is_open
-                )
-                db.session.add(post)
-                db.session.commit()
+                logo = save_blob(logo_file) if logo_file and allowed_file(logo_file.filename) else None
+                logo_filename = logo[0] if logo else None
+
+                def create():
+                    if logo:
+                        acquire(*logo)
+                    post = JobPost(
+                        job_title=job_title, location=location, employment_type=employment_type,
+                        salary_from=salary_from, salary_to=salary_to,
+                        job_description=job_description, key_responsibilities=key_responsibilities,
+                        company_name=company_name, email=current_user.email,
+                        logo_filename=logo_filename, is_open=is_open
+                    )
+                    db.session.add(post)
+                    match_service.index_job_post(post)
+                    skill_service.tag_job_post(post)
+                    recommend_service.post_changed(post.id)
+                    return post
+
+                post = write_transaction(create)
+                listing_service.invalidate()
+                autocomplete_service.post_changed({}, autocomplete_service.snapshot(post))
                 flash("Job posted successfully!", "success")
                 return redirect(url_for("company_dashboard"))
             except Exception as e:
@@ -67,6 +83,7 @@ def register(app):
         job = JobPost.query.filter_by(id=job_id, email=current_user.email).first_or_404()
         if request.method == "POST":
             try:
+                before = autocomplete_service.snapshot(job)
                 job.job_title = request.form["job_title"]
                 job.location = request.form["location"]
                 job.employment_type = request.form["employment_type"]
@@ -77,10 +94,14 @@ def register(app):
                 job.company_name = request.form["company_name"]
                 logo_file = request.files.get("logo")
                 if logo_file and allowed_file(logo_file.filename):
-                    logo_filename = random_filename(secure_filename(logo_file.filename))
-                    logo_file.save(os.path.join(app.config["UPLOAD_FOLDER"], logo_filename))
-                    job.logo_filename = logo_filename
+                    release(job.logo_filename)
+                    job.logo_filename = store_upload(logo_file)
+                match_service.index_job_post(job)
+                skill_service.tag_job_post(job)
+                recommend_service.post_changed(job.id)
                 db.session.commit()
+                listing_service.invalidate()
+                autocomplete_service.post_changed(before, autocomplete_service.snapshot(job))
                 flash("Job post updated successfully!", "success")
                 return redirect(url_for("company_dashboard"))
             except Exception as e:
@@ -107,6 +128,7 @@ def register(app):
                     "company_name": p.company_name,
                     "email": p.email,
                     "logo_filename": getattr(p, "logo_filename", None),
+                    "logo_url": url_for("media", key=p.logo_filename) if p.logo_filename else None,
                     "is_open": bool(getattr(p, "is_open", 1)),
                 })
             return jsonify(out)
@@ -127,7 +149,9 @@ def register(app):
             return jsonify({"error": "Forbidden"}), 403
         try:
             job.is_open = 1 if desired else 0
+            recommend_service.post_changed(job.id)
             db.session.commit()
+            listing_service.invalidate()
             return jsonify({"success": True, "is_open": bool(desired)})
         except Exception as e:
             db.session.rollback()
@@ -140,165 +164,312 @@ def register(app):
     def api_delete_job_post(job_id):
         job = JobPost.query.filter_by(id=job_id, email=current_user.email).first_or_404()
         try:
+            before = autocomplete_service.snapshot(job)
+            match_service.remove_job_post(job.id)
+            skill_service.remove_job_post(job.id)
+            recommend_service.remove_post(job.id)
+            stats_service.remove_post(job.id)
+            release(job.logo_filename)
             db.session.delete(job)
             db.session.commit()
+            listing_service.invalidate()
+            autocomplete_service.post_changed(before, {})
             return jsonify({"success": True})
         except Exception as e:
             db.session.rollback()
             logger.exception("Delete job post failed")
             return jsonify({"success": False, "error": str(e)}), 500
 
-    def _my_post_ids():
-        id_rows = db.session.query(JobPost.id).filter(JobPost.email == current_user.email).all()
-        return [pid for (pid,) in id_rows]
+    def _seeker_profiles(emails):
+        """One query for the profiles of a page of applicants, keyed by email."""
+        if not emails:
+            return {}
+        out = {}
+        for sd in SeekerData.query.filter(SeekerData.email.in_(set(emails))).order_by(SeekerData.id).all():
+            out.setdefault(sd.email, sd)
+        return out
+
+    def _applicant_json(r, sd):
+        return {
+            "seeker_name": r.seeker_name,
+            "seeker_email": r.seeker_email,
+            "job_title": r.job_title,
+            "applied_at": r.applied_at.strftime('%Y-%m-%d %H:%M:%S'),
+            "resume_url": url_for("view_resume", email=r.seeker_email, v=sd.resume_path) if sd and sd.resume_path else None,
+            "profile": {
+                "education": getattr(sd, "education", "") if sd else "",
+                "experience": getattr(sd, "experience", "") if sd else "",
+                "skills": getattr(sd, "skills", "") if sd else "",
+            },
+        }
+
+    def _search_filter(query, q):
+        if not q:
+            return query
+        like = f"%{q}%"
+        return query.filter(db.or_(
+            Application.seeker_name.ilike(like),
+            Application.seeker_email.ilike(like),
+            Application.job_title.ilike(like),
+        ))
+
+    def _my_applications(status):
+        return (
+            db.session.query(Application, JobPost.company_name)
+            .join(JobPost, JobPost.id == Application.job_post_id)
+            .filter(JobPost.email == current_user.email, Application.status == status)
+        )
+
+    def _applications_feed(status):
+        limit = parse_limit(request.args.get("limit"))
+        q = (request.args.get("q") or "").strip()
+        query = _search_filter(_my_applications(status), q)
+        total = None
+        if not request.args.get("cursor"):
+            # Unfiltered totals come from the per-post counters, not a count of the rows.
+            total = query.order_by(None).count() if q else stats_service.status_total(current_user.email, status)
+        rows, next_cursor = keyset_page(
+            query, Application.applied_at, Application.id,
+            cursor=request.args.get("cursor"), limit=limit,
+        )
+        profiles = _seeker_profiles([r.seeker_email for r, _ in rows])
+        items = []
+        for r, company_name in rows:
+            item = _applicant_json(r, profiles.get(r.seeker_email))
+            item.update({
+                "id": r.id,
+                "job_post_id": r.job_post_id,
+                "company_name": company_name or "Unknown Company",
+            })
+            items.append(item)
+        return jsonify({"items": items, "next_cursor": next_cursor, "total": total})
 
     @app.route("/api/active_applications", methods=["GET"])
     @login_required
     @company_required
     def api_active_applications():
         try:
-            my_post_ids = _my_post_ids()
-            if not my_post_ids:
-                return jsonify([])
-            rows = (
-                ActiveApplication.query
-                .filter(ActiveApplication.job_post_id.in_(my_post_ids))
-                .order_by(ActiveApplication.applied_at.desc())
-                .all()
-            )
-            jobs = JobPost.query.filter(JobPost.id.in_(my_post_ids)).all()
-            jobs_by_id = {j.id: j for j in jobs}
-            out = []
-            for r in rows:
-                job = jobs_by_id.get(r.job_post_id)
-                sd = SeekerData.query.filter_by(email=r.seeker_email).first()
-                resume_url = None
-                if sd and sd.resume_path:
-                    resume_url = url_for("view_resume", email=r.seeker_email)
-                out.append({
+            return _applications_feed(Application.ACTIVE)
+        except Exception:
+            logger.exception("Error in /api/active_applications")
+            return jsonify({"items": [], "next_cursor": None, "total": 0}), 200
+
+    @app.route("/api/job_posts/<int:post_id>/ranked_applicants", methods=["GET"])
+    @login_required
+    @company_required
+    def api_ranked_applicants(post_id):
+        job = JobPost.query.filter_by(id=post_id, email=current_user.email).first_or_404()
+        k = max(1, min(request.args.get("k", 20, type=int), 500))
+        try:
+            ranked = match_service.rank_applicants(job, k=k)
+            return jsonify({
+                "job_post_id": job.id,
+                "job_title": job.job_title,
+                "applicants": [{
                     "id": r.id,
                     "seeker_name": r.seeker_name,
                     "seeker_email": r.seeker_email,
-                    "job_title": r.job_title,
                     "applied_at": r.applied_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    "job_post_id": r.job_post_id,
-                    "company_name": job.company_name if job else "Unknown Company",
-                    "profile": {
-                        "education": getattr(sd, "education", "") if sd else "",
-                        "experience": getattr(sd, "experience", "") if sd else "",
-                        "skills": getattr(sd, "skills", "") if sd else "",
-                    },
-                    "resume_url": resume_url
-                })
-            return jsonify(out)
-        except Exception:
-            logger.exception("Error in /api/active_applications")
-            return jsonify([]), 200
+                    "score": score,
+                } for r, score in ranked],
+            })
+        except Exception as e:
+            logger.exception("Error in /api/job_posts/<id>/ranked_applicants")
+            return jsonify({"error": str(e)}), 500
+
+    @app.route("/api/talent_search", methods=["GET"])
+    @login_required
+    @company_required
+    def api_talent_search():
+        """Keyword search over seeker profiles and extracted resume text."""
+        q = (request.args.get("q") or "").strip()
+        if not search_service.is_enabled():
+            return jsonify({"error": "Talent search is not available on this database"}), 503
+        limit = parse_limit(request.args.get("limit"), default=20)
+        page = max(request.args.get("page", 1, type=int), 1)
+        hits = search_service.search_talent(q, limit=limit + 1, offset=(page - 1) * limit)
+        return jsonify({
+            "q": q,
+            "page": page,
+            "has_next": len(hits) > limit,
+            "items": [{
+                "id": sd.id,
+                "full_name": sd.full_name,
+                "email": sd.email,
+                "education": sd.education or "",
+                "experience": sd.experience or "",
+                "skills": sd.skills or "",
+                "resume_url": url_for("view_resume", email=sd.email, v=sd.resume_path) if sd.resume_path else None,
+                "snippet": snippet or "",
+                "score": -rank,
+            } for sd, rank, snippet in hits[:limit]],
+        })
+
+    @app.route("/api/job_posts/<int:post_id>/offer_letters.zip", methods=["GET"])
+    @login_required
+    @company_required
+    def api_offer_letters_zip(post_id):
+        job = JobPost.query.filter_by(id=post_id, email=current_user.email).first_or_404()
+        accepted = (Application.query
+                    .filter_by(job_post_id=job.id, status=Application.ACCEPTED)
+                    .order_by(Application.applied_at, Application.id)
+                    .all())
+        if not accepted:
+            return jsonify({"error": "No accepted applicants for this post"}), 404
+        named = []
+        for r in accepted:
+            ctx = offer_service.offer_context(r.seeker_name, r.seeker_email, job,
+                                              applied_at_str=r.applied_at.strftime('%Y-%m-%d %H:%M:%S'))
+            named.append((offer_service.offer_filename(ctx, "pdf", suffix=f"_{r.seeker_name}_{r.id}"), ctx))
+        letters = offer_service.offer_pdfs(
+            named, app.config["OFFER_CACHE_FOLDER"], workers=app.config["OFFER_RENDER_WORKERS"]
+        )
+        archive = f"Offer_Letters_{job.company_name}_{job.job_title}.zip".replace(" ", "_").replace("/", "-")
+        resp = Response(offer_service.zip_stream(letters), mimetype="application/zip")
+        resp.headers.set("Content-Disposition", "attachment", **filename_options(archive))
+        return resp
 
     @app.route("/api/accepted_applications", methods=["GET"])
     @login_required
     @company_required
     def api_accepted_applications():
         try:
-            my_post_ids = _my_post_ids()
-            if not my_post_ids:
-                return jsonify([])
-            my_titles = {p.job_title for p in JobPost.query.filter(JobPost.id.in_(my_post_ids)).all()}
-            rows = (AcceptedApplication.query
-                    .filter(AcceptedApplication.job_title.in_(my_titles))
-                    .order_by(AcceptedApplication.applied_at.desc())
-                    .all())
-            out = []
-            for r in rows:
-                sd = SeekerData.query.filter_by(email=r.seeker_email).first()
-                resume_url = None
-                if sd and sd.resume_path:
-                    resume_url = url_for("view_resume", email=r.seeker_email)
-                out.append({
-                    "seeker_name": r.seeker_name,
-                    "seeker_email": r.seeker_email,
-                    "job_title": r.job_title,
-                    "applied_at": r.applied_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    "resume_url": resume_url,
-                    "profile": {
-                        "education": getattr(sd, "education", "") if sd else "",
-                        "experience": getattr(sd, "experience", "") if sd else "",
-                        "skills": getattr(sd, "skills", "") if sd else "",
-                    }
-                })
-            return jsonify(out)
+            return _applications_feed(Application.ACCEPTED)
         except Exception:
             logger.exception("Error in /api/accepted_applications")
-            return jsonify([]), 200
+            return jsonify({"items": [], "next_cursor": None, "total": 0}), 200
 
-    @app.route("/api/accept", methods=["POST"])
+    @app.route("/api/company_stats", methods=["GET"])
     @login_required
     @company_required
-    def api_accept():
+    def api_company_stats():
+        """Applicant counts per post and per day, read from the counter tables."""
+        days = max(1, min(request.args.get("days", stats_service.DEFAULT_DAYS, type=int), stats_service.MAX_DAYS))
+        return jsonify(stats_service.company_stats(
+            current_user.email, days=days, job_post_id=request.args.get("job_post_id", type=int)))
+
+    def _decide(status, label):
         data = request.get_json(silent=True) or {}
         app_id = data.get("app_id")
         email = (data.get("email") or "").strip().lower()
 
-        my_post_ids = _my_post_ids()
-        if not my_post_ids:
-            return jsonify({"success": False, "error": "No job posts"}), 400
-
-        q = ActiveApplication.query.filter(ActiveApplication.job_post_id.in_(my_post_ids))
-        if app_id:
-            q = q.filter_by(id=app_id)
-        elif email:
-            q = q.filter_by(seeker_email=email)
-        app_row = q.first()
-        if not app_row:
-            return jsonify({"success": False, "error": "Application not found"}), 404
+        def decide():
+            q = (Application.query
+                 .join(JobPost, JobPost.id == Application.job_post_id)
+                 .filter(JobPost.email == current_user.email, Application.status == Application.ACTIVE))
+            if app_id:
+                q = q.filter(Application.id == app_id)
+            elif email:
+                q = q.filter(Application.seeker_email == email)
+            app_row = q.first()
+            if not app_row:
+                return False
+            app_row.status = status
+            app_row.decided_at = datetime.utcnow()
+            stats_service.record_decided(app_row.job_post_id, status, app_row.decided_at)
+            return True
+
         try:
-            acc = AcceptedApplication(
-                seeker_name=app_row.seeker_name,
-                seeker_email=app_row.seeker_email,
-                job_title=app_row.job_title,
-                applied_at=app_row.applied_at
-            )
-            db.session.add(acc)
-            db.session.delete(app_row)
-            db.session.commit()
+            if not write_transaction(decide):
+                return jsonify({"success": False, "error": "Application not found"}), 404
             return jsonify({"success": True})
         except Exception as e:
-            db.session.rollback()
-            logger.exception("Accept failed")
+            logger.exception("%s failed", label)
             return jsonify({"success": False, "error": str(e)}), 500
 
+    @app.route("/api/accept", methods=["POST"])
+    @login_required
+    @company_required
+    def api_accept():
+        return _decide(Application.ACCEPTED, "Accept")
+
     @app.route("/api/reject", methods=["POST"])
     @login_required
     @company_required
     def api_reject():
+        return _decide(Application.REJECTED, "Reject")
+
+    BULK_DECISIONS = {"accept": Application.ACCEPTED, "reject": Application.REJECTED}
+    BULK_MAX = 1000
+
+    @app.route("/api/applications/bulk_decide", methods=["POST"])
+    @login_required
+    @company_required
+    def api_bulk_decide():
         data = request.get_json(silent=True) or {}
-        app_id = data.get("app_id")
-        email = (data.get("email") or "").strip().lower()
+        decisions = data.get("decisions")
+        if not isinstance(decisions, list) or not decisions:
+            return jsonify({"success": False, "error": "decisions required"}), 400
+        if len(decisions) > BULK_MAX:
+            return jsonify({"success": False, "error": f"At most {BULK_MAX} decisions per request"}), 400
 
-        my_post_ids = _my_post_ids()
-        if not my_post_ids:
-            return jsonify({"success": False, "error": "No job posts"}), 400
-
-        q = ActiveApplication.query.filter(ActiveApplication.job_post_id.in_(my_post_ids))
-        if app_id:
-            q = q.filter_by(id=app_id)
-        elif email:
-            q = q.filter_by(seeker_email=email)
-        app_row = q.first()
-        if not app_row:
-            return jsonify({"success": False, "error": "Application not found"}), 404
-        try:
-            rej = RejectedApplication(
-                seeker_name=app_row.seeker_name,
-                seeker_email=app_row.seeker_email,
-                job_title=app_row.job_title,
-                applied_at=app_row.applied_at
+        order, results, wanted = [], {}, {}
+        for d in decisions:
+            raw_id = d.get("id") if isinstance(d, dict) else None
+            try:
+                app_id = int(raw_id)
+            except (TypeError, ValueError):
+                order.append((None, raw_id))
+                continue
+            order.append((app_id, raw_id))
+            status = BULK_DECISIONS.get(str(d.get("decision") or "").lower())
+            if status is None:
+                results[app_id] = "invalid_decision"
+            else:
+                wanted[app_id] = status
+
+        email = current_user.email
+
+        def apply_decisions():
+            # Read under the write lock, so no other decision lands between the check and the UPDATE.
+            owned = dict(
+                db.session.query(Application.id, Application.status)
+                .join(JobPost, JobPost.id == Application.job_post_id)
+                .filter(JobPost.email == email, Application.id.in_(list(wanted)))
+                .all()
             )
-            db.session.add(rej)
-            db.session.delete(app_row)
-            db.session.commit()
-            return jsonify({"success": True})
+            decided, by_status = {}, {}
+            for app_id, status in wanted.items():
+                current = owned.get(app_id)
+                if current is None:
+                    decided[app_id] = "not_found"
+                elif current != Application.ACTIVE:
+                    decided[app_id] = "already_decided"
+                else:
+                    by_status.setdefault(status, []).append(app_id)
+            now = datetime.utcnow()
+            for status, ids in by_status.items():
+                changed = db.session.execute(
+                    db.update(Application)
+                    .where(Application.id.in_(ids), Application.status == Application.ACTIVE)
+                    .values(status=status, decided_at=now)
+                    .returning(Application.id, Application.job_post_id)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                for app_id in ids:
+                    decided[app_id] = "already_decided"
+                for app_id, _ in changed:
+                    decided[app_id] = status
+                for pid, n in Counter(pid for _, pid in changed).items():
+                    stats_service.record_decided(pid, status, now, n)
+            return decided
+
+        try:
+            decided = write_transaction(apply_decisions) if wanted else {}
         except Exception as e:
-            db.session.rollback()
-            logger.exception("Reject failed")
+            logger.exception("Bulk decide failed")
             return jsonify({"success": False, "error": str(e)}), 500
+        results.update(decided)
+
+        out, seen = [], set()
+        for app_id, raw_id in order:
+            if app_id is None:
+                out.append({"id": raw_id, "result": "invalid_id"})
+            elif app_id not in seen:
+                seen.add(app_id)
+                out.append({"id": app_id, "result": results[app_id]})
+        return jsonify({
+            "success": True,
+            "updated": sum(1 for result in decided.values() if result in BULK_DECISIONS.values()),
+            "results": out,
+        })
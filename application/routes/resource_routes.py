@@ -1,22 +1,79 @@
 import os
-from werkzeug.utils import secure_filename
-from flask import render_template, request, redirect, url_for, flash
+import threading
+from cachetools import TTLCache
+from flask import render_template, request, redirect, url_for, flash, send_file, abort, make_response
 from flask_login import login_required, current_user
+from markupsafe import Markup
 from ..database import db
 from ..models import Resource
+from ..utils import versions
 from ..utils.security import company_required
-from ..utils.file_utils import allowed_file, random_filename
+from ..utils.file_utils import allowed_file, get_storage, store_upload, release
+
+RESOURCE_TYPES = ("Video", "Book", "Website")
+RESOURCES_VERSION = "resources"
+
+# Rendered resource sections by (version, is_company). Add, edit and delete
+# move the host-wide version on, so every worker renders afresh after a change;
+# sections of older versions age out or are evicted by the two current ones.
+_sections_cache = TTLCache(maxsize=4, ttl=300)
+_sections_lock = threading.Lock()
 
 def register(app):
 
+    @app.template_filter("media_url")
+    def media_url(value):
+        # Older resource rows hold a ready-made /static URL instead of a storage key.
+        if not value or value.startswith("/"):
+            return value
+        return url_for("media", key=value)
+
+    @app.route("/media/<path:key>")
+    @login_required
+    def media(key):
+        """Uploaded logos and images. Keys are content hashes, so responses never change."""
+        storage = get_storage()
+        if not storage.exists(key):
+            abort(404)
+        path = storage.local_path(key)
+        if path is None:
+            resp = send_file(storage.open(key), download_name=os.path.basename(key), etag=key, conditional=True)
+        else:
+            resp = send_file(path, etag=key, conditional=True)
+        resp.cache_control.no_cache = None
+        resp.cache_control.private = True
+        resp.cache_control.max_age = app.config["MEDIA_MAX_AGE"]
+        resp.cache_control.immutable = True
+        return resp
+
+    def _sections(is_company):
+        key = (versions.current(RESOURCES_VERSION), is_company)
+        with _sections_lock:
+            html = _sections_cache.get(key)
+        if html is None:
+            grouped = {t: [] for t in RESOURCE_TYPES}
+            for r in Resource.query.order_by(Resource.created_at.desc(), Resource.id.desc()):
+                if r.resource_type in grouped:
+                    grouped[r.resource_type].append(r)
+            html = Markup(render_template("resource_sections.html", videos=grouped["Video"],
+                                          books=grouped["Book"], websites=grouped["Website"],
+                                          is_company=is_company))
+            with _sections_lock:
+                _sections_cache[key] = html
+        return html
+
     @app.route("/resources")
     @login_required
     def resources():
-        videos = Resource.query.filter_by(resource_type="Video").order_by(Resource.created_at.desc()).all()
-        books = Resource.query.filter_by(resource_type="Book").order_by(Resource.created_at.desc()).all()
-        websites = Resource.query.filter_by(resource_type="Website").order_by(Resource.created_at.desc()).all()
         is_company = current_user.role == "company"
-        return render_template("resources.html", videos=videos, books=books, websites=websites, is_company=is_company)
+        resp = make_response(render_template("resources.html", sections=_sections(is_company),
+                                             is_company=is_company))
+        # The ETag hashes the page as sent, flash messages included, so a 304
+        # never hides a message and a new deploy's markup is never mistaken for the old.
+        resp.add_etag()
+        resp.cache_control.private = True
+        resp.cache_control.no_cache = True
+        return resp.make_conditional(request)
 
     @app.route("/resources/add", methods=["GET", "POST"])
     @login_required
@@ -30,13 +87,11 @@ def register(app):
             image_file = request.files.get("image")
             image_path = None
             if image_file and allowed_file(image_file.filename):
-                newname = random_filename(secure_filename(image_file.filename))
-                full = os.path.join(app.config["UPLOAD_FOLDER"], newname)
-                image_file.save(full)
-                image_path = url_for("static", filename=f"uploads/{newname}")
+                image_path = store_upload(image_file)
             res = Resource(resource_type=rtype, title=title, url=urlv, description=desc, image_path=image_path)
             db.session.add(res)
             db.session.commit()
+            versions.bump(RESOURCES_VERSION)
             flash("Resource added successfully!", "success")
             return redirect(url_for("resources"))
         return render_template("add_resource.html")
@@ -51,15 +106,15 @@ def register(app):
             resource.title = request.form.get("title", resource.title)
             resource.url = request.form.get("url", resource.url)
             resource.description = request.form.get("description", resource.description)
-            if request.form.get("remove_current_image") == "true":
-                resource.image_path = None
             image_file = request.files.get("image")
-            if image_file and allowed_file(image_file.filename):
-                newname = random_filename(secure_filename(image_file.filename))
-                full = os.path.join(app.config["UPLOAD_FOLDER"], newname)
-                image_file.save(full)
-                resource.image_path = url_for("static", filename=f"uploads/{newname}")
+            replace = image_file and allowed_file(image_file.filename)
+            if replace or request.form.get("remove_current_image") == "true":
+                release(resource.image_path)
+                resource.image_path = None
+            if replace:
+                resource.image_path = store_upload(image_file)
             db.session.commit()
+            versions.bump(RESOURCES_VERSION)
             flash("Resource updated successfully!", "success")
             return redirect(url_for("resources"))
         return render_template("edit_resource.html", resource=resource)
@@ -69,7 +124,9 @@ def register(app):
     @company_required
     def delete_resource(id):
         resource = Resource.query.get_or_404(id)
+        release(resource.image_path)
         db.session.delete(resource)
         db.session.commit()
+        versions.bump(RESOURCES_VERSION)
         flash("Resource deleted successfully!", "success")
         return redirect(url_for("resources"))
@@ -6,17 +6,20 @@ from flask import (
     render_template, redirect, url_for, flash, request, jsonify, send_file
 )
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 
 from ..database import db
-from ..models import (
-    JobPost, ActiveApplication, AcceptedApplication, RejectedApplication,
-    SeekerData, CompanyData
-)
+from ..models import User, JobPost, Application, SeekerData, CompanyData
 from ..services.offer_service import render_offer_letter, render_template
+from ..services import (
+    match_service, offer_service, resume_service, listing_service, stats_service, recommend_service,
+    skill_service, autocomplete_service,
+)
 from ..utils.security import seeker_required
-from ..utils.file_utils import allowed_file, random_filename
-from .. import bcrypt
+from ..utils.helpers import filename_options
+from ..utils import identity
+from ..utils.sqlite import write_transaction
+from ..utils.file_utils import allowed_file, get_storage, save_blob, store_upload, acquire, release
+from ..utils.passwords import hash_password, check_password, HashingBusy
 logger = logging.getLogger(__name__)
 
 
@@ -39,19 +42,31 @@ def register(app):
             experience = (request.form.get("experience") or "").strip()
             skills = (request.form.get("skills") or "").strip()
 
-            filename = None
             resume_file = request.files.get("resume")
-            if resume_file and allowed_file(resume_file.filename):
-                filename = random_filename(secure_filename(resume_file.filename))
-                resume_file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
-
-            sd = SeekerData(
-                full_name=full_name, email=email, phone=phone,
-                education=education, experience=experience, skills=skills,
-                resume_path=filename
-            )
-            db.session.add(sd)
-            db.session.commit()
+            resume = save_blob(resume_file) if resume_file and allowed_file(resume_file.filename) else None
+            filename = resume[0] if resume else None
+
+            def save():
+                # One profile row per seeker (unique email): a resubmission updates it.
+                sd = SeekerData.query.filter_by(email=email).first()
+                if sd is None:
+                    sd = SeekerData(email=email)
+                    db.session.add(sd)
+                sd.full_name, sd.phone = full_name, phone
+                sd.education, sd.experience, sd.skills = education, experience, skills
+                if resume:
+                    acquire(*resume)
+                    release(sd.resume_path)
+                    sd.resume_path = filename
+                match_service.index_seeker(sd)
+                skill_service.tag_seeker(sd)
+                recommend_service.seeker_changed(sd.id)
+                return resume_service.mark_pending(filename)
+
+            extract = write_transaction(save)
+            identity.invalidate(email=email)
+            if extract:
+                resume_service.extract_in_background(filename)
             flash("Bio data submitted successfully!", "success")
             return redirect(url_for("seeker_dashboard"))
 
@@ -63,7 +78,9 @@ def register(app):
     def profile():
         if request.method == "POST":
             action = request.form.get("action")
+            user = db.session.get(User, current_user.id)
             if action == "details":
+                extract_key = None
                 if current_user.role == "seeker":
                     sd = SeekerData.query.filter_by(email=current_user.email).first()
                     if not sd:
@@ -78,16 +95,15 @@ def register(app):
 
                     resume_file = request.files.get("resume")
                     if resume_file and allowed_file(resume_file.filename):
-                        if sd.resume_path:
-                            try:
-                                os.remove(os.path.join(app.config["UPLOAD_FOLDER"], sd.resume_path))
-                            except Exception:
-                                pass
-                        newname = random_filename(secure_filename(resume_file.filename))
-                        resume_file.save(os.path.join(app.config["UPLOAD_FOLDER"], newname))
-                        sd.resume_path = newname
-
-                    current_user.name = sd.full_name
+                        release(sd.resume_path)
+                        sd.resume_path = store_upload(resume_file)
+                        if resume_service.mark_pending(sd.resume_path):
+                            extract_key = sd.resume_path
+
+                    match_service.index_seeker(sd)
+                    skill_service.tag_seeker(sd)
+                    recommend_service.seeker_changed(sd.id)
+                    user.name = sd.full_name
                 else:
                     cd = CompanyData.query.filter_by(email=current_user.email).first()
                     if not cd:
@@ -98,10 +114,12 @@ def register(app):
                     cd.phone = request.form.get("phone") or cd.phone
                     cd.website = request.form.get("website") or cd.website
                     if cd.contact_name:
-                        current_user.name = cd.contact_name
+                        user.name = cd.contact_name
 
                 try:
                     db.session.commit()
+                    identity.invalidate(user.id, user.email)
+                    resume_service.extract_in_background(extract_key)
                     flash("Profile updated successfully!", "success")
                 except Exception as e:
                     db.session.rollback()
@@ -113,7 +131,13 @@ def register(app):
                 new_pw = request.form.get("new_password", "")
                 confirm_pw = request.form.get("confirm_password", "")
 
-                if not bcrypt.check_password_hash(current_user.password, current_pw):
+                try:
+                    current_ok = check_password(user.password, current_pw)
+                except HashingBusy:
+                    current_ok = None
+                if current_ok is None:
+                    flash("The server is busy. Please try again in a moment.", "danger")
+                elif not current_ok:
                     flash("Current password is incorrect.", "danger")
                 elif len(new_pw) < 6:
                     flash("New password must be at least 6 characters.", "danger")
@@ -121,9 +145,12 @@ def register(app):
                     flash("New password and confirm password do not match.", "danger")
                 else:
                     try:
-                        current_user.password = bcrypt.generate_password_hash(new_pw).decode("utf-8")
+                        user.password = hash_password(new_pw)
                         db.session.commit()
+                        identity.invalidate(user.id)
                         flash("Password updated successfully!", "success")
+                    except HashingBusy:
+                        flash("The server is busy. Please try again in a moment.", "danger")
                     except Exception as e:
                         db.session.rollback()
                         logger.exception("Password update failed")
@@ -132,10 +159,10 @@ def register(app):
             return redirect(url_for("profile"))
 
         if current_user.role == "seeker":
-            sd = SeekerData.query.filter_by(email=current_user.email).first()
+            sd = identity.seeker_profile(current_user.email)
             resume_url = None
             if sd and sd.resume_path:
-                resume_url = url_for("view_resume", email=current_user.email)
+                resume_url = url_for("view_resume", email=current_user.email, v=sd.resume_path)
 
             profile_obj = type("Obj", (object,), {
                 "full_name": getattr(sd, "full_name", None) or current_user.name,
@@ -148,7 +175,7 @@ def register(app):
             })()
             return render_template("profile.html", role="seeker", profile=profile_obj, resume_url=resume_url)
 
-        cd = CompanyData.query.filter_by(email=current_user.email).first()
+        cd = identity.company_profile(current_user.email)
         posts_count = JobPost.query.filter_by(email=current_user.email).count()
         profile_obj = type("Obj", (object,), {
             "email": current_user.email,
@@ -160,14 +187,49 @@ def register(app):
         })()
         return render_template("profile.html", role="company", profile=profile_obj, resume_url=None)
 
+    def _send_resume(path, resume_path):
+        """Send a stored resume with validators, range support and cache headers.
+
+        Stored names are content hashes (or random, for older uploads) and never
+        rewritten, so the name is a strong ETag, and a URL carrying
+        ``?v=<name>`` may be cached for good. Without a matching ``v`` the
+        browser must revalidate, which is a cheap 304.
+        """
+        immutable = request.args.get("v") == resume_path
+        if path is None:
+            resp = send_file(get_storage().open(resume_path), as_attachment=False,
+                             download_name=os.path.basename(resume_path), etag=resume_path, conditional=True)
+        elif app.config["RESUME_OFFLOAD"] == "x-accel":
+            stat = os.stat(path)
+            resp = app.response_class(mimetype="application/pdf" if path.lower().endswith(".pdf") else None)
+            resp.headers["X-Accel-Redirect"] = app.config["RESUME_ACCEL_PREFIX"] + resume_path
+            resp.set_etag(resume_path)
+            resp.last_modified = stat.st_mtime
+            resp = resp.make_conditional(request)
+        else:
+            resp = send_file(path, as_attachment=False, etag=resume_path, conditional=True)
+            resp.headers.setdefault("Accept-Ranges", "bytes")
+        resp.cache_control.public = False
+        resp.cache_control.private = True
+        if immutable:
+            resp.cache_control.no_cache = None
+            resp.cache_control.max_age = app.config["RESUME_MAX_AGE"]
+            resp.cache_control.immutable = True
+        else:
+            resp.cache_control.no_cache = True
+            resp.cache_control.max_age = 0
+        resp.expires = None
+        return resp
+
     @app.route("/view_resume/<email>")
     @login_required
     def view_resume(email):
-        seeker = SeekerData.query.filter_by(email=email).first()
-        if seeker and seeker.resume_path:
-            path = os.path.join(app.config["UPLOAD_FOLDER"], seeker.resume_path)
-            if os.path.exists(path):
-                return send_file(path, as_attachment=False)
+        row = (db.session.query(SeekerData.resume_path)
+               .filter_by(email=email).order_by(SeekerData.id).first())
+        resume_path = row.resume_path if row else None
+        storage = get_storage()
+        if resume_path and storage.exists(resume_path):
+            return _send_resume(storage.local_path(resume_path), resume_path)
         if request.args.get("silent") == "1":
             return ("Resume not found", 404)
         flash("Resume not found", "danger")
@@ -178,57 +240,65 @@ def register(app):
     @login_required
     @seeker_required
     def job_listings():
-        q = (request.args.get("q") or "").strip().lower()
-        employment_type = request.args.get("employment_type")
-        salary_from = request.args.get("salary_from", type=int)
-        salary_to = request.args.get("salary_to", type=int)
-
-        query = JobPost.query
-        if q:
-            like = f"%{q}%"
-            query = query.filter(
-                db.or_(
-                    JobPost.job_title.ilike(like),
-                    JobPost.company_name.ilike(like),
-                    JobPost.location.ilike(like),
-                )
-            )
-        if employment_type:
-            query = query.filter_by(employment_type=employment_type)
-        if salary_from is not None:
-            query = query.filter((JobPost.salary_from >= salary_from) | (JobPost.salary_from.is_(None)))
-        if salary_to is not None:
-            query = query.filter((JobPost.salary_to <= salary_to) | (JobPost.salary_to.is_(None)))
-
-        jobs = query.all()
-
-        user_email = current_user.email
-
-        act = ActiveApplication.query.filter_by(seeker_email=user_email).all()
-        acc = AcceptedApplication.query.filter_by(seeker_email=user_email).all()
-        rej = RejectedApplication.query.filter_by(seeker_email=user_email).all()
-
-        def resolve_job_id(row):
-            jid = getattr(row, "job_post_id", None)
-            if jid:
-                return jid
-            j = JobPost.query.filter_by(job_title=row.job_title).first()
-            return j.id if j else None
-
-        applied_ids = {
-            jid for rows in (act, acc, rej) for jid in (resolve_job_id(r) for r in rows) if jid
-        }
-        applied_titles = {
-            r.job_title for rows in (act, acc, rej) for r in rows if getattr(r, "job_title", None)
-        }
-
+        page, per_page = listing_service.page_args(request.args)
+        filters = listing_service.filters_from(request.args)
+        jobs, has_next = listing_service.page(filters, page, per_page)
         return render_template(
             "applications.html",
             jobs=jobs,
-            applied_ids=applied_ids,
-            applied_titles=applied_titles
+            applied_ids=listing_service.applied_ids(current_user.email),
+            facets=listing_service.facets(filters),
+            page=page,
+            has_next=has_next
         )
 
+    @app.route("/api/job_listings", methods=["GET"])
+    @login_required
+    @seeker_required
+    def api_job_listings():
+        """One listing page as JSON, for the infinite scroll on ``job_listings``."""
+        page, per_page = listing_service.page_args(request.args)
+        jobs, has_next = listing_service.page(listing_service.filters_from(request.args), page, per_page)
+        applied = listing_service.applied_ids(current_user.email)
+        return jsonify({
+            "jobs": [listing_service.job_json(j, j.id in applied) for j in jobs],
+            "page": page,
+            "next_page": page + 1 if has_next else None,
+        })
+
+    @app.route("/api/job_facets", methods=["GET"])
+    @login_required
+    @seeker_required
+    def api_job_facets():
+        """Facet counts for the ``job_listings`` filters in the query string."""
+        return jsonify(listing_service.facets(listing_service.filters_from(request.args)))
+
+    @app.route("/api/autocomplete", methods=["GET"])
+    @login_required
+    def api_autocomplete():
+        """Suggestions for ``prefix`` in one field, or several comma separated, most frequent first."""
+        fields = [f for f in (request.args.get("field") or "").split(",") if f]
+        if not fields or any(f not in autocomplete_service.FIELDS for f in fields):
+            return jsonify({"error": f"field must be one or more of {', '.join(autocomplete_service.FIELDS)}"}), 400
+        limit = max(1, min(request.args.get("limit", autocomplete_service.DEFAULT_LIMIT, type=int),
+                           autocomplete_service.MAX_LIMIT))
+        prefix = request.args.get("prefix") or ""
+        return jsonify({"prefix": prefix,
+                        "suggestions": autocomplete_service.suggest(fields, prefix, limit)})
+
+    @app.route("/api/recommended_jobs", methods=["GET"])
+    @login_required
+    @seeker_required
+    def api_recommended_jobs():
+        """The seeker's materialized "jobs for you" list, best match first."""
+        limit = max(1, min(request.args.get("limit", recommend_service.FEED_SIZE, type=int),
+                           recommend_service.FEED_SIZE))
+        applied = listing_service.applied_ids(current_user.email)
+        return jsonify({"jobs": [
+            {**listing_service.job_json(job, job.id in applied), "score": score}
+            for job, score in recommend_service.feed(current_user.email, limit)
+        ]})
+
     @app.route("/apply/<int:job_post_id>", methods=["POST"], endpoint="apply_for_job")
     @app.route("/apply_job/<int:job_post_id>", methods=["POST"], endpoint="apply_job")
     @login_required
@@ -240,47 +310,41 @@ def register(app):
         user_email = current_user.email
         user_name = current_user.name
 
-        existing = ActiveApplication.query.filter_by(
-            seeker_email=user_email, job_post_id=job_post_id
-        ).first()
-        if existing:
-            msg = "You have already applied for this job."
-            if _wants_json():
-                return jsonify(success=False, message=msg), 409
-            flash(msg, "warning")
-            return redirect(request.referrer or url_for("applications"))
+        # Check and insert under one write lock so a double submit cannot
+        # create two applications.
+        def attempt():
+            existing = Application.query.filter_by(
+                seeker_email=user_email, job_post_id=job_post_id
+            ).first()
+            if existing:
+                return 409, "warning", "You have already applied for this job."
+            job = db.session.get(JobPost, job_post_id)
+            if not job:
+                return 404, "danger", "Job post not found."
+            if not bool(getattr(job, "is_open", 1)):
+                return 403, "danger", "This job is closed."
+            now = datetime.utcnow()
+            db.session.add(Application(
+                seeker_name=user_name,
+                seeker_email=user_email,
+                job_post_id=job_post_id,
+                job_title=job.job_title,
+                status=Application.ACTIVE,
+                applied_at=now,
+            ))
+            stats_service.record_applied(job_post_id, now)
+            return 201, "success", "Application submitted successfully!"
 
-        job = JobPost.query.get(job_post_id)
-        if not job:
-            msg = "Job post not found."
-            if _wants_json():
-                return jsonify(success=False, message=msg), 404
-            flash(msg, "danger")
-            return redirect(request.referrer or url_for("applications"))
-
-        if not bool(getattr(job, "is_open", 1)):
-            msg = "This job is closed."
-            if _wants_json():
-                return jsonify(success=False, message=msg), 403
-            flash(msg, "danger")
-            return redirect(request.referrer or url_for("applications"))
-
-        app_row = ActiveApplication(
-            seeker_name=user_name,
-            seeker_email=user_email,
-            job_post_id=job_post_id,
-            job_title=job.job_title,
-            applied_at=datetime.utcnow(),
-        )
         try:
-            db.session.add(app_row)
-            db.session.commit()
-            msg = "Application submitted successfully!"
+            code, category, msg = write_transaction(attempt)
+            if code in (201, 409):
+                listing_service.record_applied(user_email, job_post_id)
             if _wants_json():
-                return jsonify(success=True, message=msg), 201
-            flash(msg, "success")
+                return jsonify(success=code == 201, message=msg), code
+            flash(msg, category)
+            if code != 201:
+                return redirect(request.referrer or url_for("applications"))
         except Exception as e:
-            db.session.rollback()
             logger.exception("apply_for_job failed")
             msg = f"Could not submit application: {e}"
             if _wants_json():
@@ -298,28 +362,33 @@ def register(app):
         filters = (request.args.get("filters") or "").split(",") if request.args.get("filters") else []
         sort = (request.args.get("sort") or "asc").lower()
 
-        accepted_apps = AcceptedApplication.query.filter_by(seeker_email=user_email).all()
-        rejected_apps = RejectedApplication.query.filter_by(seeker_email=user_email).all()
-        active_apps   = ActiveApplication.query.filter_by(seeker_email=user_email).all()
-
-        def pack_rows(raw, status_key):
-            out = []
-            for r in raw:
-                job = JobPost.query.filter_by(job_title=r.job_title).first()
-                out.append({
-                    "job_title": r.job_title,
-                    "company_name": (job.company_name if job else "Unknown Company"),
-                    "applied_at": r.applied_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    "job_post_id": job.id if job else None,
-                    "job_description": job.job_description if job else "",
-                    "key_responsibilities": job.key_responsibilities if job else "",
-                    "status": status_key,
-                })
-            return out
-
-        accepted = pack_rows(accepted_apps, "accepted")
-        rejected = pack_rows(rejected_apps, "rejected")
-        under_review = pack_rows(active_apps, "under_review")
+        rows = (
+            db.session.query(Application, JobPost)
+            .outerjoin(JobPost, JobPost.id == Application.job_post_id)
+            .filter(Application.seeker_email == user_email)
+            .all()
+        )
+
+        status_keys = {
+            Application.ACCEPTED: "accepted",
+            Application.REJECTED: "rejected",
+            Application.ACTIVE: "under_review",
+        }
+        grouped = {key: [] for key in status_keys.values()}
+        for r, job in rows:
+            key = status_keys[r.status]
+            grouped[key].append({
+                "job_title": r.job_title,
+                "company_name": (job.company_name if job else "Unknown Company"),
+                "applied_at": r.applied_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "job_post_id": job.id if job else None,
+                "job_description": job.job_description if job else "",
+                "key_responsibilities": job.key_responsibilities if job else "",
+                "status": key,
+            })
+        accepted = grouped["accepted"]
+        rejected = grouped["rejected"]
+        under_review = grouped["under_review"]
 
         def apply_search(rows):
             if not search:
@@ -348,31 +417,32 @@ def register(app):
     @seeker_required
     def offer_letter():
         from flask import make_response, request
-        try:
-            from ..services.offer_service import render_offer_letter
-        except Exception:
-            try:
-                from ..offer_service import render_offer_letter
-            except Exception:
-                from application.offer_service import render_offer_letter
-
         job_post_id = request.args.get("job_post_id", type=int)
         job_title   = request.args.get("job_title") or request.args.get("title")
         applied_at  = request.args.get("applied_at", "")
 
-        html, filename = render_offer_letter(
-            seeker=current_user,
-            job_post_id=job_post_id,
-            job_title=job_title,
-            applied_at_str=applied_at
-        )
-
         # ?download=1 | true | yes  => force download
         want_download = (request.args.get("download") or "").lower() in {"1", "true", "yes"}
 
-        resp = make_response(html)
-        resp.headers["Content-Type"] = "text/html; charset=utf-8"
+        if (request.args.get("format") or "").lower() == "pdf":
+            ctx = offer_service.offer_context(
+                current_user.name, current_user.email,
+                offer_service.resolve_job(current_user.email, job_post_id, job_title),
+                job_title, applied_at,
+            )
+            resp = make_response(offer_service.offer_pdf(ctx, app.config["OFFER_CACHE_FOLDER"]))
+            resp.headers["Content-Type"] = "application/pdf"
+            filename = offer_service.offer_filename(ctx, "pdf")
+        else:
+            html, filename = render_offer_letter(
+                seeker=current_user,
+                job_post_id=job_post_id,
+                job_title=job_title,
+                applied_at_str=applied_at
+            )
+            resp = make_response(html)
+            resp.headers["Content-Type"] = "text/html; charset=utf-8"
         resp.headers["X-Content-Type-Options"] = "nosniff"
         disp = "attachment" if want_download else "inline"
-        resp.headers["Content-Disposition"] = f'{disp}; filename="{filename}"'
+        resp.headers.set("Content-Disposition", disp, **filename_options(filename))
         return resp
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""Prefix suggestions for the job listing search and skills boxes.
+
+One ``PrefixIndex`` per field holds the distinct ``job_posts`` titles,
+companies and locations and the skill vocabulary, each with the number of
+posts that carry it. Every word start of a value is a key in one sorted list,
+so "dev" finds "Backend Developer" and a skill's aliases find the skill; a
+lookup is a ``bisect`` to the first key with the prefix and a walk to the
+last. Prefixes with long ranges keep their top values memoized, and changes
+patch those lists rather than throw them away.
+
+The routes pass post changes in after they commit, so this worker's index is
+exact. Other workers' changes move the ``listings`` (or ``skills``) version;
+an index that sees it moved is rebuilt from the database at most every
+``REFRESH`` seconds, in a thread, while the old one keeps answering.
+"""
+import os
+import re
+import logging
+import time
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from flask import current_app
+from ..database import db
+from ..models import JobPost, JobPostSkill, Skill, SkillAlias
+from ..utils import metrics, versions
+from . import listing_service, skill_service
+
+POST_FIELDS = ("job_title", "company_name", "location")
+FIELDS = POST_FIELDS + ("skill",)
+REFRESH = int(os.environ.get("AUTOCOMPLETE_REFRESH", 60))
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Ranges of more keys than this have their top values memoized.
+SCAN_LIMIT = 256
+MEMO_SIZE = 4096
+# Keys per value beyond the first: long titles do not each need ten.
+MAX_WORD_KEYS = 5
+
+logger = logging.getLogger(__name__)
+
+_WORD_START_RE = re.compile(r"(?<![^\W_])[^\W_]")
+_lock = threading.Lock()
+_state = {"version": None, "built": 0.0, "indexes": None, "building": False}
+
+
+def normalize(text) -> str:
+    return " ".join((text or "").casefold().split())
+
+def _word_starts(text):
+    """Offsets of the word starts in ``text`` to key it by, the whole text first."""
+    return [0] + [m.start() for m in _WORD_START_RE.finditer(text) if m.start()][:MAX_WORD_KEYS]
+
+
+class _Keys:
+    """The sorted keys as a read-only sequence of strings, for ``bisect``.
+
+    A key is stored as the index of a normalised text and an offset into it,
+    so each suffix string only exists while a lookup compares against it.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index._key_text)
+
+    def __getitem__(self, i):
+        index = self.index
+        return index._texts[index._key_text[i]][index._key_offset[i]:]
+
+
+class PrefixIndex:
+    """Distinct values of one field with counts, found by the prefix of any of their words.
+
+    The keys are two parallel integer arrays (text, offset) kept in the sort
+    order of the suffix they stand for, and each value is stored once however
+    many keys point at it. A prefix whose range spans more than
+    ``SCAN_LIMIT`` keys has its top ``MAX_LIMIT`` memoized, and ``add``
+    patches those lists instead of dropping them. Values whose count falls
+    to zero stay until the next rebuild but are not suggested, unless
+    ``keep_unused`` (the skill vocabulary).
+    """
+
+    def __init__(self, keep_unused=False):
+        self.keep_unused = keep_unused
+        self._ids = {}
+        self._values = []
+        self._counts = array("l")
+        self._texts = []
+        self._text_value = array("l")
+        self._alias_texts = {}
+        self._key_text = array("l")
+        self._key_offset = array("H")
+        self._keys = _Keys(self)
+        # prefix -> (top value ids, whether they are every live value under it)
+        self._memo = {}
+
+    @classmethod
+    def load(cls, rows, keep_unused=False):
+        """Build from ``(value, count, aliases)`` rows with one sort."""
+        index = cls(keep_unused)
+        keys = []
+        for value, count, aliases in rows:
+            value = " ".join((value or "").split())
+            if not value or value in index._ids:
+                continue
+            vid = index._new_value(value, count)
+            texts = list(dict.fromkeys([normalize(value), *map(normalize, aliases)]))
+            if len(texts) > 1:
+                index._alias_texts[vid] = texts[1:]
+            for i, text in enumerate(texts):
+                tid = len(index._texts)
+                index._texts.append(text)
+                index._text_value.append(vid)
+                # An alias is keyed whole: "js" in "vue.js" should not find vue.
+                keys.extend((text[off:], tid, off) for off in (_word_starts(text) if i == 0 else (0,)))
+        keys.sort()
+        index._key_text = array("l", (tid for _, tid, _ in keys))
+        index._key_offset = array("H", (off for _, _, off in keys))
+        return index
+
+    def _new_value(self, value, count):
+        vid = self._ids[value] = len(self._values)
+        self._values.append(value)
+        self._counts.append(count)
+        return vid
+
+    def __len__(self):
+        return len(self._values)
+
+    def _rank(self, vid):
+        return self._counts[vid], -len(self._values[vid])
+
+    def _live(self, vid):
+        return self.keep_unused or self._counts[vid] > 0
+
+    def add(self, value, n=1):
+        """Move ``value``'s count by ``n``, adding it if it is new."""
+        value = " ".join((value or "").split())
+        if not value:
+            return
+        vid = self._ids.get(value)
+        if vid is None:
+            if n <= 0:
+                return
+            vid = self._new_value(value, 0)
+            text, tid = normalize(value), len(self._texts)
+            self._texts.append(text)
+            self._text_value.append(vid)
+            for off in _word_starts(text):
+                i = bisect_left(self._keys, text[off:])
+                self._key_text.insert(i, tid)
+                self._key_offset.insert(i, off)
+        self._counts[vid] = max(0, self._counts[vid] + n)
+        if self._memo:
+            self._patch_memo(vid, n)
+
+    def _patch_memo(self, vid, n):
+        """Bring the memoized lists under ``vid``'s keys up to date, dropping any that cannot be."""
+        text = normalize(self._values[vid])
+        keys = [text[off:] for off in _word_starts(text)] + self._alias_texts.get(vid, [])
+        prefixes = {key[:end] for key in keys for end in range(1, len(key) + 1)}
+        for prefix in prefixes & self._memo.keys():
+            top, complete = self._memo[prefix]
+            if vid in top:
+                if not self._live(vid) or n < 0 and not complete:
+                    # Something outside the list may now outrank it.
+                    if not complete:
+                        del self._memo[prefix]
+                        continue
+                    top.remove(vid)
+            elif self._live(vid) and (complete or self._rank(vid) > self._rank(top[-1])):
+                top.append(vid)
+            else:
+                continue
+            top.sort(key=self._rank, reverse=True)
+            if len(top) > MAX_LIMIT:
+                del top[MAX_LIMIT:]
+                self._memo[prefix] = (top, False)
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """``[(value, count)]`` with a word starting with ``prefix``, most frequent first."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        entry = self._memo.get(prefix)
+        if entry is not None:
+            top = entry[0]
+        else:
+            lo = bisect_left(self._keys, prefix)
+            hi = bisect_left(self._keys, prefix + "\U0010ffff", lo)
+            vids = {self._text_value[self._key_text[i]] for i in range(lo, hi)}
+            vids = [vid for vid in vids if self._live(vid)]
+            wide = hi - lo > SCAN_LIMIT
+            top = heapq.nlargest(MAX_LIMIT if wide else limit, vids, key=self._rank)
+            if wide:
+                if len(self._memo) >= MEMO_SIZE:
+                    self._memo.clear()
+                self._memo[prefix] = (top, len(vids) <= MAX_LIMIT)
+        return [(self._values[vid], self._counts[vid]) for vid in top[:limit]]
+
+    def stats(self) -> dict:
+        return {"values": len(self._values), "keys": len(self._key_text), "memo": len(self._memo)}
+
+
+def _build() -> dict:
+    indexes = {}
+    for field in POST_FIELDS:
+        col = getattr(JobPost, field)
+        rows = db.session.query(col, db.func.count()).group_by(col)
+        indexes[field] = PrefixIndex.load((value, n, ()) for value, n in rows)
+    aliases = defaultdict(list)
+    for skill_id, alias in db.session.query(SkillAlias.skill_id, SkillAlias.alias):
+        aliases[skill_id].append(alias)
+    tagged = dict(db.session.query(JobPostSkill.skill_id, db.func.count()).group_by(JobPostSkill.skill_id))
+    indexes["skill"] = PrefixIndex.load(
+        ((name, tagged.get(skill_id, 0), aliases[skill_id]) for skill_id, name in db.session.query(Skill.id, Skill.name)),
+        keep_unused=True,
+    )
+    return indexes
+
+def _version():
+    return versions.current(listing_service.VERSION), versions.current(skill_service.VERSION)
+
+def _rebuild(version) -> dict:
+    indexes = _build()
+    with _lock:
+        _state.update(version=version, built=time.time(), indexes=indexes, building=False)
+    return indexes
+
+def _rebuild_in_background(app, version):
+    with app.app_context():
+        try:
+            _rebuild(version)
+        except Exception:
+            logger.exception("Rebuilding the autocomplete index failed")
+            with _lock:
+                _state["building"] = False
+        finally:
+            db.session.remove()
+
+def _indexes() -> dict:
+    """This worker's indexes; only the first call waits for a build."""
+    version = _version()
+    with _lock:
+        indexes = _state["indexes"]
+        if indexes is not None:
+            stale = _state["version"] != version and time.time() - _state["built"] >= REFRESH
+            if not stale or _state["building"]:
+                return indexes
+            _state["building"] = True
+    if indexes is None:
+        return _rebuild(version)
+    threading.Thread(target=_rebuild_in_background, args=(current_app._get_current_object(), version),
+                     name="autocomplete-rebuild", daemon=True).start()
+    return indexes
+
+def suggest(fields, prefix, limit=DEFAULT_LIMIT) -> list:
+    """``[{"field", "value", "count"}]`` across ``fields``, most frequent first."""
+    indexes = _indexes()
+    with _lock:
+        found = [(field, value, n) for field in fields for value, n in indexes[field].search(prefix, limit)]
+    found.sort(key=lambda row: -row[2])
+    return [{"field": field, "value": value, "count": n} for field, value, n in found[:limit]]
+
+
+def snapshot(job) -> dict:
+    """The values ``job`` contributes to each index; take it before an edit or delete."""
+    values = {field: [getattr(job, field)] for field in POST_FIELDS}
+    values["skill"] = [name for (name,) in db.session.query(Skill.name)
+                       .join(JobPostSkill, JobPostSkill.skill_id == Skill.id)
+                       .filter(JobPostSkill.job_post_id == job.id)]
+    return values
+
+def post_changed(before, after):
+    """Apply one committed post change to this worker's index; ``{}`` for a create or delete side."""
+    with _lock:
+        indexes = _state["indexes"]
+        if indexes is None:
+            return
+        for field in FIELDS:
+            for value in before.get(field, ()):
+                indexes[field].add(value, -1)
+            for value in after.get(field, ()):
+                indexes[field].add(value, 1)
+
+@metrics.register_gauges
+def _index_sizes():
+    with _lock:
+        indexes = _state["indexes"] or {}
+        sizes = {field: index.stats() for field, index in indexes.items()}
+    return [("jobmatch_autocomplete_index_size", {"field": field, "part": part}, n)
+            for field, parts in sizes.items() for part, n in parts.items()]
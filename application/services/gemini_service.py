@@ -1,8 +1,27 @@
-import os, logging
+import os, logging, threading, time, queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from cachetools import TTLCache
+from ..utils import metrics
 logger = logging.getLogger(__name__)
 GEMINI_READY = False
 GEMINI_MODEL = None
 
+CACHE_MAXSIZE = int(os.environ.get("GEMINI_CACHE_SIZE", 512))
+CACHE_TTL = int(os.environ.get("GEMINI_CACHE_TTL", 3600))
+COALESCE_WAIT = float(os.environ.get("GEMINI_COALESCE_WAIT", 30))
+
+MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", 4))
+MAX_QUEUE = int(os.environ.get("GEMINI_MAX_QUEUE", 4))
+DEADLINE = float(os.environ.get("GEMINI_DEADLINE", 8))
+STREAM_DEADLINE = float(os.environ.get("GEMINI_STREAM_DEADLINE", 30))
+BREAKER_THRESHOLD = int(os.environ.get("GEMINI_BREAKER_THRESHOLD", 3))
+BREAKER_COOLDOWN = float(os.environ.get("GEMINI_BREAKER_COOLDOWN", 30))
+
+_cache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+_inflight = {}
+_lock = threading.Lock()
+CACHE_NAME = "chatbot_replies"
+
 try:
     import google.generativeai as genai
     _api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
@@ -13,22 +32,171 @@ try:
 except Exception:
     GEMINI_READY = False
 
-def reply(user_msg: str, role: str, fallback_name="there") -> str:
+def use_model(model):
+    """Swap the upstream model, e.g. for a local fake exposing ``generate_content``."""
+    global GEMINI_MODEL, GEMINI_READY
+    GEMINI_MODEL = model
+    GEMINI_READY = model is not None
+    breaker.reset()
+    with _lock:
+        _cache.clear()
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and lets one trial call
+    through once ``cooldown`` seconds have passed."""
+
+    def __init__(self, threshold, cooldown, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if self.clock() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+
+breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="gemini")
+# Held until the upstream call really returns, so hung calls keep counting
+# against the bound and new requests are turned away instead of queueing.
+_slots = threading.BoundedSemaphore(MAX_CONCURRENCY + MAX_QUEUE)
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.text = ""
+
+def _normalize(user_msg: str) -> str:
+    return " ".join(user_msg.lower().split()).rstrip("?!.… ")
+
+def _prompt(user_msg: str, role: str) -> str:
+    sys_prompt = (
+        "You are JobMatch's assistant. Be concise, helpful, actionable. "
+        f"User role: {role}. If asked for steps, give short bullet points."
+    )
+    return f"{sys_prompt}\n\nUser: {user_msg}\nAssistant:"
+
+def _lookup(result: str):
+    metrics.count("jobmatch_cache_lookups_total", cache=CACHE_NAME, result=result)
+
+def _failure(reason: str):
+    metrics.count("jobmatch_chatbot_upstream_failures_total", reason=reason)
+
+def _submit(fn, *args):
+    """Run ``fn`` on the bounded executor, or return ``None`` when the upstream
+    is marked unhealthy or every slot is taken."""
+    if not _slots.acquire(blocking=False):
+        _failure("rejected")
+        return None
+    if not breaker.allow():
+        _slots.release()
+        _failure("short_circuited")
+        return None
+    try:
+        fut = _executor.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    fut.add_done_callback(lambda _: _slots.release())
+    return fut
+
+def _generate(user_msg: str, role: str) -> str:
+    def call():
+        result = GEMINI_MODEL.generate_content(_prompt(user_msg, role))
+        return (getattr(result, 'text', '') or '').strip()
+
+    fut = _submit(call)
+    if fut is None:
+        return ""
+    try:
+        text = fut.result(timeout=DEADLINE)
+    except FutureTimeout:
+        logger.warning("Gemini call exceeded %.1fs deadline", DEADLINE)
+        _failure("timeout")
+        breaker.record_failure()
+        return ""
+    except Exception:
+        logger.exception("Gemini error")
+        _failure("error")
+        breaker.record_failure()
+        return ""
+    breaker.record_success()
+    return text
+
+def _cached_generate(user_msg: str, role: str) -> str:
+    """Gemini reply through the per-worker LRU/TTL cache.
+
+    Concurrent identical prompts (threaded servers) wait on the first caller's
+    upstream request instead of issuing their own. Empty replies are not cached.
+    """
+    key = (role, _normalize(user_msg))
+    with _lock:
+        cached = _cache.get(key)
+        if cached is None:
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _inflight[key] = _Flight()
+    if cached is not None:
+        _lookup("hit")
+        return cached
+    _lookup("miss" if leader else "coalesced")
+    if not leader:
+        flight.done.wait(COALESCE_WAIT)
+        return flight.text
+    try:
+        flight.text = _generate(user_msg, role)
+        if flight.text:
+            with _lock:
+                _cache[key] = flight.text
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+    return flight.text
+
+@metrics.register_gauges
+def _gauges():
+    with _lock:
+        size = len(_cache)
+    return [("jobmatch_cache_entries", {"cache": CACHE_NAME}, size),
+            ("jobmatch_chatbot_breaker_open", {}, int(breaker.state != "closed"))]
+
+def fallback_reply(user_msg: str, fallback_name="there") -> str:
     if not user_msg:
         return "Say something and I’ll try to help 😊"
-    if GEMINI_READY:
-        try:
-            sys_prompt = (
-                "You are JobMatch's assistant. Be concise, helpful, actionable. "
-                f"User role: {role}. If asked for steps, give short bullet points."
-            )
-            full_prompt = f"{sys_prompt}\n\nUser: {user_msg}\nAssistant:"
-            result = GEMINI_MODEL.generate_content(full_prompt)
-            text = (getattr(result, 'text', '') or '').strip()
-            if text:
-                return text
-        except Exception:
-            logger.exception("Gemini error")
     low = user_msg.lower()
     if "hello" in low or "hi" in low: return f"Hey {fallback_name}! How can I help you today?"
     if "apply" in low: return "Open **Applications**, pick a job, and click **Apply**."
@@ -36,3 +204,82 @@ def reply(user_msg: str, role: str, fallback_name="there") -> str:
     if "post" in low and "job" in low: return "As an employer, go to **Dashboard → Post a Job**."
     if "profile" in low: return "Open **Profile** to view/edit details. Password changes are in the Password tab."
     return "Try asking about *applications*, *status*, *posting jobs*, *resources*, or *profile*."
+
+def reply(user_msg: str, role: str, fallback_name="there") -> str:
+    if user_msg and GEMINI_READY:
+        text = _cached_generate(user_msg, role)
+        if text:
+            return text
+    return fallback_reply(user_msg, fallback_name)
+
+def stream_reply(user_msg: str, role: str, fallback_name="there"):
+    """Yield ``(source, text)`` chunks for one reply.
+
+    ``source`` is ``"gemini"`` for streamed model output, ``"cache"`` for a
+    cached reply and ``"fallback"`` for the keyword answer. The first chunk must
+    arrive within ``DEADLINE`` and the whole reply within ``STREAM_DEADLINE``;
+    a stream that fails after partial output simply ends early.
+    """
+    if not (user_msg and GEMINI_READY):
+        yield "fallback", fallback_reply(user_msg, fallback_name)
+        return
+    key = (role, _normalize(user_msg))
+    with _lock:
+        cached = _cache.get(key)
+    _lookup("hit" if cached else "miss")
+    if cached:
+        yield "cache", cached
+        return
+
+    chunks = queue.Queue()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for part in GEMINI_MODEL.generate_content(_prompt(user_msg, role), stream=True):
+                if cancelled.is_set():
+                    return
+                text = getattr(part, "text", "") or ""
+                if text:
+                    chunks.put(("chunk", text))
+            chunks.put(("end", None))
+        except Exception as e:
+            chunks.put(("error", e))
+
+    if _submit(produce) is None:
+        yield "fallback", fallback_reply(user_msg, fallback_name)
+        return
+
+    started = time.monotonic()
+    parts = []
+    try:
+        while True:
+            limit = DEADLINE if not parts else STREAM_DEADLINE
+            remaining = started + limit - time.monotonic()
+            try:
+                kind, payload = chunks.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                logger.warning("Gemini stream exceeded its deadline")
+                _failure("timeout")
+                breaker.record_failure()
+                break
+            if kind == "chunk":
+                parts.append(payload)
+                yield "gemini", payload
+            elif kind == "end":
+                breaker.record_success()
+                text = "".join(parts).strip()
+                if text:
+                    with _lock:
+                        _cache[key] = text
+                    return
+                break
+            else:
+                logger.error("Gemini stream error: %s", payload)
+                _failure("error")
+                breaker.record_failure()
+                break
+        if not parts:
+            yield "fallback", fallback_reply(user_msg, fallback_name)
+    finally:
+        cancelled.set()
@@ -0,0 +1,217 @@
+"""Job listing pages and facet counts for seekers, cached in each worker.
+
+A page is cached per filter tuple and page number, and the facet counts per
+filter tuple, keyed with the host-wide ``listings`` version that
+``invalidate()`` moves on after a post is created, edited, opened, closed or
+deleted. Each seeker's applied job ids are kept as a set the apply route adds
+to, so a cached page costs no ranking or application queries at all.
+"""
+import os
+import time
+import threading
+from bisect import bisect_right
+from collections import Counter
+from types import SimpleNamespace
+from typing import NamedTuple, Optional, Tuple
+from cachetools import TTLCache
+from flask import session, has_request_context
+from ..database import db
+from ..models import JobPost, JobPostSkill, Skill, Application
+from ..utils import metrics, versions
+from . import search_service, skill_service
+
+PAGE_TTL = int(os.environ.get("LISTING_CACHE_TTL", 300))
+PAGE_MAXSIZE = int(os.environ.get("LISTING_CACHE_SIZE", 2048))
+APPLIED_TTL = int(os.environ.get("APPLIED_CACHE_TTL", 600))
+APPLIED_MAXSIZE = int(os.environ.get("APPLIED_CACHE_SIZE", 4096))
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+# Upper edges of the salary facet buckets, on ``salary_from``.
+SALARY_BUCKETS = (30000, 50000, 80000, 120000)
+FACET_LOCATIONS = 10
+VERSION = "listings"
+# Session key holding the time of the seeker's last application, for the
+# same reason as ``identity.STAMP_KEY``: another worker's applied set for this
+# seeker is older than that and must be reloaded.
+APPLIED_STAMP_KEY = "_applied_v"
+
+LISTING_FIELDS = (
+    "id", "job_title", "company_name", "location", "employment_type", "salary_from", "salary_to",
+    "job_description", "key_responsibilities", "is_open",
+)
+
+_pages = TTLCache(maxsize=PAGE_MAXSIZE, ttl=PAGE_TTL)
+_facets = TTLCache(maxsize=PAGE_MAXSIZE, ttl=PAGE_TTL)
+_applied = TTLCache(maxsize=APPLIED_MAXSIZE, ttl=APPLIED_TTL)
+_lock = threading.Lock()
+
+
+class Filters(NamedTuple):
+    q: str = ""
+    employment_type: str = ""
+    salary_from: Optional[int] = None
+    salary_to: Optional[int] = None
+    # Canonical skill names, sorted, so "js" and "javascript" share a key.
+    skills: Tuple[str, ...] = ()
+
+
+def filters_from(args) -> Filters:
+    """The listing filters in ``request.args``, normalised for use as a cache key."""
+    return Filters(
+        q=" ".join((args.get("q") or "").lower().split()),
+        employment_type=(args.get("employment_type") or "").strip(),
+        salary_from=args.get("salary_from", type=int),
+        salary_to=args.get("salary_to", type=int),
+        skills=skill_service.resolve(args.get("skills") or ""),
+    )
+
+def page_args(args):
+    """``(page, per_page)`` from ``request.args``, clamped."""
+    page = max(args.get("page", 1, type=int), 1)
+    per_page = max(1, min(args.get("per_page", DEFAULT_PER_PAGE, type=int), MAX_PER_PAGE))
+    return page, per_page
+
+
+def _filter(query, filters: Filters):
+    """Apply ``filters`` to a query over ``JobPost``; returns ``(query, ranked)``."""
+    ranked = False
+    if filters.q and search_service.is_enabled() and search_service.match_expression(filters.q):
+        query = search_service.apply_search(query, filters.q)
+        ranked = True
+    elif filters.q:
+        like = f"%{filters.q}%"
+        query = query.filter(db.or_(
+            JobPost.job_title.ilike(like),
+            JobPost.company_name.ilike(like),
+            JobPost.location.ilike(like),
+        ))
+    if filters.employment_type:
+        query = query.filter(JobPost.employment_type == filters.employment_type)
+    if filters.salary_from is not None:
+        query = query.filter((JobPost.salary_from >= filters.salary_from) | (JobPost.salary_from.is_(None)))
+    if filters.salary_to is not None:
+        query = query.filter((JobPost.salary_to <= filters.salary_to) | (JobPost.salary_to.is_(None)))
+    for name in filters.skills:
+        tagged = (db.session.query(JobPostSkill.job_post_id)
+                  .join(Skill, Skill.id == JobPostSkill.skill_id)
+                  .filter(Skill.name == name))
+        query = query.filter(JobPost.id.in_(tagged))
+    return query, ranked
+
+def _query(filters: Filters):
+    query, ranked = _filter(db.session.query(*(getattr(JobPost, f) for f in LISTING_FIELDS)), filters)
+    return query if ranked else query.order_by(JobPost.id)
+
+def page(filters: Filters, number: int = 1, per_page: int = DEFAULT_PER_PAGE):
+    """``(jobs, has_next)`` for one page; jobs are read-only snapshots."""
+    key = (versions.current(VERSION), filters, number, per_page)
+    with _lock:
+        hit = _pages.get(key)
+    metrics.count("jobmatch_cache_lookups_total", cache="listing_pages", result="miss" if hit is None else "hit")
+    if hit is not None:
+        return hit
+    rows = _query(filters).offset((number - 1) * per_page).limit(per_page + 1).all()
+    result = (tuple(SimpleNamespace(**row._asdict()) for row in rows[:per_page]), len(rows) > per_page)
+    with _lock:
+        _pages[key] = result
+    return result
+
+
+def _salary_bucket(salary_from) -> int:
+    return -1 if salary_from is None else bisect_right(SALARY_BUCKETS, salary_from)
+
+def _facet_query(filters: Filters):
+    # Grouped on the bare columns in ``ix_job_posts_facets`` order, SQLite
+    # streams the groups off the index; bucketing in SQL would sort them.
+    dims = (JobPost.employment_type, JobPost.salary_from, JobPost.location, JobPost.is_open)
+    query, _ = _filter(db.session.query(*dims, db.func.count()), filters)
+    return query.order_by(None).group_by(*dims)
+
+def _facet_cells(filters: Filters) -> tuple:
+    """Post counts per (employment type, salary bucket, location, open) for ``filters``, in one query."""
+    cells = Counter()
+    for employment_type, salary_from, location, is_open, n in _facet_query(filters):
+        cells[(employment_type, _salary_bucket(salary_from), location, int(is_open != 0))] += n
+    return tuple((*cell, n) for cell, n in cells.items())
+
+def facets(filters: Filters) -> dict:
+    """Counts per employment type, salary bucket, location and open/closed.
+
+    The cells are grouped over every filter but the employment type, so the
+    type facet still counts the types one could switch to; the other facets
+    only sum the cells of the chosen type.
+    """
+    key = (versions.current(VERSION), filters._replace(employment_type=""))
+    with _lock:
+        cells = _facets.get(key)
+    metrics.count("jobmatch_cache_lookups_total", cache="listing_facets", result="miss" if cells is None else "hit")
+    if cells is None:
+        cells = _facet_cells(key[1])
+        with _lock:
+            _facets[key] = cells
+
+    by_type, by_salary, by_location, by_open = Counter(), Counter(), Counter(), Counter()
+    for employment_type, bucket, location, is_open, n in cells:
+        by_type[employment_type] += n
+        if filters.employment_type and employment_type != filters.employment_type:
+            continue
+        by_salary[bucket] += n
+        by_location[location] += n
+        by_open[is_open] += n
+    edges = (0,) + SALARY_BUCKETS + (None,)
+    return {
+        "total": sum(by_open.values()),
+        "employment_type": [{"value": v, "count": n} for v, n in by_type.most_common()],
+        "salary": ([{"from": None, "to": None, "count": by_salary[-1]}] if by_salary[-1] else []) + [
+            {"from": edges[i], "to": edges[i + 1], "count": by_salary[i]}
+            for i in range(len(SALARY_BUCKETS) + 1) if by_salary[i]
+        ],
+        "location": [{"value": v, "count": n} for v, n in by_location.most_common(FACET_LOCATIONS)],
+        "open": {"open": by_open[1], "closed": by_open[0]},
+    }
+
+def invalidate():
+    """Drop every worker's cached pages and facets; call after a job post change commits."""
+    versions.bump(VERSION)
+    with _lock:
+        _pages.clear()
+        _facets.clear()
+
+
+def _applied_stamp() -> float:
+    return session.get(APPLIED_STAMP_KEY, 0) if has_request_context() else 0
+
+def applied_ids(email) -> frozenset:
+    """Ids of the posts ``email`` has applied to."""
+    stamp = _applied_stamp()
+    with _lock:
+        entry = _applied.get(email)
+        if entry is not None and entry[0] >= stamp:
+            return entry[1]
+    ids = frozenset(jid for (jid,) in db.session.query(Application.job_post_id)
+                    .filter(Application.seeker_email == email, Application.job_post_id.isnot(None)))
+    with _lock:
+        _applied[email] = (time.time(), ids)
+    return ids
+
+def record_applied(email, job_post_id):
+    """Add an application that just committed to the seeker's cached set."""
+    now = time.time()
+    with _lock:
+        entry = _applied.get(email)
+        if entry is not None:
+            _applied[email] = (now, entry[1] | {job_post_id})
+    if has_request_context():
+        session[APPLIED_STAMP_KEY] = now
+
+def job_json(job, applied=False) -> dict:
+    out = {f: getattr(job, f) for f in LISTING_FIELDS}
+    out["is_open"] = bool(1 if job.is_open is None else job.is_open)
+    out["applied"] = applied
+    return out
+
+@metrics.register_gauges
+def _cache_entries():
+    with _lock:
+        sizes = {"listing_pages": len(_pages), "listing_facets": len(_facets), "applied_sets": len(_applied)}
+    return [("jobmatch_cache_entries", {"cache": cache}, n) for cache, n in sizes.items()]
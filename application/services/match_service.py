@@ -0,0 +1,142 @@
+import math
+import re
+import heapq
+from collections import Counter, defaultdict
+from sqlalchemy import func
+from ..database import db
+from ..models import MatchDocument, MatchTerm, SeekerData, JobPost, Application
+
+SEEKER = "seeker"
+JOB = "job"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+MAX_QUERY_TERMS = 64
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our the this to we with you your will
+""".split())
+
+def tokenize(text: str) -> list:
+    """Lower-case word tokens with stopwords and one-letter noise removed."""
+    return [t[:64] for t in _TOKEN_RE.findall((text or "").lower())
+            if t not in _STOPWORDS and (len(t) > 1 or t in {"c", "r"})]
+
+def seeker_text(sd) -> str:
+    return " ".join(filter(None, [sd.skills, sd.education, sd.experience]))
+
+def job_text(job) -> str:
+    return " ".join(filter(None, [job.job_title, job.job_description, job.key_responsibilities]))
+
+def _index(kind: str, doc_id: int, text: str):
+    """Replace the term rows of one document. The caller owns the commit."""
+    counts = Counter(tokenize(text))
+    MatchTerm.query.filter_by(doc_kind=kind, doc_id=doc_id).delete(synchronize_session=False)
+    doc = MatchDocument.query.filter_by(doc_kind=kind, doc_id=doc_id).first()
+    if not doc:
+        doc = MatchDocument(doc_kind=kind, doc_id=doc_id)
+        db.session.add(doc)
+    doc.length = sum(counts.values())
+    if counts:
+        db.session.execute(MatchTerm.__table__.insert(), [
+            {"doc_kind": kind, "doc_id": doc_id, "term": t, "tf": n} for t, n in counts.items()
+        ])
+    return counts
+
+def _remove(kind: str, doc_id: int):
+    MatchTerm.query.filter_by(doc_kind=kind, doc_id=doc_id).delete(synchronize_session=False)
+    MatchDocument.query.filter_by(doc_kind=kind, doc_id=doc_id).delete(synchronize_session=False)
+
+def index_seeker(sd):
+    if sd.id is None:
+        db.session.flush()
+    return _index(SEEKER, sd.id, seeker_text(sd))
+
+def index_job_post(job):
+    if job.id is None:
+        db.session.flush()
+    return _index(JOB, job.id, job_text(job))
+
+def remove_job_post(job_id: int):
+    _remove(JOB, job_id)
+
+def remove_seeker(seeker_id: int):
+    _remove(SEEKER, seeker_id)
+
+def _query_terms(job) -> dict:
+    rows = db.session.query(MatchTerm.term, MatchTerm.tf).filter_by(doc_kind=JOB, doc_id=job.id).all()
+    counts = dict(rows) if rows else dict(index_job_post(job))
+    return dict(heapq.nlargest(MAX_QUERY_TERMS, counts.items(), key=lambda kv: kv[1]))
+
+def _corpus_stats(terms):
+    n_docs, avg_len = (
+        db.session.query(func.count(MatchDocument.id), func.avg(MatchDocument.length))
+        .filter(MatchDocument.doc_kind == SEEKER).one()
+    )
+    df_rows = (
+        db.session.query(MatchTerm.term, func.count(MatchTerm.id))
+        .filter(MatchTerm.doc_kind == SEEKER, MatchTerm.term.in_(terms))
+        .group_by(MatchTerm.term).all()
+    )
+    return n_docs or 0, float(avg_len or 0.0), dict(df_rows)
+
+def rank_applicants(job, k: int = 20):
+    """Top-k active applicants of ``job`` by BM25 of their profile against the post.
+
+    Only the index rows of this post's applicants and query terms are read, so the
+    cost follows the applicant count rather than the size of the seeker corpus.
+    Returns ``[(Application, score)]`` ordered best first.
+    """
+    apps = (Application.query
+            .filter(Application.job_post_id == job.id, Application.status == Application.ACTIVE)
+            .order_by(Application.applied_at.asc())
+            .all())
+    if not apps:
+        return []
+    qterms = _query_terms(job)
+    scores = defaultdict(float)
+    if qterms:
+        n_docs, avg_len, df = _corpus_stats(list(qterms))
+        idf = {t: math.log(1.0 + (n_docs - df.get(t, 0) + 0.5) / (df.get(t, 0) + 0.5)) for t in qterms}
+        doc_len = dict(
+            db.session.query(MatchDocument.doc_id, MatchDocument.length)
+            .join(SeekerData, SeekerData.id == MatchDocument.doc_id)
+            .join(Application, Application.seeker_email == SeekerData.email)
+            .filter(MatchDocument.doc_kind == SEEKER, Application.job_post_id == job.id,
+                    Application.status == Application.ACTIVE)
+            .all()
+        )
+        hits = (
+            db.session.query(Application.id, MatchTerm.doc_id, MatchTerm.term, MatchTerm.tf)
+            .join(SeekerData, SeekerData.email == Application.seeker_email)
+            .join(MatchTerm, (MatchTerm.doc_kind == SEEKER) & (MatchTerm.doc_id == SeekerData.id))
+            .filter(Application.job_post_id == job.id, Application.status == Application.ACTIVE,
+                    MatchTerm.term.in_(list(qterms)))
+            .all()
+        )
+        per_doc = defaultdict(float)
+        for app_id, doc_id, term, tf in hits:
+            norm = 1.0 - BM25_B + BM25_B * (doc_len.get(doc_id, 0) / avg_len if avg_len else 1.0)
+            per_doc[(app_id, doc_id)] += idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        for (app_id, _), s in per_doc.items():
+            scores[app_id] = max(scores[app_id], s)
+    order = {a.id: i for i, a in enumerate(apps)}
+    top = heapq.nlargest(max(k, 0), apps, key=lambda a: (scores.get(a.id, 0.0), -order[a.id]))
+    return [(a, round(scores.get(a.id, 0.0), 4)) for a in top]
+
+def reindex_all(batch_size: int = 500) -> dict:
+    """Rebuild every match document. Used for the initial backfill only."""
+    done = {SEEKER: 0, JOB: 0}
+    for model, kind, fn in ((SeekerData, SEEKER, index_seeker), (JobPost, JOB, index_job_post)):
+        last_id = 0
+        while True:
+            rows = model.query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                fn(row)
+            db.session.commit()
+            done[kind] += len(rows)
+            last_id = rows[-1].id
+    return done
@@ -1,26 +1,212 @@
+import os
+import io
+import json
+import time
+import hashlib
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from flask import render_template
 from datetime import datetime
-from ..models import JobPost
+from fpdf import FPDF
+from ..models import JobPost, Application
 
-def render_offer_letter(seeker, job_post_id=None, job_title=None, applied_at_str=""):
+# Batches smaller than this render inline; forking a pool costs more than it saves.
+POOL_THRESHOLD = 8
+
+def resolve_job(seeker_email, job_post_id=None, job_title=None):
     job = None
     if job_post_id:
         job = JobPost.query.get(job_post_id)
     if not job and job_title:
-        job = JobPost.query.filter_by(job_title=job_title).first()
+        app_row = (Application.query
+                   .filter_by(seeker_email=seeker_email, job_title=job_title)
+                   .filter(Application.job_post_id.isnot(None))
+                   .first())
+        job = JobPost.query.get(app_row.job_post_id) if app_row else None
+    return job
 
+def offer_context(seeker_name, seeker_email, job=None, job_title=None, applied_at_str=""):
+    """Everything a letter shows, as plain data so it can cross process boundaries."""
     job_title_val = (job.job_title if job else job_title) or "Position"
-    company_name  = (job.company_name if job and getattr(job, "company_name", None) else "Your Company")
-    department    = getattr(job, "department", "") or ""
-    today_str     = datetime.utcnow().strftime("%Y-%m-%d")
-
-    return render_template(
-        "offer_letter.html",
-        job_title=job_title_val,
-        company_name=company_name,
-        seeker_name=getattr(seeker, "name", "Candidate"),
-        seeker_email=getattr(seeker, "email", ""),
-        department=department,
-        applied_at=applied_at_str,
-        today=today_str
-    ), f"Offer_Letter_{company_name}_{job_title_val}_{today_str}.html".replace(" ", "_")
+    company_name = (job.company_name if job and getattr(job, "company_name", None) else "Your Company")
+    return {
+        "job_post_id": job.id if job else None,
+        "job_title": job_title_val,
+        "company_name": company_name,
+        "department": getattr(job, "department", "") or "",
+        "seeker_name": seeker_name or "Candidate",
+        "seeker_email": seeker_email or "",
+        "applied_at": applied_at_str or "",
+        "today": datetime.utcnow().strftime("%Y-%m-%d"),
+    }
+
+def offer_filename(ctx, ext="html", suffix=""):
+    name = f"Offer_Letter_{ctx['company_name']}_{ctx['job_title']}{suffix}_{ctx['today']}.{ext}"
+    return name.replace(" ", "_").replace("/", "-")
+
+def render_offer_letter(seeker, job_post_id=None, job_title=None, applied_at_str=""):
+    seeker_email = getattr(seeker, "email", "")
+    job = resolve_job(seeker_email, job_post_id, job_title)
+    ctx = offer_context(getattr(seeker, "name", "Candidate"), seeker_email, job, job_title, applied_at_str)
+    html = render_template("offer_letter.html", **{k: v for k, v in ctx.items() if k != "job_post_id"})
+    return html, offer_filename(ctx)
+
+def _latin1(text) -> str:
+    # The core PDF fonts only cover Latin-1.
+    return str(text or "").encode("latin-1", "replace").decode("latin-1")
+
+def build_offer_pdf(ctx) -> bytes:
+    """Render one letter with FPDF. Pure function of ``ctx``; safe in a worker process."""
+    t = {k: _latin1(v) for k, v in ctx.items()}
+    pdf = FPDF(format="A4")
+    pdf.set_margins(20, 20, 20)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 20)
+    pdf.cell(0, 10, "Offer Letter", ln=0)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, t["company_name"], ln=1, align="R")
+    pdf.set_font("Arial", "", 10)
+    pdf.set_text_color(107, 114, 128)
+    pdf.cell(0, 6, t["today"], ln=0)
+    pdf.cell(0, 6, "Official Employment Offer", ln=1, align="R")
+    pdf.set_text_color(17, 24, 39)
+    pdf.ln(6)
+
+    rows = [("Candidate", t["seeker_name"]), ("Email", t["seeker_email"]),
+            ("Position", t["job_title"]), ("Company", t["company_name"])]
+    if t["department"]:
+        rows.append(("Department", t["department"]))
+    if t["applied_at"]:
+        rows.append(("Application Date", t["applied_at"]))
+    for label, val in rows:
+        pdf.set_font("Arial", "", 10)
+        pdf.cell(45, 7, label)
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, 7, val, ln=1)
+
+    def heading(text):
+        pdf.ln(4)
+        pdf.set_font("Arial", "B", 13)
+        pdf.cell(0, 8, text, ln=1)
+        pdf.set_font("Arial", "", 11)
+
+    heading("Details")
+    pdf.multi_cell(0, 6, (
+        f"We are pleased to offer you the position of {t['job_title']} at {t['company_name']}. "
+        "Your start date, compensation, and benefits will be confirmed by our HR team in your onboarding packet."
+    ))
+    pdf.ln(2)
+    pdf.multi_cell(0, 6, (
+        "This offer is contingent upon completion of any required background checks and verification procedures. "
+        "By accepting this offer, you agree to abide by company policies and procedures provided during onboarding."
+    ))
+    heading("Next Steps")
+    for step in ("Confirm your acceptance in your JobMatch dashboard or via email.",
+                 "Complete onboarding documents shared by our HR team.",
+                 "Prepare identification for employment verification."):
+        pdf.multi_cell(0, 6, f"-  {step}")
+
+    pdf.ln(10)
+    pdf.cell(0, 6, "Sincerely,", ln=1)
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(0, 8, f"{t['company_name']} Hiring Team", ln=1)
+    pdf.ln(14)
+    pdf.line(pdf.get_x(), pdf.get_y(), pdf.get_x() + 70, pdf.get_y())
+    return pdf.output(dest="S").encode("latin-1")
+
+def _cache_path(cache_dir, ctx):
+    key = hashlib.sha256(json.dumps(ctx, sort_keys=True).encode()).hexdigest()
+    return os.path.join(cache_dir, key[:2], f"{key}.pdf")
+
+def _cache_read(cache_dir, ctx):
+    try:
+        with open(_cache_path(cache_dir, ctx), "rb") as fh:
+            return fh.read()
+    except OSError:
+        return None
+
+def _cache_write(cache_dir, ctx, data):
+    path = _cache_path(cache_dir, ctx)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+def prune_cache(cache_dir, max_age, dry_run=False) -> int:
+    """Delete cached letters older than ``max_age`` seconds; returns how many.
+
+    Keys include the letter date, so yesterday's files are never read again.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime >= cutoff:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+    return removed
+
+def offer_pdf(ctx, cache_dir) -> bytes:
+    """PDF bytes for ``ctx``, rendered once per seeker/job/date and then served from disk."""
+    data = _cache_read(cache_dir, ctx)
+    if data is None:
+        data = build_offer_pdf(ctx)
+        _cache_write(cache_dir, ctx, data)
+    return data
+
+def offer_pdfs(named_contexts, cache_dir, workers=None):
+    """Yield ``(name, pdf_bytes)`` for ``(name, ctx)`` pairs, rendering cache misses in a process pool."""
+    misses = []
+    for name, ctx in named_contexts:
+        data = _cache_read(cache_dir, ctx)
+        if data is None:
+            misses.append((name, ctx))
+        else:
+            yield name, data
+    if not misses:
+        return
+    ctxs = [ctx for _, ctx in misses]
+    if len(misses) < POOL_THRESHOLD:
+        rendered = map(build_offer_pdf, ctxs)
+        for (name, ctx), data in zip(misses, rendered):
+            _cache_write(cache_dir, ctx, data)
+            yield name, data
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for (name, ctx), data in zip(misses, pool.map(build_offer_pdf, ctxs, chunksize=4)):
+            _cache_write(cache_dir, ctx, data)
+            yield name, data
+
+class _ZipSink(io.RawIOBase):
+    """Write-only buffer that ``zipfile`` treats as an unseekable stream."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+def zip_stream(named_files):
+    """Yield a ZIP archive chunk by chunk from ``(name, bytes)`` pairs."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+        for name, data in named_files:
+            zf.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,207 @@
+"""Materialized "jobs for you" lists for seekers.
+
+``recommended_jobs`` holds each seeker's best open posts, scored with BM25 of
+the post against the terms of the seeker's profile, as ``match_service``
+indexes them. The ``match_terms`` postings double as the inverted index for
+upkeep: a profile change rescores that one seeker, and a new or edited open
+post is scored only for the seekers who share a term with it. Each list keeps
+``KEEP`` entries so closing or deleting a post only forces a rescore for the
+seekers it leaves with fewer than ``FEED_SIZE``.
+
+With the task queue enabled the work is enqueued in the caller's transaction;
+otherwise it runs there and then, and the caller commits.
+"""
+import math
+import heapq
+from sqlalchemy import func
+from ..database import db
+from ..models import JobPost, MatchDocument, MatchTerm, RecommendedJob, SeekerData
+from ..utils.sqlite import write_transaction
+from . import task_queue
+from .match_service import SEEKER, JOB, BM25_K1, BM25_B, MAX_QUERY_TERMS
+
+FEED_SIZE = 20
+KEEP = 40
+# Seekers handled per statement when a post fans out.
+CHUNK = 500
+
+
+class _Corpus:
+    """BM25 statistics of the job posts, read once and memoized per term."""
+
+    def __init__(self):
+        n_docs, avg_len = (db.session.query(func.count(MatchDocument.id), func.avg(MatchDocument.length))
+                           .filter(MatchDocument.doc_kind == JOB).one())
+        self.n_docs = n_docs or 0
+        self.avg_len = float(avg_len or 0.0)
+        self._idf = {}
+
+    def idf(self, terms) -> dict:
+        missing = [t for t in terms if t not in self._idf]
+        if missing:
+            df = dict(db.session.query(MatchTerm.term, func.count(MatchTerm.id))
+                      .filter(MatchTerm.doc_kind == JOB, MatchTerm.term.in_(missing))
+                      .group_by(MatchTerm.term))
+            for t in missing:
+                n = df.get(t, 0)
+                self._idf[t] = math.log(1.0 + (self.n_docs - n + 0.5) / (n + 0.5))
+        return {t: self._idf[t] for t in terms}
+
+    def weight(self, idf, tf, length):
+        """BM25 term weight; works on numbers and on SQL column expressions alike."""
+        norm = 1.0 - BM25_B + BM25_B * length / self.avg_len if self.avg_len else 1.0
+        return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+def _open_posts():
+    return db.or_(JobPost.is_open.is_(None), JobPost.is_open != 0)
+
+
+def recompute_seeker(seeker_id, corpus=None) -> int:
+    """Rebuild one seeker's list from scratch; returns its length.
+
+    The scores are summed and cut to the top ``KEEP`` in SQL, so only the
+    list itself comes back however many posts share a term with the seeker.
+    """
+    rows = (db.session.query(MatchTerm.term, MatchTerm.tf)
+            .filter(MatchTerm.doc_kind == SEEKER, MatchTerm.doc_id == seeker_id).all())
+    terms = [t for t, _ in heapq.nlargest(MAX_QUERY_TERMS, rows, key=lambda r: r[1])]
+    RecommendedJob.query.filter_by(seeker_id=seeker_id).delete(synchronize_session=False)
+    if not terms:
+        return 0
+    corpus = corpus or _Corpus()
+    idf = db.case(corpus.idf(terms), value=MatchTerm.term, else_=0.0)
+    score = func.sum(corpus.weight(idf, MatchTerm.tf, MatchDocument.length)).label("score")
+    top = (db.session.query(MatchTerm.doc_id, score)
+           .join(MatchDocument, (MatchDocument.doc_kind == JOB) & (MatchDocument.doc_id == MatchTerm.doc_id))
+           .join(JobPost, JobPost.id == MatchTerm.doc_id)
+           .filter(MatchTerm.doc_kind == JOB, MatchTerm.term.in_(terms), _open_posts())
+           .group_by(MatchTerm.doc_id)
+           .order_by(score.desc(), MatchTerm.doc_id)
+           .limit(KEEP).all())
+    if top:
+        db.session.execute(RecommendedJob.__table__.insert(), [
+            {"seeker_id": seeker_id, "job_post_id": pid, "score": round(s, 4)} for pid, s in top
+        ])
+    return len(top)
+
+def _trim(seeker_ids):
+    """Cut the lists of ``seeker_ids`` back to ``KEEP`` entries."""
+    rank = (func.row_number()
+            .over(partition_by=RecommendedJob.seeker_id,
+                  order_by=(RecommendedJob.score.desc(), RecommendedJob.job_post_id))
+            .label("rank"))
+    ranked = (db.session.query(RecommendedJob.seeker_id, RecommendedJob.job_post_id, rank)
+              .filter(RecommendedJob.seeker_id.in_(seeker_ids)).subquery())
+    extra = [(s, p) for s, p in db.session.query(ranked.c.seeker_id, ranked.c.job_post_id)
+             .filter(ranked.c.rank > KEEP)]
+    for seeker_id, post_id in extra:
+        RecommendedJob.query.filter_by(seeker_id=seeker_id, job_post_id=post_id).delete(synchronize_session=False)
+
+def add_post(job_post_id) -> int:
+    """Score one open post for every seeker sharing a term with it; returns the lists it entered."""
+    rows = (db.session.query(MatchTerm.term, MatchTerm.tf)
+            .filter(MatchTerm.doc_kind == JOB, MatchTerm.doc_id == job_post_id).all())
+    length = (db.session.query(MatchDocument.length)
+              .filter_by(doc_kind=JOB, doc_id=job_post_id).scalar()) or 0
+    if not rows:
+        return 0
+    corpus = _Corpus()
+    idf = corpus.idf([t for t, _ in rows])
+    weight = db.case({t: corpus.weight(idf[t], tf, length) for t, tf in rows}, value=MatchTerm.term, else_=0.0)
+    scores = dict(db.session.query(MatchTerm.doc_id, func.sum(weight))
+                  .filter(MatchTerm.doc_kind == SEEKER, MatchTerm.term.in_([t for t, _ in rows]))
+                  .group_by(MatchTerm.doc_id))
+    # Seekers rescored in full just now may already list it.
+    for (seeker_id,) in db.session.query(RecommendedJob.seeker_id).filter_by(job_post_id=job_post_id):
+        scores.pop(seeker_id, None)
+    entered = 0
+    seekers = list(scores)
+    for i in range(0, len(seekers), CHUNK):
+        chunk = seekers[i:i + CHUNK]
+        # The score a post must beat to enter each list; None while the list has room.
+        floor = dict(db.session.query(RecommendedJob.seeker_id,
+                                      db.case((func.count() < KEEP, None), else_=func.min(RecommendedJob.score)))
+                     .filter(RecommendedJob.seeker_id.in_(chunk))
+                     .group_by(RecommendedJob.seeker_id))
+        new = [{"seeker_id": s, "job_post_id": job_post_id, "score": round(scores[s], 4)}
+               for s in chunk if floor.get(s) is None or scores[s] > floor[s]]
+        if new:
+            db.session.execute(RecommendedJob.__table__.insert(), new)
+            _trim([row["seeker_id"] for row in new])
+            entered += len(new)
+    return entered
+
+def remove_post(job_post_id) -> int:
+    """Take a post out of every list; seekers left short are rescored. Returns how many were."""
+    holders = [s for (s,) in db.session.query(RecommendedJob.seeker_id).filter_by(job_post_id=job_post_id)]
+    if not holders:
+        return 0
+    RecommendedJob.query.filter_by(job_post_id=job_post_id).delete(synchronize_session=False)
+    short = []
+    for i in range(0, len(holders), CHUNK):
+        short += [s for s, n in db.session.query(SeekerData.id, func.count(RecommendedJob.job_post_id))
+                  .outerjoin(RecommendedJob, RecommendedJob.seeker_id == SeekerData.id)
+                  .filter(SeekerData.id.in_(holders[i:i + CHUNK]))
+                  .group_by(SeekerData.id) if n < FEED_SIZE]
+    for seeker_id in short:
+        recompute_seeker(seeker_id)
+    return len(short)
+
+def refresh_post(job_post_id):
+    """Bring every list up to date with one post after it was created, edited, opened or closed."""
+    remove_post(job_post_id)
+    job = db.session.get(JobPost, job_post_id)
+    if job is not None and (job.is_open is None or job.is_open):
+        add_post(job_post_id)
+
+
+@task_queue.task("recommend.seeker", priority=-1)
+def _seeker_task(seeker_id):
+    write_transaction(lambda: recompute_seeker(seeker_id))
+
+@task_queue.task("recommend.post", priority=-2, timeout=600)
+def _post_task(job_post_id):
+    write_transaction(lambda: refresh_post(job_post_id))
+
+def seeker_changed(seeker_id):
+    """Schedule a rescore of one seeker after their profile text changed; the caller commits."""
+    if task_queue.enabled():
+        task_queue.enqueue("recommend.seeker", {"seeker_id": seeker_id})
+    else:
+        recompute_seeker(seeker_id)
+
+def post_changed(job_post_id):
+    """Schedule list upkeep for one post after a create, edit or toggle; the caller commits."""
+    if task_queue.enabled():
+        task_queue.enqueue("recommend.post", {"job_post_id": job_post_id})
+    else:
+        refresh_post(job_post_id)
+
+
+def _feed_query(email):
+    return (db.session.query(JobPost, RecommendedJob.score)
+            .join(RecommendedJob, RecommendedJob.job_post_id == JobPost.id)
+            .join(SeekerData, SeekerData.id == RecommendedJob.seeker_id)
+            .filter(SeekerData.email == email)
+            .order_by(RecommendedJob.score.desc(), RecommendedJob.job_post_id))
+
+def feed(email, limit=FEED_SIZE):
+    """The seeker's list, best first: ``[(JobPost, score)]``. Index lookups only."""
+    return _feed_query(email).limit(limit).all()
+
+def rebuild_all(batch_size=500, progress=None) -> int:
+    """Recompute every seeker's list in batches, committing each; returns the seekers done."""
+    done = last_id = 0
+    corpus = _Corpus()
+    while True:
+        ids = [i for (i,) in db.session.query(SeekerData.id).filter(SeekerData.id > last_id)
+               .order_by(SeekerData.id).limit(batch_size)]
+        if not ids:
+            return done
+        for seeker_id in ids:
+            recompute_seeker(seeker_id, corpus)
+        db.session.commit()
+        done += len(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(done)
@@ -0,0 +1,161 @@
+import io
+import os
+import re
+import logging
+import threading
+import unicodedata
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from pypdf import PdfReader
+from ..database import db
+from ..models import ResumeText, SeekerData
+from ..utils.file_utils import get_storage
+from . import search_service, task_queue
+
+logger = logging.getLogger(__name__)
+
+# Enough for any real resume; stops a 500-page PDF from bloating the index.
+MAX_CHARS = 100_000
+
+_pool = None
+_pool_lock = threading.Lock()
+_HYPHEN_BREAK = re.compile(r"(\w)-\s*\n\s*(\w)")
+_CONTROL = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+
+def normalize_text(raw: str) -> str:
+    """NFKC, re-joined hyphenated line breaks, no control characters, single spaces."""
+    text = unicodedata.normalize("NFKC", raw or "")
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+    text = _CONTROL.sub(" ", text)
+    return " ".join(text.split())[:MAX_CHARS]
+
+def extract_text(source) -> str:
+    """Normalized text of a PDF given as a path or bytes. Runs in a worker process."""
+    reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    parts = []
+    size = 0
+    for page in reader.pages:
+        part = page.extract_text() or ""
+        parts.append(part)
+        size += len(part)
+        if size >= MAX_CHARS:
+            break
+    return normalize_text("\n".join(parts))
+
+def _extract(key, source):
+    """``(key, status, text, error)`` for one resume; never raises across the pool."""
+    if not key.lower().endswith(".pdf"):
+        return key, ResumeText.SKIPPED, None, None
+    try:
+        return key, ResumeText.DONE, extract_text(source), None
+    except Exception as e:
+        return key, ResumeText.FAILED, None, f"{type(e).__name__}: {e}"[:300]
+
+def _source(key, storage):
+    # Workers read local files themselves; other backends hand over the bytes.
+    path = storage.local_path(key)
+    if path:
+        return path
+    with storage.open(key) as fh:
+        return fh.read()
+
+def _save(key, status, text, error):
+    row = db.session.get(ResumeText, key) or ResumeText(key=key)
+    row.status, row.text, row.error = status, text, error
+    row.extracted_at = datetime.utcnow()
+    db.session.add(row)
+    db.session.flush()
+    search_service.reindex_resume(key)
+
+def mark_pending(key) -> bool:
+    """Record that ``key`` needs text; the caller commits.
+
+    With the task queue enabled the extraction is enqueued in the same
+    transaction and this returns False. Otherwise it returns whether the caller
+    should run ``extract_in_background`` after committing; False too when the
+    text already exists, e.g. the same file uploaded by another seeker.
+    """
+    if not key:
+        return False
+    row = db.session.get(ResumeText, key)
+    if row is None:
+        db.session.add(ResumeText(key=key, status=ResumeText.PENDING))
+    elif row.status not in (ResumeText.PENDING, ResumeText.FAILED):
+        return False
+    if task_queue.enabled():
+        task_queue.enqueue("resume.extract", {"key": key})
+        return False
+    return True
+
+@task_queue.task("resume.extract", priority=-1, timeout=120)
+def extract_task(key):
+    """Queue handler: parse one resume inside the worker process."""
+    _save(*_extract(key, _source(key, get_storage())))
+    db.session.commit()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=current_app.config["RESUME_EXTRACT_WORKERS"])
+        return _pool
+
+def extract_in_background(key):
+    """Parse ``key`` in the extraction pool and store the result when it is done.
+
+    Call after the upload is committed. The request does not wait; if the pool
+    is gone the row stays pending and ``flask jobmatch extract-resumes`` picks it up.
+    """
+    if not key:
+        return
+    app = current_app._get_current_object()
+    try:
+        fut = _get_pool().submit(_extract, key, _source(key, get_storage()))
+    except Exception:
+        logger.exception("Could not queue resume extraction for %s", key)
+        return
+
+    def done(f):
+        if f.exception():
+            logger.error("Resume extraction crashed for %s: %s", key, f.exception())
+            return
+        with app.app_context():
+            try:
+                _save(*f.result())
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Saving resume text failed for %s", key)
+
+    fut.add_done_callback(done)
+
+def backfill(workers=None, redo=False, batch_size=50, progress=None):
+    """Extract every seeker resume that has no text yet, in parallel across cores.
+
+    With ``redo`` all resumes are parsed again. Results are committed in
+    batches of ``batch_size``. Returns a count per status.
+    """
+    storage = get_storage()
+    keys = {k for (k,) in db.session.query(SeekerData.resume_path).filter(SeekerData.resume_path.isnot(None))}
+    if not redo:
+        done = {k for (k,) in db.session.query(ResumeText.key).filter(
+            ResumeText.status.in_((ResumeText.DONE, ResumeText.SKIPPED)))}
+        keys -= done
+    counts = {}
+    missing = [k for k in keys if not storage.exists(k)]
+    for k in missing:
+        logger.warning("Resume %s is referenced but not in storage", k)
+    keys = sorted(keys - set(missing))
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        sources = (_source(k, storage) for k in keys)
+        for n, result in enumerate(pool.map(_extract, keys, sources, chunksize=4), 1):
+            _save(*result)
+            counts[result[1]] = counts.get(result[1], 0) + 1
+            if n % batch_size == 0:
+                db.session.commit()
+                if progress:
+                    progress(n, len(keys))
+    db.session.commit()
+    counts["missing"] = len(missing)
+    return counts
@@ -0,0 +1,179 @@
+import re
+import logging
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError
+from ..database import db
+from ..models import JobPost, SeekerData, ResumeText
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "job_posts_fts"
+FTS_COLUMNS = ("job_title", "company_name", "location", "job_description", "key_responsibilities")
+# bm25() column weights, in FTS_COLUMNS order: titles and companies outrank body text.
+FTS_WEIGHTS = (10.0, 4.0, 4.0, 1.0, 1.0)
+
+TALENT_TABLE = "talent_fts"
+TALENT_COLUMNS = ("full_name", "skills", "experience", "education", "resume_text")
+TALENT_WEIGHTS = (4.0, 6.0, 2.0, 2.0, 1.0)
+
+_enabled = False
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def is_enabled() -> bool:
+    return _enabled
+
+def check_index() -> bool:
+    """Turn indexed search on if the FTS5 mirrors of ``job_posts`` and the talent pool exist.
+
+    The tables are created and filled by a migration. Returns whether indexed
+    search is active for this process; on other backends, SQLite builds
+    without FTS5 or a database that is not migrated yet ``job_listings`` keeps
+    its LIKE search and talent search is unavailable.
+    """
+    global _enabled
+    _enabled = False
+    if db.engine.dialect.name != "sqlite":
+        return False
+    try:
+        with db.engine.connect() as conn:
+            found = {name for (name,) in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type='table' AND name IN (:jobs, :talent)"),
+                {"jobs": FTS_TABLE, "talent": TALENT_TABLE},
+            )}
+    except OperationalError:
+        found = set()
+    _enabled = found == {FTS_TABLE, TALENT_TABLE}
+    if not _enabled:
+        logger.warning("FTS5 search tables missing (run `flask db upgrade`); job search falls back to LIKE scans")
+    return _enabled
+
+def _rebuild(conn) -> int:
+    cols = ", ".join(FTS_COLUMNS)
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, {cols}) SELECT id, {cols} FROM {JobPost.__tablename__}"))
+    return conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar() or 0
+
+def _rebuild_talent(conn) -> int:
+    conn.execute(text(f"DELETE FROM {TALENT_TABLE}"))
+    conn.execute(text(
+        f"INSERT INTO {TALENT_TABLE}(rowid, {', '.join(TALENT_COLUMNS)}) "
+        f"SELECT s.id, s.full_name, s.skills, s.experience, s.education, r.text "
+        f"FROM {SeekerData.__tablename__} s LEFT JOIN {ResumeText.__tablename__} r "
+        f"ON r.key = s.resume_path AND r.status = :done"
+    ), {"done": ResumeText.DONE})
+    return conn.execute(text(f"SELECT count(*) FROM {TALENT_TABLE}")).scalar() or 0
+
+def rebuild_index():
+    """Repopulate both FTS tables; returns ``(job_posts, seekers)`` row counts."""
+    if not check_index():
+        raise RuntimeError("FTS5 search index is not available on this database")
+    with db.engine.begin() as conn:
+        return _rebuild(conn), _rebuild_talent(conn)
+
+def match_expression(q: str) -> str:
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    return " ".join(f'"{tok}"*' for tok in _TOKEN_RE.findall(q or ""))
+
+def apply_search(query, q: str):
+    """Restrict a ``JobPost`` query to ``q`` matches ordered by BM25 rank."""
+    expr = match_expression(q)
+    if not expr:
+        return query
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    fts = (
+        text(f"SELECT rowid AS id, bm25({FTS_TABLE}, {weights}) AS rank "
+             f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+        .bindparams(match=expr)
+        .columns(id=db.Integer, rank=db.Float)
+        .subquery("fts")
+    )
+    return query.join(fts, fts.c.id == JobPost.id).order_by(fts.c.rank, JobPost.id)
+
+def _write_row(connection, target):
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)}) "
+             f"VALUES (:id, {', '.join(':' + c for c in FTS_COLUMNS)})"),
+        {"id": target.id, **{c: getattr(target, c) for c in FTS_COLUMNS}},
+    )
+
+@event.listens_for(JobPost, "after_insert")
+def _job_post_inserted(mapper, connection, target):
+    if _enabled:
+        _write_row(connection, target)
+
+@event.listens_for(JobPost, "after_update")
+def _job_post_updated(mapper, connection, target):
+    if not _enabled:
+        return
+    state = inspect(target)
+    if any(state.attrs[c].history.has_changes() for c in FTS_COLUMNS):
+        _write_row(connection, target)
+
+@event.listens_for(JobPost, "after_delete")
+def _job_post_deleted(mapper, connection, target):
+    if _enabled:
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
+
+def search_talent(q: str, limit: int = 20, offset: int = 0):
+    """Seeker profiles matching ``q`` across profile fields and resume text.
+
+    Returns ``[(SeekerData, rank, snippet)]`` best first; ``snippet`` is an
+    excerpt of the resume around the matched terms.
+    """
+    expr = match_expression(q)
+    if not (expr and _enabled):
+        return []
+    weights = ", ".join(str(w) for w in TALENT_WEIGHTS)
+    resume_col = TALENT_COLUMNS.index("resume_text")
+    hits = db.session.execute(
+        text(f"SELECT rowid AS id, bm25({TALENT_TABLE}, {weights}) AS rank, "
+             f"snippet({TALENT_TABLE}, {resume_col}, '', '', '…', 16) AS snippet "
+             f"FROM {TALENT_TABLE} WHERE {TALENT_TABLE} MATCH :match "
+             f"ORDER BY rank, rowid LIMIT :limit OFFSET :offset"),
+        {"match": expr, "limit": limit, "offset": offset},
+    ).all()
+    profiles = {sd.id: sd for sd in SeekerData.query.filter(SeekerData.id.in_([h.id for h in hits]))}
+    return [(profiles[h.id], h.rank, h.snippet) for h in hits if h.id in profiles]
+
+def _write_seeker(connection, target):
+    resume = None
+    if target.resume_path:
+        resume = connection.execute(
+            text(f"SELECT text FROM {ResumeText.__tablename__} WHERE key = :k AND status = :done"),
+            {"k": target.resume_path, "done": ResumeText.DONE},
+        ).scalar()
+    connection.execute(text(f"DELETE FROM {TALENT_TABLE} WHERE rowid = :id"), {"id": target.id})
+    connection.execute(
+        text(f"INSERT INTO {TALENT_TABLE}(rowid, {', '.join(TALENT_COLUMNS)}) "
+             f"VALUES (:id, {', '.join(':' + c for c in TALENT_COLUMNS)})"),
+        {"id": target.id, "full_name": target.full_name, "skills": target.skills,
+         "experience": target.experience, "education": target.education, "resume_text": resume},
+    )
+
+def reindex_resume(key: str) -> int:
+    """Refresh the talent rows of every seeker whose resume is ``key``. The caller commits."""
+    if not _enabled or not key:
+        return 0
+    seekers = SeekerData.query.filter_by(resume_path=key).all()
+    for sd in seekers:
+        _write_seeker(db.session.connection(), sd)
+    return len(seekers)
+
+@event.listens_for(SeekerData, "after_insert")
+def _seeker_inserted(mapper, connection, target):
+    if _enabled:
+        _write_seeker(connection, target)
+
+@event.listens_for(SeekerData, "after_update")
+def _seeker_updated(mapper, connection, target):
+    if not _enabled:
+        return
+    state = inspect(target)
+    if any(state.attrs[c].history.has_changes() for c in TALENT_COLUMNS[:-1] + ("resume_path",)):
+        _write_seeker(connection, target)
+
+@event.listens_for(SeekerData, "after_delete")
+def _seeker_deleted(mapper, connection, target):
+    if _enabled:
+        connection.execute(text(f"DELETE FROM {TALENT_TABLE} WHERE rowid = :id"), {"id": target.id})
@@ -0,0 +1,239 @@
+"""Skill taxonomy: canonical skills, their aliases, and the tags built from them.
+
+``skills`` holds one row per canonical skill and ``skill_aliases`` every
+normalised spelling that means it ("js", "javascript", "ecmascript" ->
+javascript). Saving a seeker profile or a job post runs its text through the
+normaliser and replaces its rows in ``seeker_skills`` / ``job_post_skills``,
+so a skill filter is an indexed join on the skill id instead of a ``LIKE``
+over free text, and synonyms land on the same id.
+
+The alias map is cached in each worker under the host-wide ``skills`` version;
+``invalidate()`` after changing the taxonomy, then ``backfill()`` to retag.
+"""
+import re
+import threading
+from ..database import db
+from ..models import JobPost, JobPostSkill, SeekerData, SeekerSkill, Skill, SkillAlias
+from ..utils import versions
+
+VERSION = "skills"
+
+# Seed taxonomy: canonical name -> other spellings. ``normalize`` is applied to
+# both, so case, spacing and "/" or "-" separators do not matter here.
+TAXONOMY = {
+    "python": ("py", "python3"),
+    "java": ("java 8", "java 11", "java 17"),
+    "javascript": ("js", "ecmascript", "es6", "vanilla js"),
+    "typescript": ("ts",),
+    "go": ("golang",),
+    "rust": (),
+    "c": (),
+    "c++": ("cpp", "cplusplus"),
+    "c#": ("csharp", "c sharp"),
+    ".net": ("dotnet", "asp.net", ".net core"),
+    "kotlin": (),
+    "swift": (),
+    "scala": (),
+    "ruby": (),
+    "php": (),
+    "r": ("rlang",),
+    "sql": ("structured query language", "t-sql", "tsql"),
+    "postgresql": ("postgres", "psql", "pg"),
+    "mysql": (),
+    "sqlite": (),
+    "mongodb": ("mongo",),
+    "redis": (),
+    "elasticsearch": ("elastic search", "elastic"),
+    "flask": (),
+    "django": (),
+    "fastapi": ("fast api",),
+    "spring": ("spring boot", "springboot"),
+    "ruby on rails": ("rails", "ror"),
+    "node.js": ("node", "nodejs", "node js"),
+    "express": ("express.js", "expressjs"),
+    "react": ("reactjs", "react.js"),
+    "react native": (),
+    "angular": ("angularjs", "angular.js"),
+    "vue": ("vue.js", "vuejs"),
+    "html": ("html5",),
+    "css": ("css3",),
+    "tailwind": ("tailwindcss", "tailwind css"),
+    "aws": ("amazon web services",),
+    "azure": ("microsoft azure",),
+    "gcp": ("google cloud", "google cloud platform"),
+    "docker": (),
+    "kubernetes": ("k8s", "kube"),
+    "terraform": (),
+    "ansible": (),
+    "linux": ("unix",),
+    "git": ("github", "gitlab"),
+    "ci/cd": ("cicd", "continuous integration", "github actions"),
+    "networking": ("tcp/ip",),
+    "security": ("cybersecurity", "cyber security", "infosec"),
+    "spark": ("apache spark", "pyspark"),
+    "airflow": ("apache airflow",),
+    "kafka": ("apache kafka",),
+    "pandas": (),
+    "numpy": (),
+    "machine learning": ("ml",),
+    "deep learning": ("dl",),
+    "pytorch": ("torch",),
+    "tensorflow": ("tf",),
+    "data analysis": ("data analytics",),
+    "excel": ("ms excel", "microsoft excel", "spreadsheets"),
+    "power bi": ("powerbi",),
+    "tableau": (),
+    "testing": ("qa", "quality assurance", "unit testing"),
+    "selenium": (),
+    "android": (),
+    "ios": (),
+    "figma": (),
+    "ui/ux": ("ux", "ui", "ux design", "ui design"),
+    "seo": ("search engine optimization",),
+    "sales": (),
+    "marketing": ("digital marketing",),
+    "accounting": ("bookkeeping",),
+    "customer support": ("support", "customer service"),
+    "project management": ("pmp",),
+    "agile": ("scrum", "kanban"),
+    "communication": ("communication skills",),
+}
+# Aliases that are everyday words as often as skills: only trusted in a
+# seeker's own skills list, never picked out of job description prose.
+LIST_ONLY = frozenset({"go", "c", "r", "ts", "tf", "pg", "dl", "ui", "ux", "elastic", "support", "express"})
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#.]+")
+# Skills never span these, so n-grams are only built inside each piece.
+_PIECE_RE = re.compile(r"[,;:|!?()\[\]\n\r]+|\.(?:\s|$)")
+
+_lock = threading.Lock()
+_cache = {"version": None, "aliases": {}, "longest": 1}
+
+
+def _tokens(text) -> list:
+    """Lower-case tokens of ``text``, trailing dots dropped; never truncated."""
+    return [t.rstrip(".") for t in _TOKEN_RE.findall((text or "").lower()) if t.rstrip(".")]
+
+def normalize(text) -> str:
+    """The alias key of ``text``: lower-case tokens joined by single spaces, cut to the column size."""
+    return " ".join(_tokens(text))[:64]
+
+def _aliases():
+    """``{alias: (skill_id, name)}`` for this worker, reloaded when the version moves."""
+    version = versions.current(VERSION)
+    with _lock:
+        if _cache["version"] == version:
+            return _cache["aliases"], _cache["longest"]
+    rows = (db.session.query(SkillAlias.alias, Skill.id, Skill.name)
+            .join(Skill, Skill.id == SkillAlias.skill_id).all())
+    aliases = {alias: (skill_id, name) for alias, skill_id, name in rows}
+    longest = max((alias.count(" ") + 1 for alias in aliases), default=1)
+    with _lock:
+        _cache.update(version=version, aliases=aliases, longest=longest)
+    return aliases, longest
+
+def invalidate():
+    """Make every worker reload the alias map; call after the taxonomy change commits."""
+    versions.bump(VERSION)
+    with _lock:
+        _cache["version"] = None
+
+def parse(text, prose=True) -> dict:
+    """``{skill_id: name}`` of the skills mentioned in ``text``, longest alias first.
+
+    ``prose=False`` is for a list the user typed as skills, where the
+    ``LIST_ONLY`` aliases are trusted too.
+    """
+    aliases, longest = _aliases()
+    found = {}
+    for piece in _PIECE_RE.split((text or "").lower()):
+        tokens = _tokens(piece)
+        i = 0
+        while i < len(tokens):
+            for n in range(min(longest, len(tokens) - i), 0, -1):
+                key = " ".join(tokens[i:i + n])
+                hit = aliases.get(key)
+                if hit and (not prose or key not in LIST_ONLY):
+                    found[hit[0]] = hit[1]
+                    i += n
+                    break
+            else:
+                i += 1
+    return found
+
+def resolve(names) -> tuple:
+    """Canonical names for a comma separated filter value, sorted; unknown names are kept as typed."""
+    if isinstance(names, str):
+        names = names.split(",")
+    aliases, _ = _aliases()
+    out = set()
+    for name in names:
+        key = normalize(name)
+        if key:
+            out.add(aliases[key][1] if key in aliases else key)
+    return tuple(sorted(out))
+
+
+def _tag(model, owner_col, owner_id, skill_ids):
+    """Replace the skill rows of one seeker or post. The caller owns the commit."""
+    model.query.filter(getattr(model, owner_col) == owner_id).delete(synchronize_session=False)
+    if skill_ids:
+        db.session.execute(model.__table__.insert(), [
+            {owner_col: owner_id, "skill_id": skill_id} for skill_id in skill_ids
+        ])
+
+def tag_seeker(sd):
+    if sd.id is None:
+        db.session.flush()
+    skills = parse(sd.skills, prose=False)
+    skills.update(parse("\n".join(filter(None, [sd.education, sd.experience]))))
+    _tag(SeekerSkill, "seeker_id", sd.id, skills)
+    return skills
+
+def tag_job_post(job):
+    if job.id is None:
+        db.session.flush()
+    skills = parse("\n".join(filter(None, [job.job_title, job.job_description, job.key_responsibilities])))
+    _tag(JobPostSkill, "job_post_id", job.id, skills)
+    return skills
+
+def remove_job_post(job_id: int):
+    JobPostSkill.query.filter_by(job_post_id=job_id).delete(synchronize_session=False)
+
+
+def add(name, aliases=()) -> int:
+    """Add a skill and its aliases if missing; returns how many alias rows were new."""
+    name = " ".join(name.lower().split())
+    skill = Skill.query.filter_by(name=name).first()
+    if skill is None:
+        skill = Skill(name=name)
+        db.session.add(skill)
+        db.session.flush()
+    wanted = {normalize(name), *map(normalize, aliases)} - {""}
+    known = {a for (a,) in db.session.query(SkillAlias.alias).filter(SkillAlias.alias.in_(wanted))}
+    new = sorted(wanted - known)
+    for alias in new:
+        db.session.add(SkillAlias(alias=alias, skill_id=skill.id))
+    return len(new)
+
+def seed() -> int:
+    """Load ``TAXONOMY`` into the tables; returns the alias rows added."""
+    return sum(add(name, aliases) for name, aliases in TAXONOMY.items())
+
+def backfill(batch_size=500, progress=None) -> dict:
+    """Retag every seeker profile and job post in batches, committing each."""
+    done = {"seekers": 0, "posts": 0}
+    for model, label, fn in ((SeekerData, "seekers", tag_seeker), (JobPost, "posts", tag_job_post)):
+        last_id = 0
+        while True:
+            rows = model.query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                fn(row)
+            db.session.commit()
+            done[label] += len(rows)
+            last_id = rows[-1].id
+            if progress:
+                progress(label, done[label])
+    return done
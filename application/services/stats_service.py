@@ -0,0 +1,143 @@
+"""Application counters per post and daily rollups for the company dashboard.
+
+``post_counters`` holds the active/accepted/rejected totals of each post and
+``post_daily_stats`` the applications received and decided per post and UTC
+day. The apply and decide routes call ``record_applied`` / ``record_decided``
+inside the transaction that writes the application, so the numbers move with
+the rows they count, and reading a company's stats costs O(posts) instead of
+O(applications). ``reconcile()`` recomputes both from ``application``.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+from ..database import db
+from ..models import Application, JobPost, PostCounter, PostDailyStat
+
+STATUS_COLUMNS = {
+    Application.ACTIVE: "active",
+    Application.ACCEPTED: "accepted",
+    Application.REJECTED: "rejected",
+}
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+
+def _add(model, key, deltas):
+    """Add ``deltas`` to the row at ``key``, creating it; call under the write lock."""
+    values = {getattr(model, col): getattr(model, col) + n for col, n in deltas.items()}
+    if model.query.filter_by(**key).update(values, synchronize_session=False):
+        return
+    db.session.add(model(**key, **deltas))
+
+def record_applied(job_post_id, at=None, n=1):
+    """Count ``n`` new active applications to a post."""
+    day = (at or datetime.utcnow()).date()
+    _add(PostCounter, {"job_post_id": job_post_id}, {"active": n})
+    _add(PostDailyStat, {"job_post_id": job_post_id, "day": day}, {"received": n})
+
+def record_decided(job_post_id, status, at=None, n=1):
+    """Move ``n`` applications of a post from active to ``status``."""
+    col = STATUS_COLUMNS[status]
+    day = (at or datetime.utcnow()).date()
+    _add(PostCounter, {"job_post_id": job_post_id}, {"active": -n, col: n})
+    _add(PostDailyStat, {"job_post_id": job_post_id, "day": day}, {col: n})
+
+def remove_post(job_post_id):
+    """Drop a deleted post's counters and rollups."""
+    PostCounter.query.filter_by(job_post_id=job_post_id).delete(synchronize_session=False)
+    PostDailyStat.query.filter_by(job_post_id=job_post_id).delete(synchronize_session=False)
+
+
+def status_total(email, status) -> int:
+    """How many applications to ``email``'s posts have ``status``."""
+    col = getattr(PostCounter, STATUS_COLUMNS[status])
+    total = (db.session.query(db.func.sum(col))
+             .join(JobPost, JobPost.id == PostCounter.job_post_id)
+             .filter(JobPost.email == email).scalar())
+    return int(total or 0)
+
+def company_stats(email, days=DEFAULT_DAYS, job_post_id=None) -> dict:
+    """Per-post totals and a per-day series for the last ``days`` days."""
+    posts = (db.session.query(JobPost.id, JobPost.job_title, JobPost.is_open,
+                              PostCounter.active, PostCounter.accepted, PostCounter.rejected)
+             .outerjoin(PostCounter, PostCounter.job_post_id == JobPost.id)
+             .filter(JobPost.email == email))
+    if job_post_id is not None:
+        posts = posts.filter(JobPost.id == job_post_id)
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    daily = (db.session.query(PostDailyStat.day, db.func.sum(PostDailyStat.received),
+                              db.func.sum(PostDailyStat.accepted), db.func.sum(PostDailyStat.rejected))
+             .join(JobPost, JobPost.id == PostDailyStat.job_post_id)
+             .filter(JobPost.email == email, PostDailyStat.day >= since))
+    if job_post_id is not None:
+        daily = daily.filter(PostDailyStat.job_post_id == job_post_id)
+
+    out_posts, totals = [], Counter()
+    for pid, title, is_open, active, accepted, rejected in posts.order_by(JobPost.id):
+        row = {"active": active or 0, "accepted": accepted or 0, "rejected": rejected or 0}
+        totals.update(row)
+        out_posts.append({"job_post_id": pid, "job_title": title,
+                          "is_open": bool(1 if is_open is None else is_open),
+                          **row, "total": sum(row.values())})
+    return {
+        "posts": out_posts,
+        "totals": {"posts": len(out_posts), "active": totals["active"], "accepted": totals["accepted"],
+                   "rejected": totals["rejected"], "total": sum(totals.values())},
+        "since": since.isoformat(),
+        "daily": [{"day": day.isoformat(), "received": int(r or 0), "accepted": int(a or 0), "rejected": int(j or 0)}
+                  for day, r, a, j in daily.group_by(PostDailyStat.day).order_by(PostDailyStat.day)],
+    }
+
+
+def _expected():
+    """Counters and rollups as the ``application`` rows of existing posts say they should be."""
+    def grouped(*cols, where=None):
+        q = (db.session.query(Application.job_post_id, *cols, db.func.count(Application.id))
+             .join(JobPost, JobPost.id == Application.job_post_id))
+        if where is not None:
+            q = q.filter(where)
+        return q.group_by(Application.job_post_id, *cols)
+
+    counters, daily = {}, {}
+    for pid, status, n in grouped(Application.status):
+        counters.setdefault(pid, Counter())[STATUS_COLUMNS[status]] = n
+    applied_day = db.func.date(Application.applied_at)
+    for pid, day, n in grouped(applied_day):
+        daily.setdefault((pid, date.fromisoformat(day)), Counter())["received"] = n
+    decided_day = db.func.date(Application.decided_at)
+    decided = db.and_(Application.status != Application.ACTIVE, Application.decided_at.isnot(None))
+    for pid, day, status, n in grouped(decided_day, Application.status, where=decided):
+        daily.setdefault((pid, date.fromisoformat(day)), Counter())[STATUS_COLUMNS[status]] = n
+    return counters, daily
+
+def reconcile() -> dict:
+    """Recompute every counter and rollup row from ``application``; call under the write lock.
+
+    Returns how many rows of each table were wrong (missing, stale or extra).
+    """
+    counters, daily = _expected()
+    fixed = {"counters": 0, "daily": 0}
+    for model, expected, key_cols, value_cols, label in (
+        (PostCounter, counters, ("job_post_id",), ("active", "accepted", "rejected"), "counters"),
+        (PostDailyStat, daily, ("job_post_id", "day"), ("received", "accepted", "rejected"), "daily"),
+    ):
+        def ident(key):
+            return dict(zip(key_cols, key if isinstance(key, tuple) else (key,)))
+
+        stored = {}
+        for row in db.session.query(*(getattr(model, c) for c in key_cols + value_cols)):
+            key = row[0] if len(key_cols) == 1 else tuple(row[:len(key_cols)])
+            stored[key] = tuple(row[len(key_cols):])
+        for key, counts in expected.items():
+            want = tuple(counts[c] for c in value_cols)
+            have = stored.pop(key, None)
+            if have != want:
+                fixed[label] += 1
+                row = model(**ident(key), **dict(zip(value_cols, want)))
+                if have is None:
+                    db.session.add(row)  # known missing: merge would SELECT it first
+                else:
+                    db.session.merge(row)
+        for key in stored:
+            fixed[label] += 1
+            model.query.filter_by(**ident(key)).delete(synchronize_session=False)
+    return fixed
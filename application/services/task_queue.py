@@ -0,0 +1,238 @@
+"""Durable background tasks stored in the application database.
+
+Web handlers ``enqueue`` inside their own transaction, so a task exists exactly
+when the change that asked for it was committed. ``flask jobmatch worker``
+claims tasks highest priority first. A claim is a lease: a worker that dies
+mid-task leaves the row ``running`` until ``locked_until`` passes, and then
+another worker takes it over. Delivery is therefore at-least-once and
+handlers should be idempotent.
+"""
+import json
+import os
+import signal
+import socket
+import logging
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime, timedelta
+from flask import current_app
+from ..database import db
+from ..models import Task
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+STATS_WINDOW = 1000
+
+_registry = {}
+
+class _Handler:
+    def __init__(self, fn, priority, max_attempts, timeout):
+        self.fn = fn
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+
+def task(name, priority=0, max_attempts=3, timeout=None):
+    """Register a function as the handler for tasks called ``name``.
+
+    ``timeout`` is the lease in seconds (``TASK_VISIBILITY_TIMEOUT`` if unset);
+    keep it above the slowest expected run or the task will be retried while
+    still running.
+    """
+    def deco(fn):
+        _registry[name] = _Handler(fn, priority, max_attempts, timeout)
+        return fn
+    return deco
+
+def enabled() -> bool:
+    return bool(current_app.config.get("TASK_QUEUE_ENABLED"))
+
+def enqueue(name, payload=None, priority=None, delay=0):
+    """Add a task to the current transaction; it runs once the caller commits."""
+    handler = _registry.get(name)
+    if handler is None:
+        raise KeyError(f"Unknown task {name!r}")
+    now = datetime.utcnow()
+    row = Task(
+        name=name, payload=json.dumps(payload or {}),
+        priority=handler.priority if priority is None else priority,
+        max_attempts=handler.max_attempts,
+        enqueued_at=now, run_at=now + timedelta(seconds=delay),
+    )
+    db.session.add(row)
+    return row
+
+def _ready(now):
+    return db.or_(
+        db.and_(Task.status == Task.QUEUED, Task.run_at <= now),
+        db.and_(Task.status == Task.RUNNING, Task.locked_until < now),
+    )
+
+def claim(worker_id):
+    """Lease the next ready task to ``worker_id``, or return ``None``.
+
+    The claim is a conditional UPDATE, so when two workers pick the same row
+    only one of them wins and the other simply looks again.
+    """
+    for _ in range(5):
+        now = datetime.utcnow()
+        head = (db.session.query(Task.id, Task.name).filter(_ready(now))
+                .order_by(Task.priority.desc(), Task.run_at, Task.id).first())
+        if head is None:
+            return None
+        task_id, name = head
+        handler = _registry.get(name)
+        lease = (handler.timeout if handler and handler.timeout else
+                 current_app.config["TASK_VISIBILITY_TIMEOUT"])
+        won = (Task.query.filter(Task.id == task_id, _ready(now))
+               .update({Task.status: Task.RUNNING, Task.attempts: Task.attempts + 1,
+                        Task.locked_by: worker_id, Task.started_at: now,
+                        Task.locked_until: now + timedelta(seconds=lease)},
+                       synchronize_session=False))
+        db.session.commit()
+        if won:
+            return db.session.get(Task, task_id)
+    return None
+
+def _finish(row, status, error=None, retry_in=None):
+    row.status = status
+    row.last_error = error
+    row.locked_by = None
+    row.locked_until = None
+    if retry_in is None:
+        row.finished_at = datetime.utcnow()
+    else:
+        row.run_at = datetime.utcnow() + timedelta(seconds=retry_in)
+    db.session.commit()
+
+def run_one(worker_id) -> bool:
+    """Claim and run a single task. Returns whether there was one."""
+    row = claim(worker_id)
+    if row is None:
+        return False
+    handler = _registry.get(row.name)
+    if handler is None:
+        _finish(row, Task.FAILED, f"No handler registered for {row.name!r}")
+        return True
+    if row.attempts > row.max_attempts:
+        # Lease ran out on the last permitted attempt, e.g. the worker was killed.
+        _finish(row, Task.FAILED, row.last_error or "Visibility timeout exceeded")
+        return True
+    try:
+        handler.fn(**json.loads(row.payload or "{}"))
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+        row = db.session.get(Task, row.id)
+        if row.attempts < row.max_attempts:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (row.attempts - 1), RETRY_MAX_SECONDS)
+            logger.warning("Task %s #%s failed (attempt %s), retrying in %ss", row.name, row.id, row.attempts, delay)
+            _finish(row, Task.QUEUED, error, retry_in=delay)
+        else:
+            logger.error("Task %s #%s failed permanently", row.name, row.id)
+            _finish(row, Task.FAILED, error)
+        return True
+    _finish(db.session.get(Task, row.id), Task.DONE)
+    return True
+
+def work(stop=None, poll=None, worker_id=None):
+    """Run tasks until ``stop`` is set. Needs an app context."""
+    stop = stop or threading.Event()
+    poll = current_app.config["TASK_POLL_INTERVAL"] if poll is None else poll
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Task worker %s started", worker_id)
+    while not stop.is_set():
+        try:
+            ran = run_one(worker_id)
+        except Exception:
+            db.session.rollback()
+            logger.exception("Task worker %s hit an error", worker_id)
+            ran = False
+        if not ran:
+            stop.wait(poll)
+    logger.info("Task worker %s stopped", worker_id)
+
+def _stop_on_signals(stop):
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+def _worker_main(poll):
+    from .. import create_app
+    app = create_app()
+    stop = threading.Event()
+    _stop_on_signals(stop)
+    with app.app_context():
+        work(stop, poll)
+
+def run_workers(processes=1, poll=None):
+    """Run ``processes`` worker processes until SIGINT/SIGTERM.
+
+    Each process builds its own app and connection pool; a running task is
+    finished before its process exits.
+    """
+    if processes <= 1:
+        stop = threading.Event()
+        _stop_on_signals(stop)
+        work(stop, poll)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_worker_main, args=(poll,), name=f"jobmatch-worker-{i}") for i in range(processes)]
+    for p in procs:
+        p.start()
+    stop = threading.Event()
+    _stop_on_signals(stop)
+    while not stop.is_set() and any(p.is_alive() for p in procs):
+        stop.wait(1)
+    for p in procs:
+        if p.is_alive():
+            p.terminate()
+    for p in procs:
+        p.join()
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))], 3)
+
+def stats() -> dict:
+    """Queue depth per task and status, plus wait/run latency of recent tasks."""
+    now = datetime.utcnow()
+    depth = {}
+    for name, status, n in (db.session.query(Task.name, Task.status, db.func.count(Task.id))
+                            .group_by(Task.name, Task.status)):
+        depth.setdefault(name, {s: 0 for s in Task.STATUSES})[status] = n
+    ready = db.session.query(db.func.count(Task.id)).filter(_ready(now)).scalar() or 0
+    oldest = (db.session.query(db.func.min(Task.run_at))
+              .filter(Task.status == Task.QUEUED, Task.run_at <= now).scalar())
+    recent = (db.session.query(Task.name, Task.enqueued_at, Task.started_at, Task.finished_at)
+              .filter(Task.status == Task.DONE)
+              .order_by(Task.finished_at.desc()).limit(STATS_WINDOW).all())
+    latency = {}
+    for name, enqueued, started, finished in recent:
+        entry = latency.setdefault(name, {"wait": [], "run": []})
+        entry["wait"].append((started - enqueued).total_seconds())
+        entry["run"].append((finished - started).total_seconds())
+    for name, entry in latency.items():
+        wait, run = sorted(entry["wait"]), sorted(entry["run"])
+        latency[name] = {
+            "count": len(run),
+            "wait_p50": _percentile(wait, 0.5), "wait_p95": _percentile(wait, 0.95),
+            "run_p50": _percentile(run, 0.5), "run_p95": _percentile(run, 0.95),
+        }
+    return {
+        "ready": ready,
+        "oldest_ready_age": round((now - oldest).total_seconds(), 3) if oldest else 0,
+        "depth": depth,
+        "latency": latency,
+    }
+
+def purge(older_than_days=7) -> int:
+    """Delete finished tasks older than ``older_than_days``."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    n = (Task.query.filter(Task.status.in_((Task.DONE, Task.FAILED)), Task.finished_at < cutoff)
+         .delete(synchronize_session=False))
+    db.session.commit()
+    return n
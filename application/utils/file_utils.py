@@ -1,6 +1,17 @@
+import os
+import io
+import time
+import hashlib
 import secrets
+import tempfile
+from werkzeug.security import safe_join
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf"}
+CHUNK_SIZE = 64 * 1024
+TMP_DIR = ".tmp"
+# Temporary upload files are named ``jobmatch-*.upload``, so the sweep can spot stale ones.
+TMP_PREFIX = "jobmatch-"
+TMP_SUFFIX = ".upload"
 
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
@@ -10,3 +21,278 @@ def random_filename(original_name: str) -> str:
     """Generate a random filename while preserving file extension."""
     ext = original_name.rsplit(".", 1)[1].lower()
     return f"{secrets.token_hex(8)}.{ext}"
+
+def blob_key(digest: str, ext: str) -> str:
+    """Sharded storage key for a SHA-256 digest, e.g. ``ab/cd/abcd….pdf``."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+class LocalBackend:
+    """Blobs as files under ``root``; keys are relative paths."""
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, TMP_DIR)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def local_path(self, key):
+        return safe_join(self.root, key)
+
+    def exists(self, key) -> bool:
+        path = self.local_path(key)
+        return bool(path) and os.path.isfile(path)
+
+    def put_file(self, tmp_path, key):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+    def open(self, key):
+        return open(self.local_path(key), "rb")
+
+    def touch(self, key):
+        os.utime(self.local_path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self):
+        """Yield ``(key, mtime)`` for every stored file."""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == self.root and TMP_DIR in dirnames:
+                dirnames.remove(TMP_DIR)
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                yield os.path.relpath(path, self.root).replace(os.sep, "/"), os.path.getmtime(path)
+
+
+class MemoryBackend:
+    """In-process stand-in for tests and local experiments."""
+
+    def __init__(self):
+        self.blobs = {}
+        self.tmp_dir = tempfile.gettempdir()
+
+    def local_path(self, key):
+        return None
+
+    def exists(self, key) -> bool:
+        return key in self.blobs
+
+    def put_file(self, tmp_path, key):
+        with open(tmp_path, "rb") as fh:
+            self.blobs[key] = (fh.read(), time.time())
+        os.remove(tmp_path)
+
+    def open(self, key):
+        return io.BytesIO(self.blobs[key][0])
+
+    def touch(self, key):
+        self.blobs[key] = (self.blobs[key][0], time.time())
+
+    def delete(self, key):
+        self.blobs.pop(key, None)
+
+    def keys(self):
+        for key, (_, mtime) in list(self.blobs.items()):
+            yield key, mtime
+
+
+class S3Backend:
+    """S3-compatible object store (AWS, MinIO, R2…), for multi-node deployments."""
+
+    def __init__(self, bucket, prefix="", endpoint_url=None):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package") from e
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.tmp_dir = tempfile.gettempdir()
+
+    def local_path(self, key):
+        return None
+
+    def exists(self, key) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except ClientError:
+            return False
+
+    def put_file(self, tmp_path, key):
+        try:
+            self.client.upload_file(tmp_path, self.bucket, self.prefix + key)
+        finally:
+            os.remove(tmp_path)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"]
+
+    def touch(self, key):
+        # Objects are immutable; the sweep's row check is the guard here.
+        pass
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def keys(self):
+        pages = self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefix)
+        for page in pages:
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix):], obj["LastModified"].timestamp()
+
+
+def get_storage(app=None):
+    """The configured backend, built once per app."""
+    from flask import current_app
+    app = app or current_app
+    storage = app.extensions.get("jobmatch_storage")
+    if storage is None:
+        kind = app.config.get("STORAGE_BACKEND", "local")
+        if kind == "s3":
+            storage = S3Backend(app.config["S3_BUCKET"], app.config.get("S3_PREFIX", ""),
+                                app.config.get("S3_ENDPOINT_URL"))
+        elif kind == "memory":
+            storage = MemoryBackend()
+        else:
+            storage = LocalBackend(app.config["UPLOAD_FOLDER"])
+        app.extensions["jobmatch_storage"] = storage
+    return storage
+
+def save_blob(file_storage, storage=None):
+    """Save an uploaded file under its content hash; returns ``(key, size, spare)``.
+
+    The stream is hashed while it is copied to a temporary file, so the upload
+    is read once. Identical content is stored once; ``spare`` is then the
+    temporary copy, else ``None``. No reference is taken: pass all three to
+    ``acquire`` in the transaction that stores the key.
+    """
+    storage = storage or get_storage()
+    ext = file_storage.filename.rsplit(".", 1)[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=storage.tmp_dir, prefix=TMP_PREFIX, suffix=TMP_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: file_storage.stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        key = blob_key(digest.hexdigest(), ext)
+        if storage.exists(key):
+            # A fresh mtime keeps a blob that was just unreferenced out of a running sweep.
+            storage.touch(key)
+            spare = tmp_path
+        else:
+            storage.put_file(tmp_path, key)
+            spare = None
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return key, size, spare
+
+def store_upload(file_storage, storage=None):
+    """``save_blob`` plus a reference in the caller's transaction; returns the key."""
+    key, size, spare = save_blob(file_storage, storage)
+    acquire(key, size, spare, storage)
+    return key
+
+def acquire(key, size=0, spare=None, storage=None):
+    """Count one more model reference to ``key`` in the current transaction.
+
+    Writing the row takes the write lock the sweep deletes under, so a blob
+    missing at this point was swept after ``save_blob`` found it; it is put
+    back from ``spare``.
+    """
+    from sqlalchemy.exc import IntegrityError
+    from ..database import db
+    from ..models import StoredBlob
+    bump = {StoredBlob.refcount: StoredBlob.refcount + 1}
+    if not StoredBlob.query.filter_by(key=key).update(bump, synchronize_session=False):
+        try:
+            with db.session.begin_nested():
+                db.session.add(StoredBlob(key=key, size=size, refcount=1))
+        except IntegrityError:
+            StoredBlob.query.filter_by(key=key).update(bump, synchronize_session=False)
+    # A retried transaction may already have used the spare.
+    if spare is not None and os.path.exists(spare):
+        storage = storage or get_storage()
+        if storage.exists(key):
+            os.remove(spare)
+        else:
+            storage.put_file(spare, key)
+
+def release(key):
+    """Drop one reference; unreferenced blobs are removed by the storage sweep."""
+    if not key:
+        return
+    from ..models import StoredBlob
+    (StoredBlob.query.filter(StoredBlob.key == key, StoredBlob.refcount > 0)
+     .update({StoredBlob.refcount: StoredBlob.refcount - 1}, synchronize_session=False))
+
+def sweep(grace_seconds=3600, dry_run=False, storage=None):
+    """Delete blobs nothing references any more.
+
+    Removes blobs whose refcount reached zero and untracked files that no model
+    column names (files from before the blob store). Anything newer than
+    ``grace_seconds`` is kept so in-flight uploads are never collected.
+    """
+    from ..database import db
+    from ..models import StoredBlob, SeekerData, JobPost, Resource
+    from .sqlite import write_transaction
+    storage = storage or get_storage()
+    tracked = dict(db.session.query(StoredBlob.key, StoredBlob.refcount).all())
+    referenced = {v for (v,) in db.session.query(SeekerData.resume_path).filter(SeekerData.resume_path.isnot(None))}
+    referenced |= {v for (v,) in db.session.query(JobPost.logo_filename).filter(JobPost.logo_filename.isnot(None))}
+    # Older resource rows store "/static/uploads/<name>" rather than the key.
+    referenced |= {v.rsplit("uploads/", 1)[-1] for (v,) in
+                   db.session.query(Resource.image_path).filter(Resource.image_path.isnot(None))}
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for key, mtime in storage.keys():
+        if mtime > cutoff:
+            continue
+        refs = tracked.get(key)
+        if refs is None:
+            if key in referenced:
+                continue
+        elif refs > 0:
+            continue
+        if not dry_run and not write_transaction(lambda: _drop(key, refs is not None, storage)):
+            continue
+        removed.append(key)
+    if not dry_run:
+        _drop_stale_uploads(storage, cutoff)
+    return removed
+
+def _drop(key, tracked, storage) -> bool:
+    """Delete ``key``'s row and file if it is still unreferenced; run under the write lock.
+
+    The file goes before the commit, so an upload that takes the lock next
+    finds the row and the file gone together and writes both back.
+    """
+    from ..models import StoredBlob
+    row = StoredBlob.query.filter_by(key=key)
+    refs = row.with_entities(StoredBlob.refcount).scalar()
+    if (refs is None if tracked else refs is not None) or (refs or 0) > 0:
+        return False
+    if tracked:
+        row.delete(synchronize_session=False)
+    storage.delete(key)
+    return True
+
+def _drop_stale_uploads(storage, cutoff):
+    """Temporary upload files older than ``cutoff``: spares of requests that failed before ``acquire``."""
+    for entry in os.scandir(storage.tmp_dir):
+        if entry.name.startswith(TMP_PREFIX) and entry.name.endswith(TMP_SUFFIX) and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
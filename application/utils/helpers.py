@@ -1,9 +1,24 @@
+import unicodedata
+from urllib.parse import quote
 from markupsafe import Markup
 from flask import request
 
 def wants_json() -> bool:
     return "application/json" in (request.headers.get("Accept", "") or "").lower()
 
+def filename_options(filename) -> dict:
+    """``Content-Disposition`` parameters for ``filename`` as ``send_file`` builds them.
+
+    A non-ASCII name gets an ASCII ``filename`` fallback plus the exact name in
+    ``filename*``; pass the result to ``headers.set(name, disposition, **opts)``.
+    """
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        return {"filename": simple, "filename*": f"UTF-8''{quote(filename, safe='!#$&+^`|~')}"}
+    return {"filename": filename}
+
 class DummyField:
     def __init__(self, name, ftype="text", value=""):
         self.name = name; self.type = ftype; self.value = value
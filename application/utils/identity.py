@@ -0,0 +1,113 @@
+import os
+import time
+import threading
+from types import SimpleNamespace
+from cachetools import TTLCache
+from flask import session, has_request_context
+from flask_login import UserMixin
+from ..database import db
+from ..models import User, SeekerData, CompanyData
+from . import metrics
+
+IDENTITY_TTL = int(os.environ.get("IDENTITY_CACHE_TTL", 60))
+IDENTITY_MAXSIZE = int(os.environ.get("IDENTITY_CACHE_SIZE", 4096))
+# Session key holding the time of the user's last own change. Entries loaded
+# before it are ignored, so a redirect that lands on another worker still
+# sees the edit it just made.
+STAMP_KEY = "_identity_v"
+
+SEEKER_FIELDS = ("full_name", "phone", "education", "experience", "skills", "resume_path")
+COMPANY_FIELDS = ("contact_name", "company_name", "phone", "website")
+
+_users = TTLCache(maxsize=IDENTITY_MAXSIZE, ttl=IDENTITY_TTL)
+_profiles = TTLCache(maxsize=IDENTITY_MAXSIZE, ttl=IDENTITY_TTL)
+_lock = threading.Lock()
+
+
+class Identity(UserMixin):
+    """The signed-in user as requests see it.
+
+    Deliberately carries no password hash: anything that checks or changes a
+    password loads the ``User`` row instead, so a cached copy can never be
+    stale where it matters.
+    """
+
+    def __init__(self, id, name, email, role):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.role = role
+
+    def __repr__(self):
+        return f"<Identity {self.id} {self.email}>"
+
+
+def _stamp() -> float:
+    return session.get(STAMP_KEY, 0) if has_request_context() else 0
+
+def _get(cache, name, key):
+    stamp = _stamp()
+    with _lock:
+        entry = cache.get(key)
+    if entry is not None and entry[0] < stamp:
+        entry = None
+    metrics.count("jobmatch_cache_lookups_total", cache=name, result="miss" if entry is None else "hit")
+    return entry
+
+def _put(cache, key, value):
+    with _lock:
+        cache[key] = (time.time(), value)
+    return value
+
+def load_user(user_id):
+    """``user_loader`` callback: one ``users`` read per user per TTL and worker."""
+    try:
+        uid = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    entry = _get(_users, "identity_users", uid)
+    if entry is not None:
+        return entry[1]
+    row = (db.session.query(User.id, User.name, User.email, User.role)
+           .filter(User.id == uid).first())
+    if row is None:
+        return None
+    return _put(_users, uid, Identity(row.id, row.name, row.email, row.role))
+
+def _profile(model, fields, email):
+    key = (model.__tablename__, email)
+    entry = _get(_profiles, "identity_profiles", key)
+    if entry is not None:
+        return entry[1]
+    row = (db.session.query(*(getattr(model, f) for f in fields))
+           .filter(model.email == email).order_by(model.id).first())
+    return _put(_profiles, key, SimpleNamespace(**row._asdict()) if row else None)
+
+def seeker_profile(email):
+    """Read-only snapshot of the seeker's ``SeekerData`` fields, or ``None``."""
+    return _profile(SeekerData, SEEKER_FIELDS, email)
+
+def company_profile(email):
+    """Read-only snapshot of the company's ``CompanyData`` fields, or ``None``."""
+    return _profile(CompanyData, COMPANY_FIELDS, email)
+
+def invalidate(user_id=None, email=None):
+    """Forget cached data for a user after a name, password or profile change.
+
+    Also stamps the current session so other workers reload this user's data
+    on their next request instead of waiting out the TTL.
+    """
+    with _lock:
+        if user_id is not None:
+            _users.pop(int(user_id), None)
+        if email is not None:
+            _profiles.pop((SeekerData.__tablename__, email), None)
+            _profiles.pop((CompanyData.__tablename__, email), None)
+    if has_request_context():
+        session[STAMP_KEY] = time.time()
+
+@metrics.register_gauges
+def _cache_entries():
+    with _lock:
+        sizes = {"identity_users": len(_users), "identity_profiles": len(_profiles)}
+    return [("jobmatch_cache_entries", {"cache": cache}, n) for cache, n in sizes.items()]
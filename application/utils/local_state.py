@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from flask import current_app
+
+
+class LocalStore:
+    """A small SQLite file in ``LOCAL_STATE_FOLDER`` every worker on the host shares.
+
+    Each thread gets its own autocommit connection in WAL mode, reopened after
+    a fork so a child never uses its parent's. Subclasses set ``SCHEMA``, run
+    once when the store is made.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.SCHEMA:
+            self._conn().execute(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _immediate(self):
+        """This thread's connection inside ``BEGIN IMMEDIATE``, committed on success."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def store(name, filename, factory):
+    """The app's ``factory(path)`` for ``LOCAL_STATE_FOLDER/filename``, made on first use."""
+    app = current_app
+    found = app.extensions.get(name)
+    if found is None:
+        path = os.path.join(app.config["LOCAL_STATE_FOLDER"], filename)
+        found = app.extensions[name] = factory(path)
+    return found
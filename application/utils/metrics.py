@@ -0,0 +1,212 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from .local_state import LocalStore, store
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+# family -> (type, help)
+FAMILIES = {
+    "jobmatch_http_requests_total": ("counter", "Requests served, by endpoint, method and status."),
+    "jobmatch_http_request_duration_seconds": ("histogram", "Request latency by endpoint."),
+    "jobmatch_db_statements_total": ("counter", "SQL statements run while serving requests, by endpoint."),
+    "jobmatch_db_seconds_total": ("counter", "Seconds spent in SQL statements while serving requests, by endpoint."),
+    "jobmatch_db_statements_per_request": ("histogram", "SQL statements per request, by endpoint."),
+    "jobmatch_bcrypt_queue_wait_seconds": ("histogram", "Seconds spent waiting for a bcrypt slot, by operation."),
+    "jobmatch_bcrypt_operations_total": ("counter", "bcrypt hashes and checks run, by operation."),
+    "jobmatch_bcrypt_busy_rejections_total": ("counter", "bcrypt calls refused with a 503 after waiting HASH_MAX_WAIT."),
+    "jobmatch_cache_lookups_total": ("counter", "Lookups in the per-worker caches, by cache and hit or miss."),
+    "jobmatch_cache_entries": ("gauge", "Entries in each per-worker cache of the worker answering the scrape."),
+    "jobmatch_chatbot_upstream_failures_total": ("counter", "Chatbot replies that fell back instead of calling Gemini "
+                                                            "or getting an answer, by reason."),
+    "jobmatch_chatbot_breaker_open": ("gauge", "1 while the Gemini circuit breaker of the worker answering the "
+                                               "scrape is open or half open."),
+    "jobmatch_autocomplete_index_size": ("gauge", "Values, keys and memoized prefixes in the autocomplete "
+                                                  "indexes of the worker answering the scrape, by field."),
+}
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+class MetricsStore(LocalStore):
+    """Counter totals in a small SQLite file every worker on the host shares.
+
+    Workers add the increments they buffered since their last flush, so a
+    sample has one row however many workers have come and gone, and a
+    scrape of any worker sees the totals of all of them.
+    """
+
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS samples ("
+              "family TEXT NOT NULL, name TEXT NOT NULL, labels TEXT NOT NULL, "
+              "value REAL NOT NULL, PRIMARY KEY (name, labels))")
+
+    def add(self, deltas):
+        """Add ``{(family, name, labels): delta}`` to the stored totals."""
+        with self._immediate() as conn:
+            conn.executemany("INSERT INTO samples(family, name, labels, value) VALUES (?, ?, ?, ?) "
+                             "ON CONFLICT(name, labels) DO UPDATE SET value = value + excluded.value",
+                             [(*key, value) for key, value in deltas.items()])
+
+    def samples(self):
+        return self._conn().execute("SELECT family, name, labels, value FROM samples").fetchall()
+
+
+class _Buffer:
+    """This process's increments since its last flush."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.pid = os.getpid()
+        self.flushed_at = time.monotonic()
+
+    def add(self, family, name, labels, value):
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked after recording: those increments belong to the parent.
+                self.pending, self.pid = {}, os.getpid()
+            key = (family, name, labels)
+            self.pending[key] = self.pending.get(key, 0) + value
+
+    def take(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed_at = time.monotonic()
+        return pending
+
+    def put_back(self, pending):
+        with self.lock:
+            for key, value in pending.items():
+                self.pending[key] = self.pending.get(key, 0) + value
+
+
+_buffer = _Buffer()
+# Callables returning ``[(family, labels, value)]`` read at scrape time.
+_gauges = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+def _count(family, value=1, **labels):
+    _buffer.add(family, family, _labels(**labels), value)
+
+def _observe(family, value, buckets, **labels):
+    base = _labels(**labels)
+    for le in buckets:
+        # Zero increments too, so every series has the full bucket set.
+        _buffer.add(family, f"{family}_bucket", f'{base},le="{le}"', 1 if value <= le else 0)
+    _buffer.add(family, f"{family}_bucket", f'{base},le="+Inf"', 1)
+    _buffer.add(family, f"{family}_sum", base, value)
+    _buffer.add(family, f"{family}_count", base, 1)
+
+def count(family, value=1, **labels):
+    """Add ``value`` to a counter listed in ``FAMILIES``; a no-op with metrics off."""
+    if current_app.config["METRICS_ENABLED"]:
+        _count(family, value, **labels)
+
+def observe(family, value, buckets, **labels):
+    """Record ``value`` in a histogram listed in ``FAMILIES``; a no-op with metrics off."""
+    if current_app.config["METRICS_ENABLED"]:
+        _observe(family, value, buckets, **labels)
+
+def register_gauges(fn):
+    """Report ``fn()``'s ``(family, labels, value)`` samples on every scrape; usable as a decorator.
+
+    Gauges are this worker's own values, not summed over the host.
+    """
+    _gauges.append(fn)
+    return fn
+
+def _store():
+    return store("jobmatch_metrics", "metrics.db", MetricsStore)
+
+def flush():
+    """Add this worker's buffered samples to the shared store."""
+    pending = _buffer.take()
+    if not pending:
+        return
+    try:
+        _store().add(pending)
+    except sqlite3.Error:
+        _buffer.put_back(pending)
+        logger.warning("Could not flush request metrics; keeping them for the next flush", exc_info=True)
+
+
+def _before_request():
+    g._metrics = [time.perf_counter(), 0, 0.0]
+
+def _after_request(response):
+    state = g.pop("_metrics", None)
+    if state is None:
+        return response
+    started, statements, db_seconds = state
+    endpoint = request.url_rule.endpoint if request.url_rule else "unmatched"
+    _count("jobmatch_http_requests_total", endpoint=endpoint, method=request.method, status=response.status_code)
+    _observe("jobmatch_http_request_duration_seconds", time.perf_counter() - started, LATENCY_BUCKETS,
+             endpoint=endpoint)
+    _count("jobmatch_db_statements_total", statements, endpoint=endpoint)
+    _count("jobmatch_db_seconds_total", db_seconds, endpoint=endpoint)
+    _observe("jobmatch_db_statements_per_request", statements, QUERY_BUCKETS, endpoint=endpoint)
+    if current_app.debug:
+        response.headers[QUERY_COUNT_HEADER] = str(statements)
+    if time.monotonic() - _buffer.flushed_at >= current_app.config["METRICS_FLUSH_INTERVAL"]:
+        flush()
+    return response
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._jobmatch_started = time.perf_counter()
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    state = g.get("_metrics")
+    started = getattr(context, "_jobmatch_started", None)
+    if state is not None and started is not None:
+        state[1] += 1
+        state[2] += time.perf_counter() - started
+
+def init_app(app, engine):
+    """Time every request and count the SQL statements it runs on ``engine``."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+
+def _sort_key(row):
+    family, name, labels, _ = row
+    # Keep each histogram's series together, buckets in ascending order.
+    base, _, le = labels.partition(',le="') if name.endswith("_bucket") else (labels, "", "")
+    le = float("inf") if le.startswith("+Inf") else float(le.rstrip('"') or 0)
+    return family, base, name, le
+
+def render() -> str:
+    """Every worker's totals in the Prometheus text exposition format."""
+    flush()
+    lines = []
+    family = None
+    rows = _store().samples()
+    rows += [(family, family, _labels(**labels), value) for fn in _gauges for family, labels, value in fn()]
+    for row in sorted(rows, key=_sort_key):
+        if row[0] != family:
+            family = row[0]
+            kind, help_text = FAMILIES.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+        _, name, labels, value = row
+        value = int(value) if float(value).is_integer() else value
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,46 @@
+import base64
+from datetime import datetime
+from sqlalchemy.engine import Row
+from ..database import db
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+def encode_cursor(at: datetime, row_id: int) -> str:
+    raw = f"{at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Return ``(datetime, id)`` for a cursor, or ``None`` if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def parse_limit(value, default=DEFAULT_LIMIT) -> int:
+    try:
+        return max(1, min(int(value), MAX_LIMIT))
+    except (TypeError, ValueError):
+        return default
+
+def keyset_page(query, at_col, id_col, cursor=None, limit=DEFAULT_LIMIT):
+    """Newest-first page of ``query`` on ``(at_col, id_col)``.
+
+    Returns ``(rows, next_cursor)``. The cursor is read from the first entity of
+    the last row, so the query may also select extra columns after the model.
+    """
+    after = decode_cursor(cursor)
+    if after:
+        at, row_id = after
+        query = query.filter(db.or_(at_col < at, db.and_(at_col == at, id_col < row_id)))
+    rows = query.order_by(at_col.desc(), id_col.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0] if isinstance(rows[-1], Row) else rows[-1]
+        next_cursor = encode_cursor(getattr(last, at_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
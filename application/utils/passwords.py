@@ -0,0 +1,113 @@
+import os
+import time
+import threading
+from flask import current_app
+from ..database import bcrypt
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: the bound is per worker process only
+    fcntl = None
+
+
+class HashingBusy(Exception):
+    """No hashing slot freed up within ``HASH_MAX_WAIT``; the caller should answer 503."""
+
+    retry_after = 1
+
+
+class _SlotPool:
+    """At most ``slots`` holders across every process sharing ``directory``.
+
+    Each slot is a lock file taken with a non-blocking ``flock``; a thread lock
+    per slot keeps two threads of one process from sharing a file lock.
+    """
+
+    def __init__(self, directory, slots):
+        self.directory = directory
+        self.slots = slots
+        self._pid = None
+        self._fds = []
+        self._locks = [threading.Lock() for _ in range(slots)]
+        self._fallback = threading.BoundedSemaphore(slots) if fcntl is None else None
+
+    def _open(self):
+        # Descriptors must not be shared with a forked parent.
+        if self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            self._fds = [os.open(os.path.join(self.directory, f"slot-{i}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+                         for i in range(self.slots)]
+            self._pid = os.getpid()
+
+    def acquire(self, timeout):
+        if self._fallback is not None:
+            return self._fallback if self._fallback.acquire(timeout=timeout) else None
+        self._open()
+        deadline = time.monotonic() + timeout
+        delay = 0.002
+        while True:
+            for i, fd in enumerate(self._fds):
+                if not self._locks[i].acquire(blocking=False):
+                    continue
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return i
+                except BlockingIOError:
+                    self._locks[i].release()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def release(self, slot):
+        if self._fallback is not None:
+            self._fallback.release()
+            return
+        fcntl.flock(self._fds[slot], fcntl.LOCK_UN)
+        self._locks[slot].release()
+
+
+class _Hasher:
+    def __init__(self, app):
+        self.pool = _SlotPool(os.path.join(app.config["LOCAL_STATE_FOLDER"], "hash-slots"),
+                              app.config["HASH_CONCURRENCY"])
+        self.max_wait = app.config["HASH_MAX_WAIT"]
+        self.rounds = app.config["BCRYPT_LOG_ROUNDS"]
+
+    def run(self, kind, fn, *args):
+        t0 = time.perf_counter()
+        slot = self.pool.acquire(self.max_wait)
+        metrics.observe("jobmatch_bcrypt_queue_wait_seconds", time.perf_counter() - t0, metrics.WAIT_BUCKETS,
+                        operation=kind)
+        if slot is None:
+            metrics.count("jobmatch_bcrypt_busy_rejections_total", operation=kind)
+            raise HashingBusy()
+        try:
+            return fn(*args)
+        finally:
+            self.pool.release(slot)
+            metrics.count("jobmatch_bcrypt_operations_total", operation=kind)
+
+
+def _hasher():
+    app = current_app
+    h = app.extensions.get("jobmatch_hasher")
+    if h is None:
+        h = app.extensions["jobmatch_hasher"] = _Hasher(app)
+    return h
+
+def hash_password(password: str) -> str:
+    """bcrypt hash at the configured work factor. Raises ``HashingBusy``."""
+    return _hasher().run("hash", lambda: bcrypt.generate_password_hash(password).decode("utf-8"))
+
+def check_password(pw_hash: str, password: str) -> bool:
+    """Constant-time bcrypt check. Raises ``HashingBusy``."""
+    return _hasher().run("check", bcrypt.check_password_hash, pw_hash, password)
+
+def needs_rehash(pw_hash: str) -> bool:
+    """Whether ``pw_hash`` was made with a different work factor than configured."""
+    try:
+        return int(pw_hash.split("$")[2]) != _hasher().rounds
+    except (AttributeError, IndexError, ValueError):
+        return True
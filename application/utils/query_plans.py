@@ -0,0 +1,240 @@
+"""``EXPLAIN QUERY PLAN`` checks for the queries the routes run.
+
+Each check rebuilds one route's main query with sample arguments. ``check()``
+reports every plan step that walks a whole table instead of searching an
+index, and ``flask jobmatch check-query-plans`` exits non-zero if there is
+one. That catches a dropped index, or a query rewritten so it no longer uses
+one, before it reaches a large database. Keep the checks in step with the
+routes when a query changes.
+"""
+import re
+from datetime import datetime
+from ..database import db
+from ..models import (
+    User, SeekerData, CompanyData, JobPost, Application, Resource,
+    MatchDocument, MatchTerm, StoredBlob, Task, PostCounter, PostDailyStat, RecommendedJob,
+    JobPostSkill, SeekerSkill,
+)
+
+EMAIL = "someone@example.com"
+_SCAN_RE = re.compile(r"^SCAN (\w+)")
+
+_checks = []
+
+
+def plan(name, allow_scan=()):
+    """Register a function returning a ``Query`` or ``Select`` to explain.
+
+    ``allow_scan`` names tables a full pass is expected on, for example a
+    page read in primary-key order that ``LIMIT`` cuts short.
+    """
+    def decorator(fn):
+        _checks.append((name, fn, frozenset(allow_scan)))
+        return fn
+    return decorator
+
+
+@plan("login: user by email")
+def _user_by_email():
+    return User.query.filter_by(email=EMAIL)
+
+@plan("user_loader: identity by id")
+def _identity():
+    return db.session.query(User.id, User.name, User.email, User.role).filter(User.id == 1)
+
+@plan("seeker_data/profile: seeker profile by email")
+def _seeker_profile():
+    return SeekerData.query.filter_by(email=EMAIL).order_by(SeekerData.id)
+
+@plan("profile: company profile by email")
+def _company_profile():
+    return CompanyData.query.filter_by(email=EMAIL)
+
+def _listing_page(**filters):
+    from ..services.listing_service import Filters, _query
+    return _query(Filters(**filters)).offset(0).limit(31)
+
+@plan("job_listings: first page", allow_scan=("job_posts",))
+def _listings():
+    return _listing_page()
+
+@plan("job_listings: employment type filter")
+def _listings_type():
+    return _listing_page(employment_type="Full-time")
+
+# Open-ended ranges match most posts: walking ids until the page is full
+# beats sorting every index hit, so SQLite scans here unless ANALYZE says the
+# range is narrow.
+@plan("job_listings: salary filter", allow_scan=("job_posts",))
+def _listings_salary():
+    return _listing_page(salary_from=50000, salary_to=90000)
+
+@plan("job_listings: search")
+def _listings_search():
+    from ..services import search_service
+    if not search_service.is_enabled():
+        return None
+    return _listing_page(q="python developer")
+
+@plan("job_listings: skill filter")
+def _listings_skills():
+    return _listing_page(skills=("javascript", "python"))
+
+# Facets count every post the filters leave; the covering index keeps
+# that pass off the table rows.
+@plan("job_listings: facet counts", allow_scan=("job_posts",))
+def _listing_facets():
+    from ..services.listing_service import Filters, _facet_query
+    return _facet_query(Filters(salary_from=50000))
+
+@plan("job_listings: applied job ids")
+def _applied_ids():
+    return (db.session.query(Application.job_post_id)
+            .filter(Application.seeker_email == EMAIL, Application.job_post_id.isnot(None)))
+
+@plan("apply_for_job: existing application")
+def _existing_application():
+    return Application.query.filter_by(seeker_email=EMAIL, job_post_id=1)
+
+@plan("seeker_status: own applications")
+def _seeker_status():
+    return (db.session.query(Application, JobPost)
+            .outerjoin(JobPost, JobPost.id == Application.job_post_id)
+            .filter(Application.seeker_email == EMAIL))
+
+@plan("company dashboard: own posts")
+def _company_posts():
+    return JobPost.query.filter_by(email=EMAIL)
+
+@plan("applications feed: first page")
+def _applications_feed():
+    return (db.session.query(Application, JobPost.company_name)
+            .join(JobPost, JobPost.id == Application.job_post_id)
+            .filter(JobPost.email == EMAIL, Application.status == Application.ACTIVE)
+            .order_by(Application.applied_at.desc(), Application.id.desc()).limit(21))
+
+@plan("applications feed: next page")
+def _applications_feed_cursor():
+    return (db.session.query(Application, JobPost.company_name)
+            .join(JobPost, JobPost.id == Application.job_post_id)
+            .filter(JobPost.email == EMAIL, Application.status == Application.ACTIVE)
+            .filter(db.or_(Application.applied_at < datetime(2024, 1, 1),
+                           db.and_(Application.applied_at == datetime(2024, 1, 1), Application.id < 100)))
+            .order_by(Application.applied_at.desc(), Application.id.desc()).limit(21))
+
+@plan("applications feed: applicant profiles")
+def _applicant_profiles():
+    return SeekerData.query.filter(SeekerData.email.in_([EMAIL, "other@example.com"]))
+
+@plan("company_stats: post counters")
+def _post_counters():
+    return (db.session.query(JobPost.id, PostCounter.active)
+            .outerjoin(PostCounter, PostCounter.job_post_id == JobPost.id)
+            .filter(JobPost.email == EMAIL))
+
+@plan("company_stats: daily rollups")
+def _daily_stats():
+    return (db.session.query(PostDailyStat.day, db.func.sum(PostDailyStat.received))
+            .join(JobPost, JobPost.id == PostDailyStat.job_post_id)
+            .filter(JobPost.email == EMAIL, PostDailyStat.day >= datetime(2024, 1, 1).date())
+            .group_by(PostDailyStat.day))
+
+@plan("apply/decide: counter row")
+def _counter_row():
+    return PostCounter.query.filter_by(job_post_id=1)
+
+@plan("recommended_jobs: seeker feed")
+def _recommended():
+    from ..services.recommend_service import _feed_query
+    return _feed_query(EMAIL).limit(20)
+
+@plan("recommendations: seekers sharing a post's terms")
+def _seeker_postings():
+    return (db.session.query(MatchTerm.doc_id, MatchTerm.term)
+            .filter(MatchTerm.doc_kind == "seeker", MatchTerm.term.in_(["python", "flask"])))
+
+@plan("recommendations: lists holding a post")
+def _post_holders():
+    return db.session.query(RecommendedJob.seeker_id).filter_by(job_post_id=1)
+
+@plan("skills: tags of a post")
+def _post_skills():
+    return JobPostSkill.query.filter_by(job_post_id=1)
+
+@plan("skills: tags of a seeker")
+def _seeker_skills():
+    return SeekerSkill.query.filter_by(seeker_id=1)
+
+@plan("rank_applicants: active applicants of a post")
+def _post_applicants():
+    return (Application.query
+            .filter(Application.job_post_id == 1, Application.status == Application.ACTIVE)
+            .order_by(Application.applied_at.asc()))
+
+@plan("rank_applicants: term document frequencies")
+def _term_df():
+    return (db.session.query(MatchTerm.term, db.func.count(MatchTerm.id))
+            .filter(MatchTerm.doc_kind == "seeker", MatchTerm.term.in_(["python", "flask"]))
+            .group_by(MatchTerm.term))
+
+@plan("rank_applicants: corpus size")
+def _corpus():
+    return (db.session.query(db.func.count(MatchDocument.id), db.func.avg(MatchDocument.length))
+            .filter(MatchDocument.doc_kind == "seeker"))
+
+# The page shows every resource, read once and cached per role until one changes.
+@plan("resources: all, newest first", allow_scan=("resources",))
+def _resources():
+    return Resource.query.order_by(Resource.created_at.desc(), Resource.id.desc())
+
+@plan("view_resume: resume of a seeker")
+def _resume_path():
+    return db.session.query(SeekerData.resume_path).filter_by(email=EMAIL).order_by(SeekerData.id)
+
+@plan("task worker: next ready task")
+def _next_task():
+    from ..services.task_queue import _ready
+    return (db.session.query(Task.id, Task.name).filter(_ready(datetime(2024, 1, 1)))
+            .order_by(Task.priority.desc(), Task.run_at, Task.id).limit(1))
+
+@plan("release: blob reference")
+def _blob_ref():
+    return StoredBlob.query.filter(StoredBlob.key == "ab/cdef.pdf", StoredBlob.refcount > 0)
+
+
+def explain(stmt):
+    """The ``EXPLAIN QUERY PLAN`` detail lines of ``stmt`` on the current database."""
+    stmt = getattr(stmt, "statement", stmt)
+    conn = db.session.connection()
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    args = tuple(params[name] for name in compiled.positiontup)
+    args = tuple(a.isoformat(" ") if isinstance(a, datetime) else a for a in args)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", args).all()
+    return [row[-1] for row in rows]
+
+def full_scans(details, allow=()):
+    """Plan steps that read a whole table; virtual (FTS) tables are left out."""
+    out = []
+    for line in details:
+        m = _SCAN_RE.match(line)
+        if m and "VIRTUAL TABLE" not in line and m.group(1) not in allow:
+            out.append(line)
+    return out
+
+def check():
+    """Explain every registered query: ``[(name, plan lines, offending lines)]``.
+
+    Needs a SQLite database at the current migration; the tables may be empty.
+    """
+    if db.engine.dialect.name != "sqlite":
+        raise RuntimeError("query plan checks read SQLite's EXPLAIN QUERY PLAN output")
+    results = []
+    for name, fn, allow in _checks:
+        stmt = fn()
+        if stmt is None:
+            continue
+        details = explain(stmt)
+        results.append((name, details, full_scans(details, allow)))
+    db.session.rollback()
+    return results
@@ -0,0 +1,71 @@
+import time
+import random
+from flask import current_app, request
+from .local_state import LocalStore, store
+
+# Fraction of calls that also drop buckets idle for a day.
+PURGE_CHANCE = 0.001
+
+
+class TokenBucketStore(LocalStore):
+    """Token buckets in a small SQLite file every worker on the host shares.
+
+    Each bucket holds up to ``capacity`` tokens and refills at
+    ``capacity / period`` tokens per second. Updates run in ``BEGIN IMMEDIATE``
+    transactions, so concurrent workers never lose a hit.
+    """
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+
+    def hit(self, buckets, now=None) -> float:
+        """Take one token from every ``(key, capacity, period)`` bucket.
+
+        Returns 0 when all buckets had a token. Otherwise nothing is taken and
+        the result is the seconds until the emptiest bucket refills one.
+        """
+        now = time.time() if now is None else now
+        with self._immediate() as conn:
+            levels = []
+            wait = 0.0
+            for key, capacity, period in buckets:
+                rate = capacity / period
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+                levels.append((key, tokens))
+            if not wait:
+                conn.executemany("INSERT INTO buckets(key, tokens, updated) VALUES (?, ?, ?) "
+                                 "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                                 [(key, tokens - 1, now) for key, tokens in levels])
+            if random.random() < PURGE_CHANCE:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - 86400,))
+        return wait
+
+
+def _store():
+    return store("jobmatch_rate_limit", "ratelimit.db", TokenBucketStore)
+
+def client_ip() -> str:
+    return request.remote_addr or "unknown"
+
+def limit(action, email=None) -> int:
+    """Charge one ``action`` attempt to the client IP and, if given, the email.
+
+    Limits come from ``RATE_LIMITS[f"{action}_ip"]`` and ``[f"{action}_email"]``
+    as ``(capacity, period_seconds)``. Returns 0 when allowed, else the whole
+    seconds to put in ``Retry-After``.
+    """
+    cfg = current_app.config
+    if not cfg.get("RATELIMIT_ENABLED"):
+        return 0
+    rules = cfg["RATE_LIMITS"]
+    buckets = []
+    if f"{action}_ip" in rules:
+        buckets.append((f"{action}:ip:{client_ip()}", *rules[f"{action}_ip"]))
+    if email and f"{action}_email" in rules:
+        buckets.append((f"{action}:email:{email}", *rules[f"{action}_email"]))
+    if not buckets:
+        return 0
+    wait = _store().hit(buckets)
+    return int(wait) + 1 if wait else 0
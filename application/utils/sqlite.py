@@ -0,0 +1,108 @@
+"""SQLite connection tuning and short write transactions.
+
+Every SQLite connection gets the pragmas of the configured profile. The
+driver's implicit transaction handling is turned off so that transactions
+start with an explicit ``BEGIN``, which lets ``write_transaction`` ask for
+``BEGIN IMMEDIATE``. An immediate transaction takes the write lock up front
+and waits for it under ``busy_timeout``. A deferred one can fail with
+"database is locked" as soon as it tries to upgrade a read lock that another
+writer is blocking.
+"""
+import time
+import random
+import logging
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from ..database import db
+
+logger = logging.getLogger(__name__)
+
+BEGIN_OPTION = "jobmatch_sqlite_begin"
+
+PROFILES = {
+    # Waits for locks instead of failing at once; otherwise SQLite defaults.
+    "default": {
+        "busy_timeout": 5000,
+    },
+    # Several gunicorn workers (and task workers) on one database file.
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def _is_file_sqlite(uri: str) -> bool:
+    return uri.startswith("sqlite") and ":memory:" not in uri and uri.rstrip("/") not in ("sqlite:", "sqlite://")
+
+def engine_options(config) -> dict:
+    """``SQLALCHEMY_ENGINE_OPTIONS`` defaults for a file-backed SQLite database.
+
+    A connection per concurrent request thread is plenty: SQLite serializes
+    writers anyway, and every extra connection keeps its own page cache.
+    """
+    if not _is_file_sqlite(config.get("SQLALCHEMY_DATABASE_URI") or ""):
+        return {}
+    busy_ms = PROFILES[config["SQLITE_PROFILE"]]["busy_timeout"]
+    return {
+        "pool_size": config["SQLITE_POOL_SIZE"],
+        "max_overflow": config["SQLITE_POOL_OVERFLOW"],
+        "pool_timeout": 30,
+        "connect_args": {"timeout": busy_ms / 1000, "check_same_thread": False},
+    }
+
+def configure_engine(engine, profile="default"):
+    """Install the pragma and explicit-BEGIN hooks on a SQLite engine."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = PROFILES[profile]
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cur.execute(f"PRAGMA {name}={value}")
+        cur.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        mode = conn.get_execution_options().get(BEGIN_OPTION)
+        conn.exec_driver_sql(f"BEGIN {mode}" if mode else "BEGIN")
+
+def _is_locked(exc) -> bool:
+    msg = str(getattr(exc, "orig", exc)).lower()
+    return "database is locked" in msg or "database is busy" in msg
+
+def write_transaction(work, retries=3, backoff=0.05):
+    """Run ``work()`` in its own short write transaction and commit it.
+
+    On SQLite the transaction starts with ``BEGIN IMMEDIATE``. If the lock
+    still cannot be had within ``busy_timeout``, the whole unit is rolled
+    back and retried with jittered backoff, so ``work`` must do its reads
+    inside and touch nothing outside the session. Returns what ``work``
+    returns. Any open transaction is rolled back first.
+    """
+    sqlite = db.engine.dialect.name == "sqlite"
+    for attempt in range(retries + 1):
+        db.session.rollback()
+        if sqlite:
+            db.session.connection(execution_options={BEGIN_OPTION: "IMMEDIATE"})
+        try:
+            result = work()
+            db.session.commit()
+            return result
+        except OperationalError as e:
+            db.session.rollback()
+            if not (sqlite and _is_locked(e)) or attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt * (0.5 + random.random())
+            logger.warning("Write transaction hit a locked database, retry %s in %.0fms", attempt + 1, delay * 1000)
+            time.sleep(delay)
+        except BaseException:
+            db.session.rollback()
+            raise
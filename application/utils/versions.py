@@ -0,0 +1,33 @@
+from .local_state import LocalStore, store
+
+
+class VersionStore(LocalStore):
+    """Named counters in a small SQLite file every worker on the host shares.
+
+    Per-worker caches put ``current(name)`` into their keys and call
+    ``bump(name)`` after a change commits, so every worker stops using the
+    old entries on its next read instead of waiting for a TTL.
+    """
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+
+    def current(self, name) -> int:
+        row = self._conn().execute("SELECT value FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, name) -> int:
+        return self._conn().execute(
+            "INSERT INTO versions(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1 RETURNING value", (name,)
+        ).fetchone()[0]
+
+
+def _store():
+    return store("jobmatch_versions", "versions.db", VersionStore)
+
+def current(name) -> int:
+    return _store().current(name)
+
+def bump(name) -> int:
+    """Move ``name`` on; returns the new version."""
+    return _store().bump(name)
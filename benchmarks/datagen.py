@@ -0,0 +1,222 @@
+"""Fill a database with production-scale synthetic data for the route benchmarks.
+
+    python -m benchmarks.datagen --db cache/bench/bench.db            # full size
+    python -m benchmarks.datagen --db cache/bench/small.db --scale 0.01
+
+At ``--scale 1``: 5,000 companies, 50k job posts, 500k seekers (``users``
+plus ``seeker_data``) and 5M applications. The counts are skewed like real
+traffic: post counts per company, applications per post and applications
+per seeker all follow Zipf-like curves, so the first company, post and
+seeker are the heaviest. Every account's password is ``benchpass``, and
+emails are ``hr{i}@bench.test`` and ``seeker{i}@bench.test``.
+``routes_bench`` relies on that. The database is migrated first. At the end
+the applicant counters are reconciled, the skill taxonomy is seeded and
+every profile and post tagged, and the search, ranking and recommendation
+tables are rebuilt, so each route reads the tables it reads in production.
+"""
+import os
+import time
+import random
+import argparse
+import itertools
+from bisect import bisect
+from datetime import datetime, timedelta
+
+PASSWORD = "benchpass"
+BATCH = 20_000
+
+SKILLS = ("python flask django sql postgres java spring kotlin react typescript node aws azure gcp docker "
+          "kubernetes terraform golang rust scala spark airflow pandas ml pytorch excel figma sales seo "
+          "accounting support linux networking security testing selenium android ios swift").split()
+TITLES = ("Backend Engineer", "Frontend Developer", "Data Analyst", "Data Engineer", "DevOps Engineer",
+          "Product Manager", "QA Engineer", "Mobile Developer", "ML Engineer", "Support Specialist",
+          "Sales Executive", "UX Designer", "Security Analyst", "Full Stack Developer", "Accountant")
+LEVELS = ("Junior", "", "", "Senior", "Lead")
+CITIES = ("Bangalore", "Hyderabad", "Pune", "Chennai", "Remote", "Berlin", "London", "Austin", "Toronto",
+          "Sydney", "Singapore", "Dubai")
+TYPES = ("Full-time", "Full-time", "Full-time", "Part-time", "Contract", "Internship")
+EDUCATION = ("BSc Computer Science", "BTech", "MSc", "MBA", "BCom", "Diploma", "PhD")
+FIRST = "Aarav Priya Rahul Ananya Vikram Sneha Arjun Kavya Rohan Meera Sam Alex Maria John Lena Omar".split()
+LAST = "Sharma Reddy Iyer Patel Khan Singh Gupta Nair Smith Garcia Chen Muller Silva Brown".split()
+RESOURCE_TYPES = ("Video", "Book", "Website")
+
+
+class Zipf:
+    """Draw ranks ``0..n-1`` with P(rank) proportional to 1 / (rank + 1) ** s."""
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.cum = list(itertools.accumulate(1.0 / (r + 1) ** s for r in range(n)))
+
+    def __call__(self):
+        return bisect(self.cum, self.rng.random() * self.cum[-1])
+
+
+def _insert(table, rows):
+    from application.database import db
+    batch = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            total += len(batch)
+            batch.clear()
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        total += len(batch)
+    return total
+
+
+def _companies(n, pw_hash):
+    for i in range(n):
+        yield i, {"name": f"HR {i}", "email": f"hr{i}@bench.test", "password": pw_hash, "role": "company"}
+
+
+def _seekers(n, rng, pw_hash):
+    for i in range(n):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        yield {"name": name, "email": f"seeker{i}@bench.test", "password": pw_hash, "role": "seeker"}, {
+            "full_name": name, "email": f"seeker{i}@bench.test", "phone": f"9{i:09d}",
+            "education": rng.choice(EDUCATION), "experience": f"{rng.randrange(0, 15)} years",
+            "skills": ", ".join(rng.sample(SKILLS, rng.randrange(3, 8))), "resume_path": None,
+        }
+
+
+def _posts(n, companies, rng):
+    pick_company = Zipf(companies, 1.05, rng)
+    for _ in range(n):
+        c = pick_company()
+        low = rng.randrange(3, 30) * 10_000 if rng.random() < 0.8 else None
+        yield c, {
+            "job_title": f"{rng.choice(LEVELS)} {rng.choice(TITLES)}".strip(),
+            "location": rng.choice(CITIES),
+            "employment_type": rng.choice(TYPES),
+            "salary_from": low,
+            "salary_to": low + rng.randrange(1, 20) * 10_000 if low else None,
+            "job_description": "We are looking for someone with " + ", ".join(rng.sample(SKILLS, 6)) + ".",
+            "key_responsibilities": "Own " + ", ".join(rng.sample(SKILLS, 3)) + " end to end.",
+            "company_name": f"Company {c}",
+            "email": f"hr{c}@bench.test",
+            "is_open": 0 if rng.random() < 0.15 else 1,
+        }
+
+
+def _applications(total, names, posts, titles, rng, now):
+    """Per-seeker batches of distinct posts; popular posts and busy seekers dominate."""
+    pick_post = Zipf(posts, 0.9, rng)
+    per_seeker = Zipf(len(names), 0.6, rng)
+    counts = [0] * len(names)
+    for _ in range(total):
+        counts[per_seeker()] += 1
+    for s, k in enumerate(counts):
+        if k > posts // 2:
+            chosen = rng.sample(range(posts), min(k, posts))
+        else:
+            chosen = set()
+            while len(chosen) < k:
+                chosen.add(pick_post())
+        for p in chosen:
+            applied = now - timedelta(minutes=rng.randrange(0, 365 * 24 * 60))
+            r = rng.random()
+            status = "active" if r < 0.7 else ("rejected" if r < 0.9 else "accepted")
+            yield {
+                "seeker_name": names[s], "seeker_email": f"seeker{s}@bench.test",
+                "job_post_id": p + 1, "job_title": titles[p], "status": status,
+                "applied_at": applied,
+                "decided_at": applied + timedelta(days=rng.randrange(1, 30)) if status != "active" else None,
+            }
+
+
+def _resources(n, rng):
+    for i in range(n):
+        kind = RESOURCE_TYPES[i % len(RESOURCE_TYPES)]
+        yield {"resource_type": kind, "title": f"{kind} on {rng.choice(SKILLS)} #{i}",
+               "url": f"https://example.com/r/{i}", "description": "Synthetic learning resource."}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--db", default=os.path.join("cache", "bench", "bench.db"))
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--skip-match-index", action="store_true",
+                    help="Leave the applicant ranking index and the recommendations empty.")
+    args = ap.parse_args()
+
+    n_companies = max(1, int(5_000 * args.scale))
+    n_posts = max(1, int(50_000 * args.scale))
+    n_seekers = max(1, int(500_000 * args.scale))
+    n_apps = int(5_000_000 * args.scale)
+
+    path = os.path.abspath(args.db)
+    if os.path.exists(path):
+        raise SystemExit(f"{path} exists; remove it or pick another --db")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ.setdefault("SQLITE_PROFILE", "production")
+    from application import create_app, init_db
+    from application.database import db, bcrypt
+    from application.models import User, SeekerData, CompanyData, JobPost, Application, Resource
+    from application.services import search_service, match_service, stats_service, skill_service, recommend_service
+    from application.utils.sqlite import write_transaction
+
+    app = create_app()
+    init_db(app)
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    started = time.time()
+
+    def step(label, count):
+        print(f"{label:<14}{count:>10,}  {time.time() - started:7.1f}s", flush=True)
+
+    with app.app_context():
+        pw_hash = bcrypt.generate_password_hash(PASSWORD).decode("utf-8")
+        companies = list(_companies(n_companies, pw_hash))
+        _insert(User.__table__, (u for _, u in companies))
+        step("companies", _insert(CompanyData.__table__, (
+            {"email": u["email"], "contact_name": u["name"], "company_name": f"Company {i}",
+             "phone": "0", "website": f"https://company{i}.example.com"} for i, u in companies)))
+
+        titles = []
+        def posts():
+            for _, row in _posts(n_posts, n_companies, rng):
+                titles.append(row["job_title"])
+                yield row
+        step("job posts", _insert(JobPost.__table__, posts()))
+
+        pairs = list(_seekers(n_seekers, rng, pw_hash))
+        _insert(User.__table__, (u for u, _ in pairs))
+        step("seekers", _insert(SeekerData.__table__, (sd for _, sd in pairs)))
+        names = [u["name"] for u, _ in pairs]
+        del pairs
+
+        step("applications", _insert(Application.__table__,
+                                     _applications(n_apps, names, n_posts, titles, rng, now)))
+        step("resources", _insert(Resource.__table__, _resources(300, rng)))
+        fixed = write_transaction(stats_service.reconcile)
+        step("counters", fixed["counters"] + fixed["daily"])
+        skill_service.seed()
+        db.session.commit()
+        skill_service.invalidate()
+        tagged = skill_service.backfill(batch_size=2000)
+        # End the session's read transaction before the index rebuild writes on its own connection.
+        db.session.commit()
+        step("skill tags", tagged["seekers"] + tagged["posts"])
+
+        if search_service.check_index():
+            jobs, seekers = search_service.rebuild_index()
+            step("search index", jobs + seekers)
+        if not args.skip_match_index:
+            done = match_service.reindex_all()
+            step("match index", done["seeker"] + done["job"])
+            step("recommended", recommend_service.rebuild_all(batch_size=2000))
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Latency, throughput and SQL statements per request for every page and JSON API.
+
+    python -m benchmarks.routes_bench --db cache/bench/bench.db --save cache/bench/baseline.json
+    python -m benchmarks.routes_bench --db cache/bench/bench.db --compare cache/bench/baseline.json
+    python -m benchmarks.routes_bench --db cache/bench/bench.db --url http://127.0.0.1:8000 --processes 8
+
+Run ``benchmarks.datagen`` first; the scenarios sign in as its heaviest
+company (``hr0``) and seeker (``seeker0``). Without ``--url`` each scenario
+runs in-process through the Flask test client, which measures the app
+alone. With ``--url`` a server you started (gunicorn against the same
+database) is driven over HTTP by ``--processes`` client processes. Each
+process logs in once, and then all of them run one scenario at a time.
+Statement counts come from the ``X-Query-Count`` header in debug mode and
+otherwise from ``/metrics``.
+
+``--compare`` exits with status 1 when a scenario's p95 grows by more
+than ``--tolerance``, its throughput drops by more than ``--tolerance``,
+or it runs more statements per request than the baseline did.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import platform
+import multiprocessing
+from datetime import datetime
+
+PASSWORD = "benchpass"
+COMPANY = "hr0@bench.test"
+SEEKER = "seeker0@bench.test"
+WORDS = ("python", "engineer", "senior data", "remote", "react", "sales")
+PREFIXES = ("p", "py", "dev", "eng", "da", "sen", "ba", "re")
+
+# name -> (role, endpoint, method, path(rng, ctx)); role None means signed out.
+SCENARIOS = {
+    "welcome": (None, "welcome", "GET", lambda r, c: "/"),
+    "login_page": (None, "login", "GET", lambda r, c: "/login"),
+    "job_listings": ("seeker", "job_listings", "GET", lambda r, c: "/job_listings"),
+    "job_listings_deep_page": ("seeker", "job_listings", "GET",
+                               lambda r, c: f"/job_listings?page={r.randint(10, 60)}"),
+    "job_listings_filtered": ("seeker", "job_listings", "GET",
+                              lambda r, c: "/job_listings?employment_type=Full-time&salary_from=100000"),
+    "job_listings_search": ("seeker", "job_listings", "GET", lambda r, c: f"/job_listings?q={r.choice(WORDS)}"),
+    "api_job_listings": ("seeker", "api_job_listings", "GET",
+                         lambda r, c: f"/api/job_listings?page={r.randint(1, 20)}"),
+    "api_job_facets": ("seeker", "api_job_facets", "GET", lambda r, c: f"/api/job_facets?q={r.choice(WORDS)}"),
+    "api_autocomplete": ("seeker", "api_autocomplete", "GET",
+                         lambda r, c: f"/api/autocomplete?field=job_title,skill&prefix={r.choice(PREFIXES)}"),
+    "api_recommended_jobs": ("seeker", "api_recommended_jobs", "GET", lambda r, c: "/api/recommended_jobs"),
+    "seeker_status": ("seeker", "seeker_status", "GET", lambda r, c: "/api/seeker_status"),
+    "seeker_profile": ("seeker", "profile", "GET", lambda r, c: "/profile"),
+    "seeker_data": ("seeker", "seeker_data", "GET", lambda r, c: "/seeker_data"),
+    "resources": ("seeker", "resources", "GET", lambda r, c: "/resources"),
+    "company_dashboard": ("company", "company_dashboard", "GET", lambda r, c: "/company_dashboard"),
+    "company_applications": ("company", "applications", "GET", lambda r, c: "/applications"),
+    "api_job_posts": ("company", "api_job_posts", "GET", lambda r, c: "/api/job_posts"),
+    "api_active_applications": ("company", "api_active_applications", "GET",
+                                lambda r, c: "/api/active_applications"),
+    "api_active_applications_search": ("company", "api_active_applications", "GET",
+                                       lambda r, c: "/api/active_applications?q=sharma"),
+    "api_accepted_applications": ("company", "api_accepted_applications", "GET",
+                                  lambda r, c: "/api/accepted_applications"),
+    "api_ranked_applicants": ("company", "api_ranked_applicants", "GET",
+                              lambda r, c: f"/api/job_posts/{r.choice(c['posts'])}/ranked_applicants?k=20"),
+    "api_talent_search": ("company", "api_talent_search", "GET",
+                          lambda r, c: f"/api/talent_search?q={r.choice(WORDS)}"),
+    "api_company_stats": ("company", "api_company_stats", "GET", lambda r, c: "/api/company_stats"),
+}
+# Mutate the database; only run with --writes.
+WRITE_SCENARIOS = {
+    "apply": ("seeker", "apply_for_job", "POST", lambda r, c: f"/apply/{r.randint(1, c['max_post'])}"),
+}
+
+
+def _context(db_path):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    posts = [pid for (pid,) in conn.execute("SELECT id FROM job_posts WHERE email = ? LIMIT 200", (COMPANY,))]
+    counts = {t: conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+              for t in ("users", "job_posts", "seeker_data", "application")}
+    max_post = conn.execute("SELECT max(id) FROM job_posts").fetchone()[0] or 1
+    conn.close()
+    if not posts:
+        raise SystemExit(f"{COMPANY} has no job posts; generate the database with benchmarks.datagen")
+    return {"posts": posts, "max_post": max_post, "counts": counts}
+
+
+def _pct(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else None
+
+
+def _summary(samples, elapsed, queries):
+    ms = sorted(s * 1000 for s, _ in samples)
+    errors = sum(1 for _, status in samples if status >= 500)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "p50_ms": round(_pct(ms, 0.50), 3),
+        "p95_ms": round(_pct(ms, 0.95), 3),
+        "p99_ms": round(_pct(ms, 0.99), 3),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else None,
+        "queries_per_request": round(queries, 2) if queries is not None else None,
+    }
+
+
+# -- in-process ---------------------------------------------------------------
+
+def run_client(args, ctx, scenarios):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.abspath(args.db)}"
+    os.environ.setdefault("SQLITE_PROFILE", "production")
+    os.environ["RATELIMIT_ENABLED"] = "0"
+    os.environ.setdefault("LOCAL_STATE_FOLDER", tempfile.mkdtemp())
+    from application import create_app
+    app = create_app()
+    app.config["DEBUG"] = True  # X-Query-Count on every response
+    clients = {None: app.test_client(), "seeker": app.test_client(), "company": app.test_client()}
+    for role, email in (("seeker", SEEKER), ("company", COMPANY)):
+        clients[role].post("/login", data={"email": email, "password": PASSWORD})
+    rng = random.Random(args.seed)
+    results = {}
+    for name, (role, _, method, path) in scenarios.items():
+        client = clients[role]
+        for _ in range(args.warmup):
+            client.open(path(rng, ctx), method=method)
+        samples, queries = [], 0
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            url = path(rng, ctx)
+            t0 = time.perf_counter()
+            resp = client.open(url, method=method)
+            resp.get_data()
+            samples.append((time.perf_counter() - t0, resp.status_code))
+            queries += int(resp.headers.get("X-Query-Count", 0))
+        results[name] = _summary(samples, time.perf_counter() - started, queries / len(samples))
+        _print_row(name, results[name])
+    return results
+
+
+# -- over HTTP ----------------------------------------------------------------
+
+def _http_worker(index, base_url, ctx, seed, tasks, results):
+    import requests
+    sessions = {None: requests.Session(), "seeker": requests.Session(), "company": requests.Session()}
+    for role, email in (("seeker", SEEKER), ("company", COMPANY)):
+        sessions[role].post(f"{base_url}/login", data={"email": email, "password": PASSWORD},
+                            allow_redirects=False)
+    rng = random.Random(seed + index)
+    while True:
+        job = tasks.get()
+        if job is None:
+            return
+        name, count, start_at = job
+        role, _, method, path = {**SCENARIOS, **WRITE_SCENARIOS}[name]
+        session = sessions[role]
+        while time.time() < start_at:
+            time.sleep(0.001)
+        samples, queries, counted = [], 0, 0
+        for _ in range(count):
+            t0 = time.perf_counter()
+            resp = session.request(method, base_url + path(rng, ctx), allow_redirects=False)
+            samples.append((time.perf_counter() - t0, resp.status_code))
+            if "X-Query-Count" in resp.headers:
+                queries += int(resp.headers["X-Query-Count"])
+                counted += 1
+        results.put((samples, time.time(), queries, counted))
+
+
+_SAMPLE_RE = re.compile(r'^(\w+)\{endpoint="([^"]+)"[^}]*\} (\S+)$')
+
+def _scrape(base_url, token):
+    """``{(metric, endpoint): total}`` for the request and statement counters."""
+    import requests
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    resp = requests.get(f"{base_url}/metrics", headers=headers)
+    if resp.status_code != 200:
+        return None
+    totals = {}
+    for line in resp.text.splitlines():
+        m = _SAMPLE_RE.match(line)
+        if m and m.group(1) in ("jobmatch_http_requests_total", "jobmatch_db_statements_total"):
+            key = (m.group(1), m.group(2))
+            totals[key] = totals.get(key, 0) + float(m.group(3))
+    return totals
+
+def _metrics_queries(before, after, endpoint):
+    if before is None or after is None:
+        return None
+    served = after.get(("jobmatch_http_requests_total", endpoint), 0) - before.get(
+        ("jobmatch_http_requests_total", endpoint), 0)
+    statements = after.get(("jobmatch_db_statements_total", endpoint), 0) - before.get(
+        ("jobmatch_db_statements_total", endpoint), 0)
+    return statements / served if served else None
+
+def run_http(args, ctx, scenarios):
+    mp = multiprocessing.get_context("spawn")
+    tasks = [mp.Queue() for _ in range(args.processes)]
+    results = mp.Queue()
+    procs = [mp.Process(target=_http_worker, args=(i, args.url, ctx, args.seed, tasks[i], results))
+             for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    per_worker = max(1, args.requests // args.processes)
+    out = {}
+    try:
+        for name, (_, endpoint, _, _) in scenarios.items():
+            if args.warmup:
+                for q in tasks:
+                    q.put((name, max(1, args.warmup // args.processes), 0))
+                for _ in procs:
+                    results.get()
+            before = _scrape(args.url, args.metrics_token)
+            # Start every process at the same moment, after they all got the job.
+            start_at = time.time() + 0.5
+            for q in tasks:
+                q.put((name, per_worker, start_at))
+            runs = [results.get() for _ in procs]
+            time.sleep(args.metrics_settle)
+            after = _scrape(args.url, args.metrics_token)
+            samples = [s for batch, _, _, _ in runs for s in batch]
+            counted = sum(c for _, _, _, c in runs)
+            queries = (sum(q for _, _, q, _ in runs) / counted if counted
+                       else _metrics_queries(before, after, endpoint))
+            out[name] = _summary(samples, max(end for _, end, _, _ in runs) - start_at, queries)
+            _print_row(name, out[name])
+    finally:
+        for q in tasks:
+            q.put(None)
+        for p in procs:
+            p.join()
+    return out
+
+
+# -- reporting ----------------------------------------------------------------
+
+def _print_header():
+    print(f"{'scenario':<32}{'reqs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'q/req':>7}{'5xx':>5}")
+
+def _fmt(value, width):
+    return f"{value:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+
+def _print_row(name, r):
+    print(f"{name:<32}{r['requests']:>6}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+          f"{_fmt(r['rps'], 9)}{_fmt(r['queries_per_request'], 7)}{r['errors']:>5}", flush=True)
+
+def compare(results, baseline, tolerance):
+    """Print the change against ``baseline`` and return the regressed scenario names."""
+    regressed = []
+    print(f"\n{'scenario':<32}{'p95 base':>10}{'p95 now':>10}{'change':>9}{'q base':>8}{'q now':>7}")
+    for name, now in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            print(f"{name:<32}  (not in baseline)")
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        reasons = []
+        # Sub-millisecond differences are timer noise, not regressions.
+        if change > tolerance and now["p95_ms"] - base["p95_ms"] > 1.0:
+            reasons.append("p95")
+        if base.get("rps") and now.get("rps") and now["rps"] < base["rps"] * (1 - tolerance):
+            reasons.append("throughput")
+        qb, qn = base.get("queries_per_request"), now.get("queries_per_request")
+        if qb is not None and qn is not None and qn > qb + 0.01:
+            reasons.append("queries")
+        if now["errors"] > base.get("errors", 0):
+            reasons.append("errors")
+        flag = f"  REGRESSION ({', '.join(reasons)})" if reasons else ""
+        print(f"{name:<32}{base['p95_ms']:>10.2f}{now['p95_ms']:>10.2f}{change:>+9.0%}"
+              f"{_fmt(qb, 8)}{_fmt(qn, 7)}{flag}")
+        if reasons:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--db", default=os.path.join("cache", "bench", "bench.db"))
+    ap.add_argument("--url", help="Drive a running server over HTTP instead of the test client.")
+    ap.add_argument("--processes", type=int, default=4, help="HTTP client processes (with --url).")
+    ap.add_argument("--requests", type=int, default=200, help="Measured requests per scenario.")
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--only", action="append", help="Run scenarios whose name contains this (repeatable).")
+    ap.add_argument("--writes", action="store_true", help="Also run scenarios that change the database.")
+    ap.add_argument("--save", help="Write the results to this JSON file.")
+    ap.add_argument("--compare", help="Baseline JSON to check the results against.")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95/throughput change (0.25 = 25%%).")
+    ap.add_argument("--metrics-token", default=os.environ.get("METRICS_TOKEN", ""))
+    ap.add_argument("--metrics-settle", type=float, default=0.0,
+                    help="Seconds to wait before scraping /metrics, to cover the server's flush interval.")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"{args.db} not found; create it with python -m benchmarks.datagen")
+    ctx = _context(args.db)
+    scenarios = {**SCENARIOS, **(WRITE_SCENARIOS if args.writes else {})}
+    if args.only:
+        scenarios = {k: v for k, v in scenarios.items() if any(o in k for o in args.only)}
+
+    mode = f"http x{args.processes}" if args.url else "test client"
+    print(f"{mode}, {args.requests} requests per scenario; "
+          + ", ".join(f"{n:,} {t}" for t, n in ctx["counts"].items()))
+    _print_header()
+    results = run_http(args, ctx, scenarios) if args.url else run_client(args, ctx, scenarios)
+
+    report = {
+        "created": datetime.utcnow().isoformat(timespec="seconds"),
+        "mode": mode,
+        "requests": args.requests,
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "data": ctx["counts"],
+        "scenarios": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("data") != ctx["counts"] or baseline.get("mode") != mode:
+            print("Note: the baseline was taken with different data or mode.")
+        regressed = compare(results, baseline, args.tolerance)
+        print(f"{len(regressed)} regressions.")
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Job search latency: LIKE scan vs. the FTS5 index.
+
+    python -m benchmarks.search_bench --posts 100000
+
+Builds a throwaway SQLite database, fills ``job_posts`` with synthetic rows
+and times the old ``ilike`` OR-scan against ``search_service.apply_search``
+for the same queries and page size.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+import argparse
+
+WORDS = tuple("python java react golang rust kotlin swift sql django flask spring aws azure gcp docker "
+         "kubernetes data analyst engineer developer manager designer senior junior lead backend "
+         "frontend fullstack mobile cloud security devops ml platform support sales marketing".split())
+CITIES = "Berlin London Paris Madrid Remote Bangalore Hyderabad Austin Toronto Sydney".split()
+TYPES = ("Full-time", "Part-time", "Contract", "Internship")
+QUERIES = ("python", "senior backend", "remote", "kubernetes engineer", "berlin data", "acme")
+
+
+def _rows(n, rng):
+    # Body text draws from a Zipf-weighted vocabulary so term frequencies look
+    # like prose: a few words everywhere, most words rare.
+    vocab = list(WORDS) + [f"w{i}" for i in range(20_000)]
+    rng.shuffle(vocab)
+    weights = [1.0 / (rank + 1) ** 1.1 for rank in range(len(vocab))]
+    for i in range(n):
+        words = rng.sample(WORDS, 3)
+        yield {
+            "job_title": f"{words[0].title()} {words[1].title()}",
+            "location": rng.choice(CITIES),
+            "employment_type": rng.choice(TYPES),
+            "salary_from": rng.randrange(20, 120) * 1000,
+            "salary_to": rng.randrange(120, 250) * 1000,
+            "job_description": " ".join(rng.choices(vocab, weights, k=60)),
+            "key_responsibilities": " ".join(rng.choices(vocab, weights, k=20)),
+            "company_name": f"Company {i % 5000}" if i % 97 else "Acme",
+            "email": f"hr{i % 5000}@example.com",
+            "is_open": 1,
+        }
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--posts", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--per-page", type=int, default=30)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp}/bench.db"
+    from application import create_app, init_db
+    from application.database import db
+    from application.models import JobPost
+    from application.services import search_service
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        rng = random.Random(42)
+        batch = []
+        for row in _rows(args.posts, rng):
+            batch.append(row)
+            if len(batch) == 5000:
+                db.session.execute(JobPost.__table__.insert(), batch)
+                batch.clear()
+        if batch:
+            db.session.execute(JobPost.__table__.insert(), batch)
+        db.session.commit()
+        search_service.rebuild_index()
+
+        print(f"{args.posts} posts, page size {args.per_page}, {args.repeat} runs per query (ms)")
+        print(f"{'query':<22}{'like p50':>10}{'like p95':>10}{'fts p50':>10}{'fts p95':>10}")
+        for q in QUERIES:
+            like = f"%{q}%"
+
+            def run_like():
+                (JobPost.query.filter(db.or_(
+                    JobPost.job_title.ilike(like),
+                    JobPost.company_name.ilike(like),
+                    JobPost.location.ilike(like),
+                )).order_by(JobPost.id).limit(args.per_page).all())
+                db.session.expire_all()
+
+            def run_fts():
+                search_service.apply_search(JobPost.query, q).limit(args.per_page).all()
+                db.session.expire_all()
+
+            lp50, lp95 = _time(run_like, args.repeat)
+            fp50, fp95 = _time(run_fts, args.repeat)
+            print(f"{q:<22}{lp50:>10.2f}{lp95:>10.2f}{fp50:>10.2f}{fp95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Concurrent readers and writers on one SQLite file, before and after tuning.
+
+    python -m benchmarks.sqlite_concurrency --processes 6 --ops 300
+
+Each scenario gets a fresh database and runs ``--processes`` worker processes
+that build their own app, like gunicorn workers. They mix job-listing reads
+with apply-style writes (read, check, insert). Scenarios:
+
+* ``baseline``  default pragmas, deferred transactions (the old code path)
+* ``pragmas``   production profile (WAL etc.), still deferred transactions
+* ``tuned``     production profile and ``write_transaction`` (BEGIN IMMEDIATE + retry)
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+
+SCENARIOS = {
+    "baseline": ("default", False),
+    "pragmas": ("production", False),
+    "tuned": ("production", True),
+}
+
+
+def _worker(index, db_path, profile, immediate, ops, write_ratio, barrier, results):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    os.environ["SQLITE_PROFILE"] = profile
+    from datetime import datetime
+    from sqlalchemy.exc import OperationalError
+    from application import create_app
+    from application.database import db
+    from application.models import JobPost, Application
+    from application.utils.sqlite import write_transaction
+
+    app = create_app()
+    rng = random.Random(index)
+    samples = []
+    with app.app_context():
+        n_posts = JobPost.query.count()
+        barrier.wait()
+        started = time.time()
+        for i in range(ops):
+            t0 = time.perf_counter()
+            if rng.random() < write_ratio:
+                kind = "write"
+                email, post_id = f"p{index}-{i}@bench.test", rng.randint(1, n_posts)
+
+                def apply():
+                    if Application.query.filter_by(seeker_email=email, job_post_id=post_id).first():
+                        return
+                    job = db.session.get(JobPost, post_id)
+                    db.session.add(Application(seeker_name="Bench", seeker_email=email, job_post_id=post_id,
+                                               job_title=job.job_title, applied_at=datetime.utcnow()))
+
+                try:
+                    if immediate:
+                        write_transaction(apply)
+                    else:
+                        apply()
+                        db.session.commit()
+                    ok = True
+                except OperationalError:
+                    db.session.rollback()
+                    ok = False
+            else:
+                kind = "read"
+                try:
+                    (JobPost.query.filter(JobPost.is_open == 1)
+                     .order_by(JobPost.id.desc()).offset(rng.randrange(0, max(n_posts - 30, 1))).limit(30).all())
+                    db.session.commit()
+                    ok = True
+                except OperationalError:
+                    db.session.rollback()
+                    ok = False
+            samples.append((kind, (time.perf_counter() - t0) * 1000, ok))
+    results.put((started, time.time(), samples))
+
+
+def _seed(db_path, posts):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    from application import create_app, init_db
+    from application.database import db
+    from application.models import JobPost
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        db.session.execute(JobPost.__table__.insert(), [{
+            "job_title": f"Engineer {i}", "location": "Remote", "employment_type": "Full-time",
+            "job_description": "Build things", "company_name": f"Company {i % 50}",
+            "email": f"hr{i % 50}@bench.test", "is_open": 1,
+        } for i in range(posts)])
+        db.session.commit()
+        db.engine.dispose()
+
+
+def _pct(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float("nan")
+
+
+def run(name, args, ctx):
+    profile, immediate = SCENARIOS[name]
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    seeder = ctx.Process(target=_seed, args=(db_path, args.posts))
+    seeder.start()
+    seeder.join()
+    barrier = ctx.Barrier(args.processes)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(i, db_path, profile, immediate, args.ops, args.write_ratio,
+                                                barrier, results))
+             for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    runs = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = max(end for _, end, _ in runs) - min(start for start, _, _ in runs)
+    samples = [s for _, _, batch in runs for s in batch]
+    reads = sorted(ms for kind, ms, ok in samples if kind == "read" and ok)
+    writes = sorted(ms for kind, ms, ok in samples if kind == "write" and ok)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    print(f"{name:<10}{len(samples) / elapsed:>9.0f}{_pct(reads, .5):>10.2f}{_pct(reads, .95):>10.2f}"
+          f"{_pct(writes, .5):>10.2f}{_pct(writes, .95):>10.2f}{_pct(writes, .99):>10.2f}{errors:>8}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--processes", type=int, default=6)
+    ap.add_argument("--ops", type=int, default=300, help="operations per process")
+    ap.add_argument("--write-ratio", type=float, default=0.3)
+    ap.add_argument("--posts", type=int, default=2000)
+    ap.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    args = ap.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{args.processes} processes x {args.ops} ops, {args.write_ratio:.0%} writes "
+          f"(ops/s from the common start; latency in ms; errors = 'database is locked')")
+    print(f"{'scenario':<10}{'ops/s':>9}{'read p50':>10}{'read p95':>10}"
+          f"{'write p50':>10}{'write p95':>10}{'write p99':>10}{'errors':>8}")
+    for name in args.scenario or list(SCENARIOS):
+        run(name, args, ctx)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""covering index for the job listing facet counts
+
+Revision ID: 0c6e8f3a9b27
+Revises: f2b9d41c7e63
+Create Date: 2026-10-18 22:31:08.204671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c6e8f3a9b27'
+down_revision = 'f2b9d41c7e63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_job_posts_facets', 'job_posts', ['employment_type', 'salary_from', 'location', 'is_open'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_posts_facets', table_name='job_posts')
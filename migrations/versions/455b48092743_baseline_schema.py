@@ -0,0 +1,180 @@
+"""baseline schema
+
+The tables as ``db.create_all()`` used to create them. Tables and indexes
+that already exist are left alone, so a database created before migrations
+upgrades in place.
+
+Revision ID: 455b48092743
+Revises: 
+Create Date: 2026-10-18 17:44:41.995378
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '455b48092743'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('company_data',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('contact_name', sa.String(length=100), nullable=True),
+    sa.Column('company_name', sa.String(length=150), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('website', sa.String(length=200), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    if_not_exists=True
+    )
+    op.create_table('job_posts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_title', sa.String(length=100), nullable=False),
+    sa.Column('location', sa.String(length=100), nullable=False),
+    sa.Column('employment_type', sa.String(length=50), nullable=False),
+    sa.Column('salary_from', sa.Integer(), nullable=True),
+    sa.Column('salary_to', sa.Integer(), nullable=True),
+    sa.Column('job_description', sa.Text(), nullable=False),
+    sa.Column('key_responsibilities', sa.Text(), nullable=True),
+    sa.Column('company_name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('logo_filename', sa.String(length=100), nullable=True),
+    sa.Column('is_open', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('match_documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doc_kind', sa.String(length=10), nullable=False),
+    sa.Column('doc_id', sa.Integer(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('doc_kind', 'doc_id', name='uq_match_documents_doc'),
+    if_not_exists=True
+    )
+    op.create_table('match_terms',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doc_kind', sa.String(length=10), nullable=False),
+    sa.Column('doc_id', sa.Integer(), nullable=False),
+    sa.Column('term', sa.String(length=64), nullable=False),
+    sa.Column('tf', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_match_terms_kind_doc', 'match_terms', ['doc_kind', 'doc_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_match_terms_kind_term', 'match_terms', ['doc_kind', 'term', 'doc_id'], unique=False, if_not_exists=True)
+    op.create_table('resources',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('resource_type', sa.String(length=20), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('image_path', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('resume_texts',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('error', sa.String(length=300), nullable=True),
+    sa.Column('extracted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_resume_texts_status'), 'resume_texts', ['status'], unique=False, if_not_exists=True)
+    op.create_table('seeker_data',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=False),
+    sa.Column('education', sa.String(length=200), nullable=True),
+    sa.Column('experience', sa.String(length=50), nullable=True),
+    sa.Column('skills', sa.Text(), nullable=True),
+    sa.Column('resume_path', sa.String(length=200), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('stored_blobs',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('refcount', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_stored_blobs_refcount'), 'stored_blobs', ['refcount'], unique=False, if_not_exists=True)
+    op.create_table('tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('queued', 'running', 'done', 'failed', name='task_status', native_enum=False), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('enqueued_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_tasks_status_locked_until', 'tasks', ['status', 'locked_until'], unique=False, if_not_exists=True)
+    op.create_index('ix_tasks_status_priority_run_at', 'tasks', ['status', 'priority', 'run_at'], unique=False, if_not_exists=True)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    if_not_exists=True
+    )
+    op.create_table('application',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('seeker_name', sa.String(length=100), nullable=False),
+    sa.Column('seeker_email', sa.String(length=120), nullable=False),
+    sa.Column('job_post_id', sa.Integer(), nullable=True),
+    sa.Column('job_title', sa.String(length=200), nullable=False),
+    sa.Column('status', sa.Enum('active', 'accepted', 'rejected', name='application_status', native_enum=False), nullable=False),
+    sa.Column('applied_at', sa.DateTime(), nullable=False),
+    sa.Column('decided_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_post_id'], ['job_posts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_application_post_status_applied', 'application', ['job_post_id', 'status', 'applied_at'], unique=False, if_not_exists=True)
+    op.create_index('ix_application_seeker_status', 'application', ['seeker_email', 'status'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_application_seeker_status', table_name='application')
+    op.drop_index('ix_application_post_status_applied', table_name='application')
+    op.drop_table('application')
+    op.drop_table('users')
+    op.drop_index('ix_tasks_status_priority_run_at', table_name='tasks')
+    op.drop_index('ix_tasks_status_locked_until', table_name='tasks')
+    op.drop_table('tasks')
+    op.drop_index(op.f('ix_stored_blobs_refcount'), table_name='stored_blobs')
+    op.drop_table('stored_blobs')
+    op.drop_table('seeker_data')
+    op.drop_index(op.f('ix_resume_texts_status'), table_name='resume_texts')
+    op.drop_table('resume_texts')
+    op.drop_table('resources')
+    op.drop_index('ix_match_terms_kind_term', table_name='match_terms')
+    op.drop_index('ix_match_terms_kind_doc', table_name='match_terms')
+    op.drop_table('match_terms')
+    op.drop_table('match_documents')
+    op.drop_table('job_posts')
+    op.drop_table('company_data')
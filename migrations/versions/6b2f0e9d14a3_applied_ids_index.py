@@ -0,0 +1,27 @@
+"""index a seeker's applications by post
+
+The job listing loads the ids of every post a seeker applied to, and the
+apply route checks one (seeker, post) pair; both read only this index.
+
+Revision ID: 6b2f0e9d14a3
+Revises: d3a8b6c41f07
+Create Date: 2026-10-18 18:41:06.215730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2f0e9d14a3'
+down_revision = 'd3a8b6c41f07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_application_seeker_post', 'application', ['seeker_email', 'job_post_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_application_seeker_post', table_name='application')
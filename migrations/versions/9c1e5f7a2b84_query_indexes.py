@@ -0,0 +1,68 @@
+"""indexes for the route queries
+
+Job posts are filtered by owner, title, type, open flag and salary range,
+resources by type in date order, and seeker profiles are looked up by email.
+``seeker_data.email`` becomes unique; where a seeker has several profile rows
+the oldest one (the one every page reads) is kept and the others are removed
+together with their resume references and search rows.
+
+Revision ID: 9c1e5f7a2b84
+Revises: 455b48092743
+Create Date: 2026-10-18 17:52:10.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1e5f7a2b84'
+down_revision = '455b48092743'
+branch_labels = None
+depends_on = None
+
+
+def _drop_duplicate_seekers():
+    conn = op.get_bind()
+    dupes = conn.execute(sa.text(
+        "SELECT s.id, s.resume_path FROM seeker_data s "
+        "WHERE s.id > (SELECT min(o.id) FROM seeker_data o WHERE o.email = s.email)"
+    )).all()
+    if not dupes:
+        return
+    ids = [row.id for row in dupes]
+    tables = set(sa.inspect(conn).get_table_names())
+    in_ids = sa.bindparam("ids", expanding=True)
+    for row in dupes:
+        if row.resume_path:
+            conn.execute(sa.text("UPDATE stored_blobs SET refcount = refcount - 1 "
+                                 "WHERE key = :k AND refcount > 0"), {"k": row.resume_path})
+    for table in ("match_terms", "match_documents"):
+        conn.execute(sa.text(f"DELETE FROM {table} WHERE doc_kind = 'seeker' AND doc_id IN :ids")
+                     .bindparams(in_ids), {"ids": ids})
+    if "talent_fts" in tables:
+        conn.execute(sa.text("DELETE FROM talent_fts WHERE rowid IN :ids").bindparams(in_ids), {"ids": ids})
+    conn.execute(sa.text("DELETE FROM seeker_data WHERE id IN :ids").bindparams(in_ids), {"ids": ids})
+
+
+def upgrade():
+    op.create_index(op.f('ix_job_posts_email'), 'job_posts', ['email'], unique=False)
+    op.create_index(op.f('ix_job_posts_employment_type'), 'job_posts', ['employment_type'], unique=False)
+    op.create_index(op.f('ix_job_posts_is_open'), 'job_posts', ['is_open'], unique=False)
+    op.create_index(op.f('ix_job_posts_job_title'), 'job_posts', ['job_title'], unique=False)
+    op.create_index(op.f('ix_job_posts_salary_from'), 'job_posts', ['salary_from'], unique=False)
+    op.create_index(op.f('ix_job_posts_salary_to'), 'job_posts', ['salary_to'], unique=False)
+    op.create_index('ix_resources_type_created', 'resources', ['resource_type', 'created_at'], unique=False)
+    _drop_duplicate_seekers()
+    op.create_index(op.f('ix_seeker_data_email'), 'seeker_data', ['email'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_seeker_data_email'), table_name='seeker_data')
+    op.drop_index('ix_resources_type_created', table_name='resources')
+    op.drop_index(op.f('ix_job_posts_salary_to'), table_name='job_posts')
+    op.drop_index(op.f('ix_job_posts_salary_from'), table_name='job_posts')
+    op.drop_index(op.f('ix_job_posts_job_title'), table_name='job_posts')
+    op.drop_index(op.f('ix_job_posts_is_open'), table_name='job_posts')
+    op.drop_index(op.f('ix_job_posts_employment_type'), table_name='job_posts')
+    op.drop_index(op.f('ix_job_posts_email'), table_name='job_posts')
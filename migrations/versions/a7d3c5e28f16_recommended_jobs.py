@@ -0,0 +1,36 @@
+"""materialized "jobs for you" lists
+
+Starts empty: profile saves and post changes fill it from then on, and
+``flask jobmatch rebuild-recommendations`` fills it for existing seekers.
+
+Revision ID: a7d3c5e28f16
+Revises: e4c71a0b9d52
+Create Date: 2026-10-18 19:47:03.118940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3c5e28f16'
+down_revision = 'e4c71a0b9d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recommended_jobs',
+    sa.Column('seeker_id', sa.Integer(), nullable=False),
+    sa.Column('job_post_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['job_post_id'], ['job_posts.id'], ),
+    sa.ForeignKeyConstraint(['seeker_id'], ['seeker_data.id'], ),
+    sa.PrimaryKeyConstraint('seeker_id', 'job_post_id')
+    )
+    op.create_index(op.f('ix_recommended_jobs_job_post_id'), 'recommended_jobs', ['job_post_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_recommended_jobs_job_post_id'), table_name='recommended_jobs')
+    op.drop_table('recommended_jobs')
@@ -0,0 +1,53 @@
+"""fold the legacy application tables into ``application``
+
+Databases from before the single ``application`` table still hold
+``active_application``, ``accepted_application`` and
+``rejected_application``. Their rows are copied across with the matching
+status and the old tables dropped, before the counters revision sums
+``application``. Accepted and rejected rows never stored ``job_post_id``; it
+is recovered from the job title where a post with that title still exists.
+
+Revision ID: b8e2d5f91c46
+Revises: 6b2f0e9d14a3
+Create Date: 2026-10-19 09:14:52.681403
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2d5f91c46'
+down_revision = '6b2f0e9d14a3'
+branch_labels = None
+depends_on = None
+
+LEGACY_TABLES = (
+    ("active_application", "active"),
+    ("accepted_application", "accepted"),
+    ("rejected_application", "rejected"),
+)
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    existing = set(inspector.get_table_names())
+    for table, status in LEGACY_TABLES:
+        if table not in existing:
+            continue
+        has_post_id = any(c["name"] == "job_post_id" for c in inspector.get_columns(table))
+        post_id = "l.job_post_id" if has_post_id else (
+            "(SELECT j.id FROM job_posts j WHERE j.job_title = l.job_title ORDER BY j.id LIMIT 1)"
+        )
+        conn.execute(sa.text(
+            "INSERT INTO application (seeker_name, seeker_email, job_post_id, job_title, status, applied_at) "
+            f"SELECT l.seeker_name, l.seeker_email, {post_id}, l.job_title, :status, l.applied_at "
+            f"FROM {table} l ORDER BY l.id"
+        ), {"status": status})
+        op.drop_table(table)
+
+
+def downgrade():
+    # The copied rows stay in ``application``; the legacy tables are not recreated.
+    pass
@@ -0,0 +1,63 @@
+"""FTS5 job and talent search tables
+
+Mirrors of ``job_posts`` and the seeker profiles (with extracted resume text)
+that ``search_service`` keeps in sync from mapper events. Databases where
+an earlier release created them at startup keep their tables. SQLite builds
+without FTS5 skip this step and search falls back to LIKE scans.
+
+Revision ID: d3a8b6c41f07
+Revises: 9c1e5f7a2b84
+Create Date: 2026-10-18 17:58:37.902415
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8b6c41f07'
+down_revision = '9c1e5f7a2b84'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+JOB_COLUMNS = ("job_title", "company_name", "location", "job_description", "key_responsibilities")
+TALENT_COLUMNS = ("full_name", "skills", "experience", "education", "resume_text")
+
+
+def _create(conn, table, columns):
+    if table in sa.inspect(conn).get_table_names():
+        return False
+    conn.execute(sa.text(
+        f"CREATE VIRTUAL TABLE {table} USING fts5("
+        f"{', '.join(columns)}, tokenize='unicode61 remove_diacritics 2')"
+    ))
+    return True
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != "sqlite":
+        return
+    try:
+        if _create(conn, "job_posts_fts", JOB_COLUMNS):
+            cols = ", ".join(JOB_COLUMNS)
+            conn.execute(sa.text(f"INSERT INTO job_posts_fts(rowid, {cols}) SELECT id, {cols} FROM job_posts"))
+        if _create(conn, "talent_fts", TALENT_COLUMNS):
+            conn.execute(sa.text(
+                f"INSERT INTO talent_fts(rowid, {', '.join(TALENT_COLUMNS)}) "
+                "SELECT s.id, s.full_name, s.skills, s.experience, s.education, r.text "
+                "FROM seeker_data s LEFT JOIN resume_texts r ON r.key = s.resume_path AND r.status = 'done'"
+            ))
+    except OperationalError:
+        logger.warning("SQLite FTS5 unavailable; skipping the search tables")
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        conn.execute(sa.text("DROP TABLE IF EXISTS talent_fts"))
+        conn.execute(sa.text("DROP TABLE IF EXISTS job_posts_fts"))
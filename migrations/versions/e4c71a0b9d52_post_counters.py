@@ -0,0 +1,61 @@
+"""application counters and daily rollups per post
+
+``post_counters`` and ``post_daily_stats`` back the company dashboard totals
+and ``/api/company_stats``. They are filled here from the existing
+applications; from then on the routes keep them current.
+
+Revision ID: e4c71a0b9d52
+Revises: b8e2d5f91c46
+Create Date: 2026-10-18 19:12:44.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c71a0b9d52'
+down_revision = 'b8e2d5f91c46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_counters',
+    sa.Column('job_post_id', sa.Integer(), nullable=False),
+    sa.Column('active', sa.Integer(), nullable=False),
+    sa.Column('accepted', sa.Integer(), nullable=False),
+    sa.Column('rejected', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['job_post_id'], ['job_posts.id'], ),
+    sa.PrimaryKeyConstraint('job_post_id')
+    )
+    op.create_table('post_daily_stats',
+    sa.Column('job_post_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('received', sa.Integer(), nullable=False),
+    sa.Column('accepted', sa.Integer(), nullable=False),
+    sa.Column('rejected', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['job_post_id'], ['job_posts.id'], ),
+    sa.PrimaryKeyConstraint('job_post_id', 'day')
+    )
+    op.execute(
+        "INSERT INTO post_counters (job_post_id, active, accepted, rejected) "
+        "SELECT a.job_post_id, sum(a.status = 'active'), sum(a.status = 'accepted'), sum(a.status = 'rejected') "
+        "FROM application a JOIN job_posts j ON j.id = a.job_post_id GROUP BY a.job_post_id"
+    )
+    op.execute(
+        "INSERT INTO post_daily_stats (job_post_id, day, received, accepted, rejected) "
+        "SELECT job_post_id, day, sum(received), sum(accepted), sum(rejected) FROM ("
+        "  SELECT a.job_post_id, date(a.applied_at) AS day, 1 AS received, 0 AS accepted, 0 AS rejected "
+        "  FROM application a JOIN job_posts j ON j.id = a.job_post_id"
+        "  UNION ALL"
+        "  SELECT a.job_post_id, date(a.decided_at), 0, a.status = 'accepted', a.status = 'rejected' "
+        "  FROM application a JOIN job_posts j ON j.id = a.job_post_id"
+        "  WHERE a.status != 'active' AND a.decided_at IS NOT NULL"
+        ") GROUP BY job_post_id, day"
+    )
+
+
+def downgrade():
+    op.drop_table('post_daily_stats')
+    op.drop_table('post_counters')
@@ -0,0 +1,72 @@
+"""skill taxonomy and per-seeker / per-post skill tags
+
+Seeds the taxonomy so saves tag from the first request; ``flask jobmatch
+backfill`` (or ``normalize-skills``) tags the profiles and posts that exist.
+
+Revision ID: f2b9d41c7e63
+Revises: a7d3c5e28f16
+Create Date: 2026-10-18 21:12:40.527311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from application.services.skill_service import TAXONOMY, normalize
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b9d41c7e63'
+down_revision = 'a7d3c5e28f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('skills',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('skill_aliases',
+    sa.Column('alias', sa.String(length=64), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ),
+    sa.PrimaryKeyConstraint('alias')
+    )
+    op.create_index(op.f('ix_skill_aliases_skill_id'), 'skill_aliases', ['skill_id'], unique=False)
+    # Same rows as skill_service.seed(): the first skill to claim an alias keeps it.
+    skills, aliases = [], {}
+    for skill_id, (name, spellings) in enumerate(TAXONOMY.items(), start=1):
+        skills.append({'id': skill_id, 'name': " ".join(name.lower().split())})
+        for alias in (normalize(name), *map(normalize, spellings)):
+            if alias:
+                aliases.setdefault(alias, skill_id)
+    op.bulk_insert(sa.table('skills', sa.column('id'), sa.column('name')), skills)
+    op.bulk_insert(sa.table('skill_aliases', sa.column('alias'), sa.column('skill_id')),
+                   [{'alias': alias, 'skill_id': skill_id} for alias, skill_id in aliases.items()])
+    op.create_table('seeker_skills',
+    sa.Column('seeker_id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['seeker_id'], ['seeker_data.id'], ),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ),
+    sa.PrimaryKeyConstraint('seeker_id', 'skill_id')
+    )
+    op.create_index('ix_seeker_skills_skill_seeker', 'seeker_skills', ['skill_id', 'seeker_id'], unique=False)
+    op.create_table('job_post_skills',
+    sa.Column('job_post_id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['job_post_id'], ['job_posts.id'], ),
+    sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ),
+    sa.PrimaryKeyConstraint('job_post_id', 'skill_id')
+    )
+    op.create_index('ix_job_post_skills_skill_post', 'job_post_skills', ['skill_id', 'job_post_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_post_skills_skill_post', table_name='job_post_skills')
+    op.drop_table('job_post_skills')
+    op.drop_index('ix_seeker_skills_skill_seeker', table_name='seeker_skills')
+    op.drop_table('seeker_skills')
+    op.drop_index(op.f('ix_skill_aliases_skill_id'), table_name='skill_aliases')
+    op.drop_table('skill_aliases')
+    op.drop_table('skills')
@@ -0,0 +1,37 @@
+"""Every route query registered in ``application.utils.query_plans`` reads an index.
+
+The same checks as ``flask jobmatch check-query-plans``, run against a fresh
+SQLite database migrated to head.
+"""
+import os
+import shutil
+import tempfile
+import pytest
+
+# The config classes read the environment when they are imported.
+_TMP = tempfile.mkdtemp(prefix="jobmatch-plans-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_TMP, 'plans.db')}"
+os.environ["LOCAL_STATE_FOLDER"] = os.path.join(_TMP, "state")
+os.environ["FLASK_ENV"] = "development"
+
+from application import create_app, init_db  # noqa: E402
+from application.utils import query_plans  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = create_app()
+    init_db(app)
+    yield app
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+@pytest.mark.parametrize("name, build, allow_scan", query_plans._checks,
+                         ids=[name for name, _, _ in query_plans._checks])
+def test_no_unexpected_full_scan(app, name, build, allow_scan):
+    with app.app_context():
+        stmt = build()
+        if stmt is None:
+            pytest.skip("not applicable on this SQLite build")
+        details = query_plans.explain(stmt)
+        assert not query_plans.full_scans(details, allow_scan), "\n".join(details)